@@ -0,0 +1,215 @@
+#-*- coding: utf-8 -*-
+"""busqueda de texto completo de articulos: tsvector + gin en postgresql, tabla fts5 en sqlite"""
+import base64
+import html
+import re
+
+from django.db import connection
+from django.db.models import F, FloatField, Func, Q, Value
+from django.db.models.functions import Cast, Coalesce
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape, strip_tags
+
+from .models import Articulo
+
+TABLA_FTS = 'articulo_fts'
+#pesos por columna: titulo > resumen > contenido
+PESOS = {'titulo': 'A', 'resumen': 'B', 'contenido': 'C'}
+PESOS_BM25 = (10.0, 5.0, 1.0)
+#marcas privadas (uso privado de unicode) que devuelve el motor; tras limpiar y escapar el texto se cambian por <mark>
+MARCA_INICIO = '\ue000'
+MARCA_FIN = '\ue001'
+
+
+def texto_plano(valor):
+    """contenido html -> texto sin etiquetas ni entidades (lo que se indexa y se resalta)"""
+    return html.unescape(strip_tags(valor or ''))
+
+
+def resaltado_html(valor):
+    """texto resaltado seguro para insertar como html: solo contiene texto escapado y <mark>"""
+    seguro = escape(texto_plano(valor))
+    return seguro.replace(MARCA_INICIO, '<mark>').replace(MARCA_FIN, '</mark>')
+
+
+def es_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def _vector():
+    from django.contrib.postgres.search import SearchVector
+    vector = None
+    for campo, peso in PESOS.items():
+        parte = SearchVector(Coalesce(campo, Value('')), weight=peso, config='spanish')
+        vector = parte if vector is None else vector + parte
+    return vector
+
+
+def crear_tabla_fts(cursor):
+    """tabla fts5 espejo de articulo (rowid = articulo.id); sin acentos para buscar 'musica' o 'música'"""
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5("
+        "titulo, resumen, contenido, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+
+
+_tablas_fts_creadas = set()
+
+
+def _asegurar_tabla_fts():
+    """crea la tabla fts5 si falta (p.ej. bases creadas sin migraciones); una vez por proceso y alias"""
+    if connection.alias in _tablas_fts_creadas:
+        return
+    with connection.cursor() as cursor:
+        crear_tabla_fts(cursor)
+    _tablas_fts_creadas.add(connection.alias)
+
+
+def indexar(articulo_ids):
+    """actualiza el indice de los articulos indicados"""
+    articulo_ids = list(articulo_ids)
+    if not articulo_ids:
+        return
+    if es_postgres():
+        Articulo.objects.filter(id__in=articulo_ids).update(busqueda=_vector())
+        return
+    _asegurar_tabla_fts()
+    filas = Articulo.objects.filter(id__in=articulo_ids).values_list('id', 'titulo', 'resumen', 'contenido')
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {TABLA_FTS} WHERE rowid = %s", [(i,) for i in articulo_ids])
+        cursor.executemany(
+            f"INSERT INTO {TABLA_FTS} (rowid, titulo, resumen, contenido) VALUES (%s, %s, %s, %s)",
+            [(i, texto_plano(titulo), texto_plano(resumen), texto_plano(contenido)) for i, titulo, resumen, contenido in filas],
+        )
+
+
+def desindexar(articulo_id):
+    if es_postgres():
+        return
+    _asegurar_tabla_fts()
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLA_FTS} WHERE rowid = %s", [articulo_id])
+
+
+def reindexar_todo(batch_size=500):
+    """reconstruye el indice completo (tras cargas masivas con bulk_create o update)"""
+    if not es_postgres():
+        with connection.cursor() as cursor:
+            crear_tabla_fts(cursor)
+            cursor.execute(f"DELETE FROM {TABLA_FTS}")
+    ids = list(Articulo.objects.order_by('id').values_list('id', flat=True))
+    for inicio in range(0, len(ids), batch_size):
+        indexar(ids[inicio:inicio + batch_size])
+    return len(ids)
+
+
+def _consulta_fts5(texto):
+    """convierte el texto del usuario en una consulta fts5 segura: terminos entre comillas y prefijo en el ultimo"""
+    terminos = re.findall(r'\w+', texto, flags=re.UNICODE)
+    if not terminos:
+        return None
+    partes = [f'"{t}"' for t in terminos]
+    partes[-1] += '*'
+    return ' '.join(partes)
+
+
+def filtrar(queryset, texto):
+    """restringe un queryset de articulos a los que coinciden con el texto (sin ranking)"""
+    if es_postgres():
+        from django.contrib.postgres.search import SearchQuery
+        return queryset.filter(busqueda=SearchQuery(texto, config='spanish', search_type='websearch'))
+    consulta = _consulta_fts5(texto)
+    if consulta is None:
+        return queryset.none()
+    _asegurar_tabla_fts()
+    return queryset.filter(id__in=RawSQL(f"SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s", [consulta]))
+
+
+def codificar_cursor(puntaje, articulo_id):
+    return base64.urlsafe_b64encode(f"{puntaje!r}:{articulo_id}".encode()).decode()
+
+
+def decodificar_cursor(cursor):
+    try:
+        puntaje, articulo_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        return float(puntaje), int(articulo_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Cursor inválido')
+
+
+def buscar(texto, limite=20, cursor=None):
+    """articulos publicados ordenados por relevancia. retorna (lista de (id, puntaje, titulo_resaltado, fragmento), cursor siguiente).
+    titulo_resaltado y fragmento son texto escapado con los terminos en <mark>"""
+    despues = decodificar_cursor(cursor) if cursor else None
+    if es_postgres():
+        filas = _buscar_postgres(texto, limite + 1, despues)
+    else:
+        filas = _buscar_sqlite(texto, limite + 1, despues)
+
+    filas = [
+        (articulo_id, puntaje, resaltado_html(titulo), resaltado_html(fragmento))
+        for articulo_id, puntaje, titulo, fragmento in filas
+    ]
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = codificar_cursor(filas[-1][1], filas[-1][0])
+    return filas, siguiente
+
+
+def _sin_etiquetas(campo):
+    #el fragmento se arma sobre el texto sin html para no cortar etiquetas a la mitad
+    return Func(F(campo), Value('<[^>]*>'), Value(' '), Value('g'), function='regexp_replace')
+
+
+def _buscar_postgres(texto, limite, despues):
+    from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+
+    consulta = SearchQuery(texto, config='spanish', search_type='websearch')
+    queryset = (
+        Articulo.objects.filter(publicado=True, busqueda=consulta)
+        #ts_rank devuelve real: en double precision el valor que viaja en el cursor es exactamente el comparado
+        .annotate(puntaje=Cast(SearchRank(F('busqueda'), consulta), FloatField()))
+    )
+    if despues:
+        puntaje, articulo_id = despues
+        queryset = queryset.filter(Q(puntaje__lt=puntaje) | Q(puntaje=puntaje, id__lt=articulo_id))
+    #el resaltado solo se calcula para la pagina pedida
+    queryset = (
+        queryset.order_by('-puntaje', '-id')[:limite]
+        .annotate(
+            titulo_resaltado=SearchHeadline('titulo', consulta, config='spanish', start_sel=MARCA_INICIO,
+                                            stop_sel=MARCA_FIN, highlight_all=True),
+            fragmento=SearchHeadline(Coalesce(_sin_etiquetas('resumen'), _sin_etiquetas('contenido')), consulta,
+                                     config='spanish', start_sel=MARCA_INICIO, stop_sel=MARCA_FIN,
+                                     max_words=35, min_words=15),
+        )
+    )
+    return [tuple(fila) for fila in queryset.values_list('id', 'puntaje', 'titulo_resaltado', 'fragmento')]
+
+
+def _buscar_sqlite(texto, limite, despues):
+    consulta = _consulta_fts5(texto)
+    if consulta is None:
+        return []
+    _asegurar_tabla_fts()
+    pesos = ', '.join(str(p) for p in PESOS_BM25)
+    #bm25 es menor cuanto mas relevante; se invierte para ordenar igual que en postgresql
+    sql = (
+        "SELECT id, puntaje, titulo_resaltado, fragmento FROM ("
+        f" SELECT f.rowid AS id, -bm25({TABLA_FTS}, {pesos}) AS puntaje,"
+        f" highlight({TABLA_FTS}, 0, %s, %s) AS titulo_resaltado,"
+        f" snippet({TABLA_FTS}, -1, %s, %s, '…', 24) AS fragmento"
+        f" FROM {TABLA_FTS} f JOIN articulo a ON a.id = f.rowid"
+        f" WHERE {TABLA_FTS} MATCH %s AND a.publicado = %s"
+        ")"
+    )
+    parametros = [MARCA_INICIO, MARCA_FIN, MARCA_INICIO, MARCA_FIN, consulta, True]
+    if despues:
+        sql += " WHERE puntaje < %s OR (puntaje = %s AND id < %s)"
+        parametros += [despues[0], despues[0], despues[1]]
+    sql += " ORDER BY puntaje DESC, id DESC LIMIT %s"
+    parametros.append(limite)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        return [tuple(fila) for fila in cursor.fetchall()]
@@ -0,0 +1,24 @@
+#-*- coding: utf-8 -*-
+import uuid
+
+from django.core.cache import cache
+
+CLAVE_VERSION = 'articulos:categorias:version'
+
+
+def _version():
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        cache.add(CLAVE_VERSION, uuid.uuid4().hex[:8], None)
+        version = cache.get(CLAVE_VERSION)
+    return version
+
+
+def clave_lista(parametros):
+    """clave de la lista de categorias para unos parametros de query (pagina, tamaño)"""
+    return f"articulos:categorias:{_version()}:{parametros}"
+
+
+def invalidar():
+    """cambia la version: todas las paginas cacheadas quedan obsoletas de una vez"""
+    cache.set(CLAVE_VERSION, uuid.uuid4().hex[:8], None)
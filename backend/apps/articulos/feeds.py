@@ -0,0 +1,116 @@
+#-*- coding: utf-8 -*-
+"""feeds materializados (top n) de articulos mas vistos y destacados, por categoria, guardados en cache"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Articulo
+
+FEEDS = ('mas_vistos', 'destacados')
+TODAS = '_todas'
+CLAVE_GENERACION = 'articulos:feed:generacion'
+
+
+def _generacion():
+    generacion = cache.get(CLAVE_GENERACION)
+    if generacion is None:
+        generacion = uuid.uuid4().hex[:8]
+        cache.add(CLAVE_GENERACION, generacion, None)
+        generacion = cache.get(CLAVE_GENERACION, generacion)
+    return generacion
+
+
+def _clave(nombre, categoria_slug):
+    return f"articulos:feed:{_generacion()}:{nombre}:{categoria_slug or TODAS}"
+
+
+def _calcular(nombre, categoria_slug):
+    queryset = Articulo.objects.filter(publicado=True)
+    if categoria_slug:
+        queryset = queryset.filter(categoria__slug=categoria_slug)
+    if nombre == 'mas_vistos':
+        #usa el indice (publicado, vistas)
+        filas = queryset.order_by('-vistas', '-id').values_list('id', 'vistas')
+    else:
+        filas = queryset.filter(destacado=True).order_by('-fecha_publicacion', '-id').values_list('id', 'vistas')
+    return [list(fila) for fila in filas[:settings.ARTICULOS_FEED_TOP]]
+
+
+def _guardar(clave, entradas):
+    feed = {'entradas': entradas, 'version': uuid.uuid4().hex}
+    cache.set(clave, feed, settings.ARTICULOS_FEED_TTL)
+    return feed
+
+
+def obtener_feed(nombre, categoria_slug=None):
+    """retorna {'entradas': [[id, vistas], ...], 'version'}; se recalcula solo si no esta en cache"""
+    clave = _clave(nombre, categoria_slug)
+    feed = cache.get(clave)
+    if feed is None:
+        feed = _guardar(clave, _calcular(nombre, categoria_slug))
+    return feed
+
+
+def invalidar(categoria_slugs=()):
+    """descarta los feeds generales y los de las categorias indicadas (tras crear/editar/borrar articulos)"""
+    claves = []
+    for nombre in FEEDS:
+        claves.append(_clave(nombre, None))
+        claves.extend(_clave(nombre, slug) for slug in categoria_slugs if slug)
+    cache.delete_many(claves)
+
+
+def invalidar_todo():
+    """cambia la generacion de claves; usado cuando cambia una categoria (slug o borrado)"""
+    cache.set(CLAVE_GENERACION, uuid.uuid4().hex[:8], None)
+
+
+def actualizar_vistas(articulo_ids):
+    """ajusta en su lugar los feeds en cache con los nuevos contadores, sin consultar el orden en la base.
+    mas_vistos se reordena; destacados conserva su orden y solo cambia la version si contiene alguno de los ids"""
+    filas = list(
+        Articulo.objects.filter(id__in=list(articulo_ids), publicado=True)
+        .values_list('id', 'vistas', 'categoria__slug')
+    )
+    if not filas:
+        return
+    top = settings.ARTICULOS_FEED_TOP
+    por_feed = {}
+    for articulo_id, vistas, categoria_slug in filas:
+        #el feed general y el de su categoria (si tiene)
+        for slug in {None, categoria_slug}:
+            for nombre in FEEDS:
+                por_feed.setdefault((nombre, slug), []).append((articulo_id, vistas))
+
+    for (nombre, slug), cambios in por_feed.items():
+        clave = _clave(nombre, slug)
+        if nombre == 'destacados':
+            _actualizar_destacados(clave, dict(cambios))
+            continue
+        feed = cache.get(clave)
+        if feed is None:
+            #no hay feed materializado: se calculara completo en la proxima lectura
+            continue
+        vistas_por_id = dict(map(tuple, feed['entradas']))
+        completo = len(vistas_por_id) < top
+        minimo = min(vistas_por_id.values()) if vistas_por_id else 0
+        cambio = False
+        for articulo_id, vistas in cambios:
+            if articulo_id in vistas_por_id or completo or vistas > minimo:
+                vistas_por_id[articulo_id] = vistas
+                cambio = True
+        if not cambio:
+            continue
+        entradas = sorted(vistas_por_id.items(), key=lambda e: (-e[1], -e[0]))[:top]
+        _guardar(clave, [list(e) for e in entradas])
+
+
+def _actualizar_destacados(clave, vistas_por_id):
+    feed = cache.get(clave)
+    if feed is None:
+        return
+    entradas = [[articulo_id, vistas_por_id.get(articulo_id, vistas)] for articulo_id, vistas in feed['entradas']]
+    #nueva version (y etag) solo si cambio alguna de sus entradas
+    if entradas != feed['entradas']:
+        _guardar(clave, entradas)
@@ -0,0 +1,147 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from apps.articulos.models import Articulo, Categoria
+from apps.articulos.serializers import ArticuloListSerializer
+
+#cache en memoria propia del comando: vaciarla no toca la cache compartida (redis en produccion)
+CACHE_BENCHMARK = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark-listado',
+    }
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+class ListadoAnteriorSerializer(serializers.ModelSerializer):
+    """serializer de listas previo al recorte: contenido completo y cinco build_absolute_uri por fila"""
+    autor_nombre = serializers.CharField(source='autor.full_name', read_only=True)
+    categoria_nombre = serializers.CharField(source='categoria.nombre', read_only=True)
+    imagen_destacada = serializers.SerializerMethodField()
+    imagen_portada = serializers.SerializerMethodField()
+    imagen_thumbnail = serializers.SerializerMethodField()
+    imagen_portada_url = serializers.SerializerMethodField()
+    imagen_thumbnail_url = serializers.SerializerMethodField()
+    archivo_adjunto = serializers.SerializerMethodField()
+    tiene_multimedia = serializers.BooleanField(read_only=True)
+    categoria = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Articulo
+        fields = [
+            'id', 'titulo', 'slug', 'resumen', 'contenido',
+            'imagen_portada', 'imagen_thumbnail', 'imagen_portada_url', 'imagen_thumbnail_url', 'imagen_url',
+            'imagen_destacada', 'video_url', 'archivo_adjunto',
+            'autor_nombre', 'categoria', 'categoria_nombre',
+            'publicado', 'destacado',
+            'fecha_publicacion', 'fecha_creacion', 'vistas', 'tiene_multimedia'
+        ]
+
+    def _absoluta(self, archivo):
+        request = self.context.get('request')
+        if archivo and request:
+            return request.build_absolute_uri(archivo.url)
+        return None
+
+    def get_imagen_destacada(self, obj):
+        return self._absoluta(obj.imagen_portada) or obj.imagen_url
+
+    def get_imagen_portada(self, obj):
+        return self._absoluta(obj.imagen_portada)
+
+    def get_imagen_thumbnail(self, obj):
+        return self._absoluta(obj.imagen_thumbnail)
+
+    def get_imagen_portada_url(self, obj):
+        return self._absoluta(obj.imagen_portada)
+
+    def get_imagen_thumbnail_url(self, obj):
+        return self._absoluta(obj.imagen_thumbnail)
+
+    def get_archivo_adjunto(self, obj):
+        return self._absoluta(obj.archivo_adjunto)
+
+    def get_categoria(self, obj):
+        if obj.categoria:
+            return {'id': obj.categoria.id, 'nombre': obj.categoria.nombre}
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara tamaño de respuesta y tiempo de serializacion de una pagina de articulos: '
+        'serializer de listas anterior (contenido entero) contra el serializer liviano actual. '
+        'Con --generar crea articulos de prueba dentro de una transaccion que se revierte.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limite', type=int, default=20, help='Articulos por pagina')
+        parser.add_argument('--repeticiones', type=int, default=50)
+        parser.add_argument('--generar', type=int, default=0,
+                            help='Crear N articulos temporales (contenido de ~8 KB) para la medicion')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['generar']:
+                    self.generar(options['generar'])
+                self.medir(options['limite'], options['repeticiones'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def generar(self, cantidad):
+        autor = get_user_model().objects.order_by('id').first()
+        if autor is None:
+            raise CommandError('Se necesita al menos un usuario para generar articulos')
+        categoria, _ = Categoria.objects.get_or_create(nombre='Benchmark')
+        contenido = ('Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 150).strip()
+        Articulo.objects.bulk_create([
+            Articulo(titulo=f'Benchmark {i}', slug=f'benchmark-listado-{i}', contenido=contenido,
+                     autor=autor, categoria=categoria, publicado=True)
+            for i in range(cantidad)
+        ])
+
+    def medir(self, limite, repeticiones):
+        base = Articulo.objects.filter(publicado=True)
+        if not base.exists():
+            raise CommandError('No hay articulos publicados; use --generar N')
+        request = RequestFactory().get('/api/articulos/api/articulos/')
+        contexto = {'request': request}
+
+        casos = [
+            ('anterior', lambda: ListadoAnteriorSerializer(
+                base.select_related('autor', 'categoria')[:limite], many=True, context=contexto).data),
+            ('liviano', lambda: ArticuloListSerializer(
+                ArticuloListSerializer.preparar_queryset(base)[:limite], many=True, context=contexto).data),
+        ]
+        self.stdout.write(f"{'serializer':<12} {'filas':>6} {'bytes':>10} {'consultas':>10} {'ms/pagina':>10}")
+        for nombre, serializar in casos:
+            with override_settings(CACHES=CACHE_BENCHMARK):
+                self.medir_caso(nombre, serializar, repeticiones)
+
+    def medir_caso(self, nombre, serializar, repeticiones):
+        #primera pagina con la cache vacia para contar las consultas en frio
+        cache.clear()
+        with CaptureQueriesContext(connection) as consultas:
+            datos = serializar()
+        cuerpo = JSONRenderer().render(datos)
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            JSONRenderer().render(serializar())
+        ms = (time.perf_counter() - inicio) / repeticiones * 1000
+        self.stdout.write(
+            f"{nombre:<12} {len(datos):>6} {len(cuerpo):>10} {len(consultas.captured_queries):>10} {ms:>10.2f}"
+        )
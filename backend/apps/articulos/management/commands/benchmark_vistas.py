@@ -0,0 +1,80 @@
+import random
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.articulos.sketches import BloomRotativo, HyperLogLog
+
+#bytes aproximados por fila de la tabla intermedia en postgresql (tupla + pk + indice unico)
+BYTES_POR_FILA_M2M = 100
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara en memoria el modo exacto (una fila por lector) con el modo compacto '
+        '(hyperloglog + bloom) en precision, memoria y tiempo. No toca la base de datos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lectores', type=int, action='append',
+                            help='Lectores unicos a simular (repetible). Por defecto 100, 1000, 10000 y 100000')
+        parser.add_argument('--repeticion', type=float, default=3.0, help='Vistas promedio por lector')
+        parser.add_argument('--semilla', type=int, default=42)
+
+    def handle(self, *args, **options):
+        precision = settings.ARTICULOS_HLL_PRECISION
+        capacidad = settings.ARTICULOS_BLOOM_CAPACIDAD
+        error = settings.ARTICULOS_BLOOM_ERROR
+        inicial = settings.ARTICULOS_BLOOM_CAPACIDAD_INICIAL
+        self.stdout.write(f"HLL precision={precision}, bloom capacidad={inicial}..{capacidad} error={error}")
+        self.stdout.write(
+            f"{'lectores':>9} {'vistas':>9} | {'unicos':>9} {'memoria':>10} {'us/vista':>8} | "
+            f"{'hll':>9} {'error':>7} {'contadas':>9} {'memoria':>10} {'us/vista':>8}"
+        )
+        for lectores in options['lectores'] or [100, 1000, 10000, 100000]:
+            self.simular(lectores, options['repeticion'], options['semilla'], precision, capacidad, error, inicial)
+
+    def simular(self, lectores, repeticion, semilla, precision, capacidad, error, inicial):
+        rnd = random.Random(semilla)
+        eventos = [rnd.randrange(lectores) for _ in range(int(lectores * repeticion))]
+        #asegurar que todos los lectores aparecen al menos una vez
+        eventos.extend(range(lectores))
+        rnd.shuffle(eventos)
+
+        #modo exacto: conjunto de lectores (equivale a la tabla intermedia)
+        inicio = time.perf_counter()
+        vistos = set()
+        vistas_exactas = 0
+        for usuario_id in eventos:
+            if usuario_id not in vistos:
+                vistos.add(usuario_id)
+                vistas_exactas += 1
+        us_exacto = (time.perf_counter() - inicio) / len(eventos) * 1e6
+        memoria_exacta = len(vistos) * BYTES_POR_FILA_M2M
+
+        #modo compacto
+        inicio = time.perf_counter()
+        hll = HyperLogLog(precision)
+        recientes = BloomRotativo(capacidad, error, inicial)
+        vistas_compactas = 0
+        for usuario_id in eventos:
+            hll.add(usuario_id)
+            if recientes.add(usuario_id):
+                vistas_compactas += 1
+        us_compacto = (time.perf_counter() - inicio) / len(eventos) * 1e6
+        memoria_compacta = len(hll.to_bytes()) + len(recientes.to_bytes())
+
+        estimado = hll.count()
+        error_hll = (estimado - len(vistos)) / len(vistos) * 100
+        self.stdout.write(
+            f"{lectores:>9} {len(eventos):>9} | {len(vistos):>9} {self.formato(memoria_exacta):>10} {us_exacto:>8.2f} | "
+            f"{estimado:>9} {error_hll:>+6.2f}% {vistas_compactas:>9} {self.formato(memoria_compacta):>10} {us_compacto:>8.2f}"
+        )
+        sys.stdout.flush()
+
+    @staticmethod
+    def formato(bytes_):
+        if bytes_ >= 1 << 20:
+            return f"{bytes_ / (1 << 20):.1f} MB"
+        return f"{bytes_ / 1024:.1f} KB"
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from apps.articulos.busqueda import reindexar_todo
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el indice de busqueda de articulos (necesario tras cargas con bulk_create o update)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=500, help='Articulos por lote')
+
+    def handle(self, *args, **options):
+        total = reindexar_todo(batch_size=options['batch'])
+        self.stdout.write(self.style.SUCCESS(f"{total} articulos indexados"))
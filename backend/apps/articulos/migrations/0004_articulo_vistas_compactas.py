@@ -0,0 +1,29 @@
+#generated by django 5.2.7 on 2026-10-19 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articulos', '0003_articulo_usuarios_que_vieron'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticuloVistasCompactas',
+            fields=[
+                ('articulo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='vistas_compactas', serialize=False, to='articulos.articulo')),
+                ('hll', models.BinaryField()),
+                ('recientes', models.BinaryField()),
+                ('lectores_unicos', models.PositiveIntegerField(default=0)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Vistas compactas de artículo',
+                'verbose_name_plural': 'Vistas compactas de artículos',
+                'db_table': 'articulo_vistas_compactas',
+            },
+        ),
+    ]
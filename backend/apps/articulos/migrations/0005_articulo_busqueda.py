@@ -0,0 +1,68 @@
+#generated by django 5.2.7 on 2026-10-19 16:50
+
+import apps.articulos.models
+import django.contrib.postgres.search
+from django.db import migrations
+
+from apps.articulos.busqueda import texto_plano
+
+LOTE = 500
+
+
+def crear_indice(apps, schema_editor):
+    """carga inicial del vector en postgresql; tabla fts5 espejo en sqlite con el mismo texto plano que indexar()"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "UPDATE articulo SET busqueda = "
+            "setweight(to_tsvector('spanish', coalesce(titulo, '')), 'A') || "
+            "setweight(to_tsvector('spanish', coalesce(resumen, '')), 'B') || "
+            "setweight(to_tsvector('spanish', coalesce(contenido, '')), 'C')"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS articulo_fts USING fts5("
+            "titulo, resumen, contenido, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        Articulo = apps.get_model('articulos', 'Articulo')
+        filas = Articulo.objects.order_by('id').values_list('id', 'titulo', 'resumen', 'contenido')
+        lote = []
+        with schema_editor.connection.cursor() as cursor:
+            for articulo_id, titulo, resumen, contenido in filas.iterator(chunk_size=LOTE):
+                lote.append((articulo_id, texto_plano(titulo), texto_plano(resumen), texto_plano(contenido)))
+                if len(lote) >= LOTE:
+                    _insertar_fts(cursor, lote)
+                    lote = []
+            _insertar_fts(cursor, lote)
+
+
+def _insertar_fts(cursor, lote):
+    if lote:
+        cursor.executemany(
+            "INSERT INTO articulo_fts (rowid, titulo, resumen, contenido) VALUES (%s, %s, %s, %s)", lote
+        )
+
+
+def eliminar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS articulo_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articulos', '0004_articulo_vistas_compactas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='articulo',
+            name='busqueda',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(crear_indice, eliminar_indice),
+        migrations.AddIndex(
+            model_name='articulo',
+            index=apps.articulos.models.IndiceGin(fields=['busqueda'], name='articulo_busqueda_gin'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+#generated by django 5.2.7 on 2026-10-19 17:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articulos', '0005_articulo_busqueda'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='articulo',
+            index=models.Index(fields=['publicado', 'vistas'], name='articulo_publica_804fcb_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+#generated by django 5.2.7 on 2026-10-19 14:50
+
+import apps.articulos.models
+import apps.medios.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articulos', '0006_articulo_publicado_vistas_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='articulo',
+            name='imagen_portada',
+            field=models.ImageField(blank=True, help_text='Imagen horizontal para modal/detalle (1200x400px recomendado)', null=True, storage=apps.medios.storage.almacenamiento_contenido, upload_to=apps.articulos.models.upload_to_articulos_imagen, verbose_name='Imagen Banner (Horizontal)'),
+        ),
+        migrations.AlterField(
+            model_name='articulo',
+            name='imagen_thumbnail',
+            field=models.ImageField(blank=True, help_text='Imagen cuadrada para tarjetas de lista (600x600px recomendado)', null=True, storage=apps.medios.storage.almacenamiento_contenido, upload_to=apps.articulos.models.upload_to_articulos_imagen, verbose_name='Imagen Miniatura (Cuadrada)'),
+        ),
+    ]
@@ -1,9 +1,21 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.conf import settings
 from django.utils.text import slugify
 from django.utils import timezone
 import os
 from datetime import datetime
+from apps.medios.storage import almacenamiento_contenido
+
+
+class IndiceGin(GinIndex):
+    """gin en postgresql; en otros motores (sqlite en desarrollo) queda como indice comun para que las migraciones corran"""
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return models.Index.create_sql(self, model, schema_editor, using=using, **kwargs)
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
 
 
 def upload_to_articulos_imagen(instance, filename):
@@ -55,6 +67,7 @@ class Articulo(models.Model):
     #campos multimedia
     imagen_portada = models.ImageField(
         upload_to=upload_to_articulos_imagen,
+        storage=almacenamiento_contenido,
         null=True,
         blank=True,
         verbose_name='Imagen Banner (Horizontal)',
@@ -62,6 +75,7 @@ class Articulo(models.Model):
     )
     imagen_thumbnail = models.ImageField(
         upload_to=upload_to_articulos_imagen,
+        storage=almacenamiento_contenido,
         null=True,
         blank=True,
         verbose_name='Imagen Miniatura (Cuadrada)',
@@ -121,6 +135,8 @@ class Articulo(models.Model):
         blank=True,
         verbose_name='Usuarios que vieron este artículo'
     )
+    #vector de busqueda (solo postgresql; en sqlite se usa la tabla fts5 articulo_fts). ver apps.articulos.busqueda
+    busqueda = SearchVectorField(null=True, blank=True, editable=False)
 
     class Meta:
         db_table = 'articulo'
@@ -133,6 +149,8 @@ class Articulo(models.Model):
             models.Index(fields=['autor']),
             models.Index(fields=['categoria']),
             models.Index(fields=['-fecha_publicacion']),
+            models.Index(fields=['publicado', 'vistas']),
+            IndiceGin(fields=['busqueda'], name='articulo_busqueda_gin'),
         ]
 
     def save(self, *args, **kwargs):
@@ -154,3 +172,22 @@ class Articulo(models.Model):
 
     def __str__(self):
         return self.titulo
+
+
+class ArticuloVistasCompactas(models.Model):
+    """sketches de lectores por articulo para el modo compacto (ARTICULOS_VISTAS_MODO='compacto')"""
+    articulo = models.OneToOneField(Articulo, on_delete=models.CASCADE, primary_key=True, related_name='vistas_compactas')
+    #hyperloglog con los lectores unicos historicos
+    hll = models.BinaryField()
+    #filtro de bloom de lectores recientes para no contar dos veces la misma vista
+    recientes = models.BinaryField()
+    lectores_unicos = models.PositiveIntegerField(default=0)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'articulo_vistas_compactas'
+        verbose_name = 'Vistas compactas de artículo'
+        verbose_name_plural = 'Vistas compactas de artículos'
+
+    def __str__(self):
+        return f"{self.articulo}: ~{self.lectores_unicos} lectores"
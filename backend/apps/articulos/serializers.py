@@ -1,8 +1,14 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.functions import Substr
 from rest_framework import serializers
+from apps.medios import imagenes
+from .busqueda import texto_plano
 from .models import Categoria, Articulo
 
 class CategoriaSerializer(serializers.ModelSerializer):
-    articulos_count = serializers.IntegerField(source='articulos.count', read_only=True)
+    #anotado en CategoriaViewSet (solo articulos publicados) para no contar por fila
+    articulos_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Categoria
@@ -15,9 +21,10 @@ class ArticuloSerializer(serializers.ModelSerializer):
     imagen_destacada = serializers.SerializerMethodField()
     imagen_portada_url = serializers.SerializerMethodField()
     imagen_thumbnail_url = serializers.SerializerMethodField()
+    imagen_portada_srcset = serializers.SerializerMethodField()
+    imagen_thumbnail_srcset = serializers.SerializerMethodField()
     archivo_adjunto_url = serializers.SerializerMethodField()
     tiene_multimedia = serializers.BooleanField(read_only=True)
-    comentarios_count = serializers.IntegerField(source='comentarios.count', read_only=True)
     categoria_detalle = serializers.SerializerMethodField()
     
     class Meta:
@@ -25,11 +32,12 @@ class ArticuloSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'titulo', 'slug', 'contenido', 'resumen',
             'imagen_portada', 'imagen_portada_url', 'imagen_thumbnail', 'imagen_thumbnail_url',
+            'imagen_portada_srcset', 'imagen_thumbnail_srcset',
             'imagen_url', 'imagen_destacada',
             'video_url', 'archivo_adjunto', 'archivo_adjunto_url',
             'autor', 'autor_nombre', 'categoria', 'categoria_nombre', 'categoria_detalle',
             'publicado', 'destacado', 'fecha_publicacion', 'fecha_creacion',
-            'fecha_actualizacion', 'vistas', 'tiene_multimedia', 'comentarios_count'
+            'fecha_actualizacion', 'vistas', 'tiene_multimedia'
         ]
         read_only_fields = ('slug', 'fecha_creacion', 'fecha_actualizacion', 'vistas')
     
@@ -50,6 +58,12 @@ class ArticuloSerializer(serializers.ModelSerializer):
         if obj.imagen_thumbnail and request:
             return request.build_absolute_uri(obj.imagen_thumbnail.url)
         return None
+
+    def get_imagen_portada_srcset(self, obj):
+        return imagenes.srcset_campo(obj.imagen_portada, self.context.get('request'))
+
+    def get_imagen_thumbnail_srcset(self, obj):
+        return imagenes.srcset_campo(obj.imagen_thumbnail, self.context.get('request'))
     
     def get_archivo_adjunto_url(self, obj):
         request = self.context.get('request')
@@ -65,66 +79,112 @@ class ArticuloSerializer(serializers.ModelSerializer):
             }
         return None
 
+#caracteres de html que se leen por cada caracter de texto del extracto (margen para etiquetas y atributos)
+HTML_POR_CARACTER = 4
+
+
+def extracto(contenido, largo):
+    """texto plano de hasta `largo` caracteres desde el comienzo del html (que puede venir recortado)"""
+    contenido = contenido or ''
+    #una etiqueta cortada a la mitad al final del prefijo se descarta
+    apertura = contenido.rfind('<')
+    if apertura > contenido.rfind('>'):
+        contenido = contenido[:apertura]
+    #cada etiqueta separa palabras: '</p><p>' no debe pegar los parrafos
+    return ' '.join(texto_plano(contenido.replace('>', '> ')).split())[:largo].rstrip()
+
+
+def _clave_media(obj):
+    return f"articulo:media:{obj.id}:{obj.fecha_actualizacion.timestamp() if obj.fecha_actualizacion else 0}"
+
+
+def _rutas_media(obj):
+    """urls relativas de los archivos del articulo (la llamada al storage se hace una vez por version)"""
+    return {
+        'portada': obj.imagen_portada.url if obj.imagen_portada else None,
+        'thumbnail': obj.imagen_thumbnail.url if obj.imagen_thumbnail else None,
+        'adjunto': obj.archivo_adjunto.url if obj.archivo_adjunto else None,
+    }
+
+
+class ArticuloListaListSerializer(serializers.ListSerializer):
+    """carga de una vez desde cache las urls de media de toda la pagina"""
+
+    def to_representation(self, data):
+        articulos = list(data.all() if hasattr(data, 'all') else data)
+        self.child.precargar_media(articulos)
+        return super().to_representation(articulos)
+
+
 class ArticuloListSerializer(serializers.ModelSerializer):
-    """serializer simplificado para listas"""
+    """serializer liviano para listas: extracto en texto plano como contenido y urls de media cacheadas por articulo.
+    el cuerpo completo se obtiene del detalle"""
+    #columnas que necesita; usar con ArticuloListSerializer.preparar_queryset
+    CAMPOS = (
+        'id', 'titulo', 'slug', 'resumen', 'imagen_portada', 'imagen_thumbnail', 'imagen_url',
+        'video_url', 'archivo_adjunto', 'publicado', 'destacado', 'fecha_publicacion',
+        'fecha_creacion', 'fecha_actualizacion', 'vistas',
+        'autor__first_name', 'autor__last_name', 'categoria__id', 'categoria__nombre',
+    )
+
     autor_nombre = serializers.CharField(source='autor.full_name', read_only=True)
     categoria_nombre = serializers.CharField(source='categoria.nombre', read_only=True)
-    imagen_destacada = serializers.SerializerMethodField()
-    imagen_portada = serializers.SerializerMethodField()
-    imagen_thumbnail = serializers.SerializerMethodField()
-    imagen_portada_url = serializers.SerializerMethodField()
-    imagen_thumbnail_url = serializers.SerializerMethodField()
-    archivo_adjunto = serializers.SerializerMethodField()
+    contenido = serializers.SerializerMethodField()
     tiene_multimedia = serializers.BooleanField(read_only=True)
     categoria = serializers.SerializerMethodField()
-    
+
     class Meta:
         model = Articulo
         fields = [
             'id', 'titulo', 'slug', 'resumen', 'contenido',
-            'imagen_portada', 'imagen_thumbnail', 'imagen_portada_url', 'imagen_thumbnail_url', 'imagen_url', 'imagen_destacada',
-            'video_url', 'archivo_adjunto',
-            'autor_nombre', 'categoria', 'categoria_nombre', 
+            'imagen_url', 'video_url',
+            'autor_nombre', 'categoria', 'categoria_nombre',
             'publicado', 'destacado',
             'fecha_publicacion', 'fecha_creacion', 'vistas', 'tiene_multimedia'
         ]
-    
-    def get_imagen_destacada(self, obj):
-        request = self.context.get('request')
-        if obj.imagen_portada and request:
-            return request.build_absolute_uri(obj.imagen_portada.url)
-        return obj.imagen_url
-    
-    def get_imagen_portada(self, obj):
-        request = self.context.get('request')
-        if obj.imagen_portada and request:
-            return request.build_absolute_uri(obj.imagen_portada.url)
-        return None
-    
-    def get_imagen_thumbnail(self, obj):
-        request = self.context.get('request')
-        if obj.imagen_thumbnail and request:
-            return request.build_absolute_uri(obj.imagen_thumbnail.url)
-        return None
+        list_serializer_class = ArticuloListaListSerializer
 
-    def get_imagen_portada_url(self, obj):
-        request = self.context.get('request')
-        if obj.imagen_portada and request:
-            return request.build_absolute_uri(obj.imagen_portada.url)
-        return None
+    @classmethod
+    def preparar_queryset(cls, queryset):
+        """proyecta solo las columnas de la tarjeta y lee de la base solo el comienzo del contenido"""
+        largo = settings.ARTICULOS_LISTA_CONTENIDO_MAX * HTML_POR_CARACTER
+        return (
+            queryset.select_related('autor', 'categoria')
+            .only(*cls.CAMPOS)
+            .annotate(contenido_corto=Substr('contenido', 1, largo))
+        )
+
+    def precargar_media(self, articulos):
+        claves = {_clave_media(obj): obj for obj in articulos}
+        en_cache = cache.get_many(list(claves))
+        faltantes = {}
+        for clave, obj in claves.items():
+            if clave not in en_cache:
+                en_cache[clave] = faltantes[clave] = _rutas_media(obj)
+        if faltantes:
+            cache.set_many(faltantes, settings.ARTICULOS_MEDIA_CACHE_TTL)
+        self._rutas = {obj.id: en_cache[clave] for clave, obj in claves.items()}
+        #derivados responsivos de toda la pagina en una sola lectura
+        self._variantes = imagenes.variantes_de(
+            archivo.name for obj in articulos for archivo in (obj.imagen_portada, obj.imagen_thumbnail) if archivo
+        )
+
+    def _absoluta(self, ruta):
+        if not ruta or ruta.startswith('http'):
+            return ruta
+        if not hasattr(self, '_base_url'):
+            #un solo build_absolute_uri por respuesta en lugar de cinco por fila
+            request = self.context.get('request')
+            self._base_url = request.build_absolute_uri('/')[:-1] if request else None
+        return f"{self._base_url}{ruta}" if self._base_url else None
+
+    def get_contenido(self, obj):
+        #las etiquetas se quitan antes de recortar para no cortar el html a la mitad
+        contenido = getattr(obj, 'contenido_corto', None)
+        if contenido is None:
+            contenido = obj.contenido
+        return extracto(contenido, settings.ARTICULOS_LISTA_CONTENIDO_MAX)
 
-    def get_imagen_thumbnail_url(self, obj):
-        request = self.context.get('request')
-        if obj.imagen_thumbnail and request:
-            return request.build_absolute_uri(obj.imagen_thumbnail.url)
-        return None
-    
-    def get_archivo_adjunto(self, obj):
-        request = self.context.get('request')
-        if obj.archivo_adjunto and request:
-            return request.build_absolute_uri(obj.archivo_adjunto.url)
-        return None
-    
     def get_categoria(self, obj):
         if obj.categoria:
             return {
@@ -133,6 +193,29 @@ class ArticuloListSerializer(serializers.ModelSerializer):
             }
         return None
 
+    def to_representation(self, obj):
+        data = super().to_representation(obj)
+        rutas = getattr(self, '_rutas', {}).get(obj.id)
+        if rutas is None:
+            rutas = _rutas_media(obj)
+        portada = self._absoluta(rutas['portada'])
+        thumbnail = self._absoluta(rutas['thumbnail'])
+        data['imagen_portada'] = data['imagen_portada_url'] = portada
+        data['imagen_thumbnail'] = data['imagen_thumbnail_url'] = thumbnail
+        data['imagen_destacada'] = portada if rutas['portada'] else obj.imagen_url
+        data['archivo_adjunto'] = self._absoluta(rutas['adjunto'])
+        data['imagen_portada_srcset'] = self._srcset(obj.imagen_portada)
+        data['imagen_thumbnail_srcset'] = self._srcset(obj.imagen_thumbnail)
+        return data
+
+    def _srcset(self, archivo):
+        if not archivo:
+            return None
+        variantes = getattr(self, '_variantes', None)
+        if variantes is None:
+            variantes = imagenes.variantes_de([archivo.name])
+        return imagenes.srcset(variantes.get(archivo.name), lambda url: self._absoluta(url) or url)
+
 class ArticuloCreateSerializer(serializers.ModelSerializer):
     """serializer para crear articulos"""
     
@@ -1,88 +1,59 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-from django.conf import settings
-from .models import Articulo
-from apps.contact.models import Suscripcion
+from .models import Articulo, Categoria
+from . import busqueda, categorias_cache, feeds
+from apps.contact.newsletter import encolar_newsletter
 
 
 @receiver(post_save, sender=Articulo)
-def enviar_newsletter_articulo(sender, instance, created, **kwargs):
-    """envía un email html a todos los suscriptores activos cuando se publica un nuevo artículo. solo se envía si el artículo es nuevo y está publicado"""
-    #solo enviar si
-    #1. es un artículo nuevo (created=true)
-    #2. el artículo está publicado (publicado=true)
-    if not created or not instance.publicado:
-        return
-
-    #obtener todos los suscriptores activos
-    suscriptores = Suscripcion.objects.filter(activa=True)
-
-    if not suscriptores.exists():
-        print("No hay suscriptores activos para enviar el newsletter")
-        return
+def indexar_articulo(sender, instance, **kwargs):
+    """mantiene al dia el indice de busqueda de texto completo"""
+    busqueda.indexar([instance.id])
 
-    #preparar el asunto
-    subject = f'📰 Nuevo artículo: {instance.titulo}'
-    from_email = settings.DEFAULT_FROM_EMAIL
 
-    #contador de emails enviados
-    sent_count = 0
+@receiver(post_delete, sender=Articulo)
+def desindexar_articulo(sender, instance, **kwargs):
+    """quita el articulo borrado del indice de busqueda"""
+    busqueda.desindexar(instance.id)
 
-    for suscripcion in suscriptores:
-        try:
-            #preparar url completa de la imagen
-            imagen_url = None
-            if instance.imagen_destacada:
-                #si la imagen ya es una url completa, usarla directamente
-                if instance.imagen_destacada.startswith('http'):
-                    imagen_url = instance.imagen_destacada
-                else:
-                    #si es relativa, agregar el backend_url (donde están los archivos media)
-                    backend_url = getattr(settings, 'BACKEND_URL', 'http://localhost:8000')
-                    imagen_url = f"{backend_url}{instance.imagen_destacada}"
 
-            #preparar el contexto para cada suscriptor
-            context = {
-                'articulo': instance,
-  #url completa de la imagen
-                'site_url': settings.FRONTEND_URL or 'http://localhost:3000',
-                'radio_name': 'Radio Oriente',
-                'nombre': suscripcion.nombre,
-                'suscripcion_token': suscripcion.token_unsuscribe,
-            }
+@receiver(pre_save, sender=Articulo)
+def recordar_categoria_anterior(sender, instance, **kwargs):
+    """guarda la categoria previa para invalidar tambien su feed si el articulo cambia de categoria"""
+    instance._categoria_anterior = None
+    if instance.pk:
+        instance._categoria_anterior = (
+            Articulo.objects.filter(pk=instance.pk).values_list('categoria__slug', flat=True).first()
+        )
 
-            #renderizar el template html
-            html_message = render_to_string('emails/nuevo_articulo.html', context)
-  #versión texto plano como fallback
 
-            #crear email con soporte html
-            email = EmailMultiAlternatives(
-                subject=subject,
-  #versión texto plano
-                from_email=from_email,
-                to=[suscripcion.email]
-            )
+@receiver(post_save, sender=Articulo)
+@receiver(post_delete, sender=Articulo)
+def invalidar_feeds_articulo(sender, instance, **kwargs):
+    """descarta los feeds de portada afectados; se recalculan en la siguiente lectura"""
+    slugs = {getattr(instance, '_categoria_anterior', None)}
+    if instance.categoria_id:
+        slugs.add(Categoria.objects.filter(pk=instance.categoria_id).values_list('slug', flat=True).first())
+    feeds.invalidar(slugs)
+    categorias_cache.invalidar()
 
-            #adjuntar versión html
-            email.attach_alternative(html_message, "text/html")
 
-            #agregar headers para el botón de desuscripcion de gmail
-            backend_url = getattr(settings, 'BACKEND_URL', 'http://localhost:8000')
-            unsubscribe_url = f"{backend_url}/api/contact/unsubscribe-token/?token={suscripcion.token_unsuscribe}"
-            email.extra_headers = {
-                'List-Unsubscribe': f'<{unsubscribe_url}>',
-                'List-Unsubscribe-Post': 'List-Unsubscribe=One-Click'
-            }
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+def invalidar_feeds_categoria(sender, instance, **kwargs):
+    """un cambio de categoria (slug o borrado) afecta a todos los feeds por categoria"""
+    feeds.invalidar_todo()
+    categorias_cache.invalidar()
 
-            #enviar
-            email.send()
-            sent_count += 1
 
-        except Exception as e:
-            print(f"Error al enviar email a {suscripcion.email}: {str(e)}")
-            continue
+@receiver(post_save, sender=Articulo)
+def enviar_newsletter_articulo(sender, instance, created, **kwargs):
+    """encola el newsletter del artículo para todos los suscriptores activos. solo se envía si el artículo es nuevo y está publicado"""
+    #solo enviar si
+    #1. es un artículo nuevo (created=true)
+    #2. el artículo está publicado (publicado=true)
+    if not created or not instance.publicado:
+        return
 
-    print(f"Newsletter enviado a {sent_count}/{suscriptores.count()} suscriptores para el artículo: {instance.titulo}")
+    #el envio corre despues del commit y fuera del request (ver apps.contact.newsletter)
+    encolar_newsletter(instance.id)
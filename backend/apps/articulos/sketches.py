@@ -0,0 +1,170 @@
+#-*- coding: utf-8 -*-
+"""estructuras probabilisticas para contar lectores unicos sin guardar una fila por usuario"""
+import hashlib
+import math
+import struct
+
+
+def _hash64(valor, semilla=b''):
+    return int.from_bytes(hashlib.blake2b(str(valor).encode(), digest_size=8, key=semilla).digest(), 'big')
+
+
+class HyperLogLog:
+    """estimador de cardinalidad; usa 2^precision bytes y tiene un error tipico de 1.04/sqrt(2^precision)"""
+
+    def __init__(self, precision=11, registros=None):
+        if not 4 <= precision <= 16:
+            raise ValueError('La precision debe estar entre 4 y 16')
+        self.precision = precision
+        self.m = 1 << precision
+        self.registros = bytearray(registros) if registros is not None else bytearray(self.m)
+
+    def add(self, valor):
+        x = _hash64(valor)
+        indice = x >> (64 - self.precision)
+        resto = x & ((1 << (64 - self.precision)) - 1)
+        #posicion del primer bit en 1 dentro de los bits restantes
+        rango = (64 - self.precision) - resto.bit_length() + 1
+        if rango > self.registros[indice]:
+            self.registros[indice] = rango
+
+    def count(self):
+        m = self.m
+        if m >= 128:
+            alfa = 0.7213 / (1 + 1.079 / m)
+        else:
+            alfa = {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        estimado = alfa * m * m / sum(2.0 ** -r for r in self.registros)
+        vacios = self.registros.count(0)
+        #correccion para cardinalidades pequeñas (conteo lineal)
+        if estimado <= 2.5 * m and vacios:
+            estimado = m * math.log(m / vacios)
+        return int(round(estimado))
+
+    def merge(self, otro):
+        if otro.precision != self.precision:
+            raise ValueError('Solo se pueden unir sketches con la misma precision')
+        self.registros = bytearray(max(a, b) for a, b in zip(self.registros, otro.registros))
+
+    def to_bytes(self):
+        return bytes([self.precision]) + bytes(self.registros)
+
+    @classmethod
+    def from_bytes(cls, datos):
+        return cls(precision=datos[0], registros=datos[1:])
+
+
+class _Generacion:
+    """un filtro de bloom de tamaño fijo dimensionado para `capacidad` elementos con tasa de error `error`"""
+
+    def __init__(self, bits, k, capacidad, insertados=0, datos=None):
+        self.bits = bits
+        self.k = k
+        self.capacidad = capacidad
+        self.insertados = insertados
+        self.datos = bytearray(datos) if datos is not None else bytearray(bits // 8)
+
+    @classmethod
+    def para(cls, capacidad, error):
+        #tamaño optimo para la capacidad y la tasa de falsos positivos pedidas
+        bits = max(8, int(-capacidad * math.log(error) / (math.log(2) ** 2)))
+        bits += (-bits) % 8
+        return cls(bits, max(1, int(round(bits / capacidad * math.log(2)))), capacidad)
+
+    def posiciones(self, h1, h2):
+        return [(h1 + i * h2) % self.bits for i in range(self.k)]
+
+    def contiene(self, h1, h2):
+        return all(self.datos[p >> 3] & (1 << (p & 7)) for p in self.posiciones(h1, h2))
+
+    def agregar(self, h1, h2):
+        for p in self.posiciones(h1, h2):
+            self.datos[p >> 3] |= 1 << (p & 7)
+        self.insertados += 1
+
+    @property
+    def llena(self):
+        return self.insertados >= self.capacidad
+
+
+class BloomRotativo:
+    """filtro de bloom acotado a los lectores recientes. empieza chico y crece con el articulo: cuando la
+    generacion actual se llena se agrega otra del doble de capacidad (y error a la mitad, asi la suma no pasa
+    de `error`) sin olvidar a nadie. al llegar a `capacidad` rota: la generacion llena pasa a ser la anterior
+    y las mas viejas se descartan. un articulo con pocos lectores ocupa cientos de bytes, no kilobytes"""
+
+    VERSION = 2
+    _cabecera = struct.Struct('>BIdI')
+    _cabecera_generacion = struct.Struct('>IIII')
+    #formato anterior: dos generaciones del mismo tamaño (bits, k, capacidad, insertados)
+    _cabecera_v1 = struct.Struct('>IIII')
+
+    def __init__(self, capacidad=10000, error=0.01, capacidad_inicial=128, _estado=None):
+        if _estado is not None:
+            self.capacidad, self.error, self.generaciones = _estado
+            return
+        self.capacidad = capacidad
+        self.error = error
+        self.generaciones = [_Generacion.para(min(capacidad_inicial, capacidad), error / 2)]
+
+    @staticmethod
+    def _hashes(valor):
+        digest = hashlib.blake2b(str(valor).encode(), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+
+    def __contains__(self, valor):
+        h1, h2 = self._hashes(valor)
+        return any(generacion.contiene(h1, h2) for generacion in self.generaciones)
+
+    def _siguiente_generacion(self):
+        actual = self.generaciones[-1]
+        if actual.capacidad < self.capacidad:
+            capacidad = min(actual.capacidad * 2, self.capacidad)
+            self.generaciones.append(_Generacion.para(capacidad, self.error / 2 ** (len(self.generaciones) + 1)))
+        else:
+            #tamaño maximo: se conserva solo la generacion llena y se abre otra igual
+            self.generaciones = [actual, _Generacion(actual.bits, actual.k, actual.capacidad)]
+
+    def add(self, valor):
+        """agrega el valor; retorna False si ya estaba (o es un falso positivo)"""
+        h1, h2 = self._hashes(valor)
+        if any(generacion.contiene(h1, h2) for generacion in self.generaciones):
+            return False
+        if self.generaciones[-1].llena:
+            self._siguiente_generacion()
+        self.generaciones[-1].agregar(h1, h2)
+        return True
+
+    def to_bytes(self):
+        partes = [self._cabecera.pack(self.VERSION, self.capacidad, self.error, len(self.generaciones))]
+        for generacion in self.generaciones:
+            partes.append(self._cabecera_generacion.pack(
+                generacion.bits, generacion.k, generacion.capacidad, generacion.insertados
+            ))
+            partes.append(bytes(generacion.datos))
+        return b''.join(partes)
+
+    @classmethod
+    def from_bytes(cls, datos):
+        if datos[0] != cls.VERSION:
+            return cls._from_bytes_v1(datos)
+        _, capacidad, error, cantidad = cls._cabecera.unpack_from(datos)
+        inicio = cls._cabecera.size
+        generaciones = []
+        for _ in range(cantidad):
+            bits, k, capacidad_generacion, insertados = cls._cabecera_generacion.unpack_from(datos, inicio)
+            inicio += cls._cabecera_generacion.size
+            generaciones.append(_Generacion(bits, k, capacidad_generacion, insertados, datos[inicio:inicio + bits // 8]))
+            inicio += bits // 8
+        return cls(_estado=(capacidad, error, generaciones))
+
+    @classmethod
+    def _from_bytes_v1(cls, datos):
+        #el primer byte de v1 es el byte alto de `bits` (0 para cualquier tamaño razonable)
+        bits, k, capacidad, insertados = cls._cabecera_v1.unpack_from(datos)
+        inicio = cls._cabecera_v1.size
+        largo = bits // 8
+        actual = _Generacion(bits, k, capacidad, insertados, datos[inicio:inicio + largo])
+        anterior = _Generacion(bits, k, capacidad, capacidad, datos[inicio + largo:inicio + 2 * largo])
+        error = math.exp(-bits / capacidad * math.log(2) ** 2)
+        return cls(_estado=(capacidad, error, [anterior, actual]))
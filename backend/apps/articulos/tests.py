@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from apps.users.models import User
+from .models import Articulo, Categoria
+from .sketches import BloomRotativo
+
+
+class CategoriaListaTests(TestCase):
+    """la lista de categorias no debe hacer una consulta por categoria"""
+
+    url = '/api/articulos/api/categorias/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.autor = User.objects.create_user(username='autor', email='autor@test.com', password='x')
+        for i in range(5):
+            categoria = Categoria.objects.create(nombre=f'Categoria {i}')
+            for j in range(i):
+                Articulo.objects.create(
+                    titulo=f'Articulo {i}-{j}', contenido='texto', autor=cls.autor,
+                    categoria=categoria, publicado=j % 2 == 0,
+                )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_cantidad_de_consultas_fija(self):
+        #count de la paginacion + select anotado, sin importar cuantas categorias haya
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_cuenta_solo_publicados(self):
+        response = self.client.get(self.url)
+        conteos = {c['nombre']: c['articulos_count'] for c in response.data['results']}
+        self.assertEqual(conteos, {
+            'Categoria 0': 0, 'Categoria 1': 1, 'Categoria 2': 1, 'Categoria 3': 2, 'Categoria 4': 2,
+        })
+
+    def test_lista_cacheada_hasta_que_cambia_un_articulo(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+        Articulo.objects.create(
+            titulo='Nuevo', contenido='texto', autor=self.autor,
+            categoria=Categoria.objects.get(nombre='Categoria 0'), publicado=True,
+        )
+        response = self.client.get(self.url)
+        conteos = {c['nombre']: c['articulos_count'] for c in response.data['results']}
+        self.assertEqual(conteos['Categoria 0'], 1)
+
+
+class BloomRotativoTests(SimpleTestCase):
+    """el bloom de lectores recientes ocupa segun los lectores del articulo, no segun la capacidad maxima"""
+
+    def test_articulo_con_pocos_lectores_ocupa_poco(self):
+        bloom = BloomRotativo(capacidad=10000, error=0.01, capacidad_inicial=128)
+        for usuario_id in range(50):
+            self.assertTrue(bloom.add(usuario_id))
+        self.assertLess(len(bloom.to_bytes()), 512)
+
+    def test_crece_sin_olvidar_lectores(self):
+        bloom = BloomRotativo(capacidad=10000, error=0.01, capacidad_inicial=128)
+        nuevos = sum(bloom.add(usuario_id) for usuario_id in range(2000))
+        self.assertGreater(len(bloom.generaciones), 1)
+        self.assertGreater(nuevos, 1960)
+        copia = BloomRotativo.from_bytes(bloom.to_bytes())
+        self.assertFalse(any(copia.add(usuario_id) for usuario_id in range(2000)))
+
+    def test_lee_formato_anterior(self):
+        #dos generaciones del mismo tamaño tras una cabecera (bits, k, capacidad, insertados)
+        bloom = BloomRotativo(capacidad=100, error=0.01, capacidad_inicial=100)
+        for usuario_id in range(30):
+            bloom.add(usuario_id)
+        generacion = bloom.generaciones[-1]
+        anterior = bytes(len(generacion.datos))
+        datos = BloomRotativo._cabecera_v1.pack(generacion.bits, generacion.k, 100, 30) + bytes(generacion.datos) + anterior
+        copia = BloomRotativo.from_bytes(datos)
+        self.assertIn(7, copia)
+        self.assertTrue(copia.add(1000))
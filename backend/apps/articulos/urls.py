@@ -18,6 +18,7 @@ def articulos_info(request):
             'destacados': '/api/articulos/articulos/destacados/',
             'por_categoria': '/api/articulos/articulos/por_categoria/?categoria={slug}',
             'mas_vistos': '/api/articulos/articulos/mas_vistos/',
+            'buscar': '/api/articulos/buscar/?q={texto}',
             'comentarios': '/api/articulos/articulos/{slug}/comentarios/',
             'comentar': '/api/articulos/articulos/{slug}/comentar/',
             #endpoints legacy
@@ -30,6 +31,7 @@ urlpatterns = [
     path('', articulos_info, name='articulos-info'),
     #apis normalizadas
     path('api/', include(router.urls)),
+    path('buscar/', views.buscar_articulos, name='articulos-buscar'),
     #apis de compatibilidad para el frontend existente
     path('posts/', views.BlogPostListView.as_view(), name='blog-posts'),
     path('posts/<int:pk>/', views.BlogPostDetailView.as_view(), name='blog-post-detail'),
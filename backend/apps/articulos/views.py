@@ -1,10 +1,19 @@
-from rest_framework import generics, viewsets, status
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from rest_framework import exceptions, generics, viewsets, status
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.utils.text import slugify
 from apps.common.pagination import StandardResultsSetPagination, SmallResultsSetPagination
+from apps.medios.subidas import REGLAS_ARTICULO, ManejadorSubidaStreaming
 from .models import Categoria, Articulo
+from .vistas import lectores_unicos, registrar_vista
+from . import busqueda, categorias_cache, feeds
 from .serializers import (
     CategoriaSerializer, ArticuloSerializer, ArticuloListSerializer,
     ArticuloCreateSerializer, BlogPostLegacySerializer
@@ -13,18 +22,52 @@ from .serializers import (
 #viewsets normalizados
 class CategoriaViewSet(viewsets.ReadOnlyModelViewSet):
     """viewset para categorias (solo lectura)"""
-    queryset = Categoria.objects.all()
+    queryset = Categoria.objects.annotate(
+        articulos_count=Count('articulos', filter=Q(articulos__publicado=True))
+    ).order_by('nombre')
     serializer_class = CategoriaSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     lookup_field = 'slug'
 
+    def list(self, request, *args, **kwargs):
+        """lista cacheada hasta que cambie un articulo o una categoria"""
+        clave = categorias_cache.clave_lista(request.query_params.urlencode())
+        data = cache.get(clave)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(clave, data, settings.ARTICULOS_CATEGORIAS_CACHE_TTL)
+        return Response(data)
+
 class ArticuloViewSet(viewsets.ModelViewSet):
     """viewset para articulos con soporte multimedia"""
-    queryset = Articulo.objects.select_related('autor', 'categoria').filter(publicado=True)
+    queryset = Articulo.objects.select_related('autor', 'categoria').filter(publicado=True).defer('busqueda')
     serializer_class = ArticuloSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     lookup_field = 'slug'
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            return ArticuloListSerializer.preparar_queryset(queryset)
+        return queryset
+
+    def initialize_request(self, request, *args, **kwargs):
+        #los archivos se escriben a disco por chunks validando tipo y tamaño mientras llegan
+        self._subida = ManejadorSubidaStreaming(request, REGLAS_ARTICULO)
+        request.upload_handlers = [self._subida]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.content_type.startswith('multipart/'):
+            #parsear el cuerpo ahora con el manejador para rechazar la subida antes de ejecutar la accion
+            request.data
+            if self._subida.error:
+                status_code, mensaje = self._subida.error
+                error = exceptions.APIException(mensaje)
+                error.status_code = status_code
+                raise error
+
     def get_serializer_class(self):
         if self.action == 'list':
             return ArticuloListSerializer
@@ -33,34 +76,44 @@ class ArticuloViewSet(viewsets.ModelViewSet):
         return ArticuloSerializer
     
     def retrieve(self, request, *args, **kwargs):
-        """incrementa vistas al obtener un artículo (solo una vez por usuario)"""
+        """registra la vista al obtener un artículo (solo una vez por usuario)"""
         instance = self.get_object()
 
-        #solo incrementar si el usuario está autenticado y no ha visto el artículo antes
+        #solo contar si el usuario está autenticado; la escritura se agrupa en segundo plano
         if request.user.is_authenticated:
-            if not instance.usuarios_que_vieron.filter(id=request.user.id).exists():
-                instance.usuarios_que_vieron.add(request.user)
-                instance.vistas += 1
-                instance.save(update_fields=['vistas'])
+            registrar_vista(instance.id, request.user.id)
 
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        data = self.get_serializer(instance).data
+        #solo en el detalle: en las listas seria una consulta por fila
+        data['lectores_unicos'] = lectores_unicos(instance)
+        return Response(data)
     
-    @action(detail=False, methods=['get'])
-    def destacados(self, request):
-        """obtener articulos destacados (paginado)"""
-        queryset = self.queryset.filter(destacado=True).order_by('-fecha_publicacion')
-
-        #usar paginacion pequeña para destacados
+    def _responder_feed(self, request, nombre):
+        """sirve un feed materializado desde cache con etag; la base solo se consulta por la pagina pedida"""
+        feed = feeds.obtener_feed(nombre, request.query_params.get('categoria') or None)
+        etag = '"%s"' % hashlib.md5(f"{feed['version']}:{request.query_params.urlencode()}".encode()).hexdigest()
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        ids = [articulo_id for articulo_id, _ in feed['entradas']]
+        #usar paginacion pequeña para los feeds de portada
         paginator = SmallResultsSetPagination()
-        page = paginator.paginate_queryset(queryset, request)
+        page = paginator.paginate_queryset(ids, request)
+        por_id = {
+            articulo.id: articulo
+            for articulo in ArticuloListSerializer.preparar_queryset(Articulo.objects.filter(id__in=page))
+        }
+        articulos = [por_id[articulo_id] for articulo_id in page if articulo_id in por_id]
+        serializer = ArticuloListSerializer(articulos, many=True, context={'request': request})
+        response = paginator.get_paginated_response(serializer.data)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
 
-        if page is not None:
-            serializer = ArticuloListSerializer(page, many=True, context={'request': request})
-            return paginator.get_paginated_response(serializer.data)
-
-        serializer = ArticuloListSerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+    @action(detail=False, methods=['get'])
+    def destacados(self, request):
+        """obtener articulos destacados (paginado, top n desde cache; ?categoria=slug opcional)"""
+        return self._responder_feed(request, 'destacados')
     
     @action(detail=False, methods=['get'])
     def por_categoria(self, request):
@@ -69,7 +122,7 @@ class ArticuloViewSet(viewsets.ModelViewSet):
         if not categoria_slug:
             return Response([])
 
-        queryset = self.queryset.filter(categoria__slug=categoria_slug)
+        queryset = ArticuloListSerializer.preparar_queryset(self.queryset.filter(categoria__slug=categoria_slug))
 
         #aplicar paginacion
         paginator = StandardResultsSetPagination()
@@ -84,19 +137,45 @@ class ArticuloViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def mas_vistos(self, request):
-        """obtener articulos mas vistos (paginado)"""
-        queryset = self.queryset.order_by('-vistas')
-
-        #usar paginacion pequeña para mas vistos
-        paginator = SmallResultsSetPagination()
-        page = paginator.paginate_queryset(queryset, request)
-
-        if page is not None:
-            serializer = ArticuloListSerializer(page, many=True, context={'request': request})
-            return paginator.get_paginated_response(serializer.data)
-
-        serializer = ArticuloListSerializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        """obtener articulos mas vistos (paginado, top n desde cache; ?categoria=slug opcional)"""
+        return self._responder_feed(request, 'mas_vistos')
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def buscar_articulos(request):
+    """busqueda de texto completo con ranking, resaltado y paginacion por cursor. parametros: q, cursor, page_size (max 50)"""
+    texto = request.query_params.get('q', '').strip()
+    if not texto:
+        return Response({'error': 'El parámetro q es requerido'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        page_size = min(max(int(request.query_params.get('page_size', 20)), 1), 50)
+        filas, siguiente = busqueda.buscar(texto, limite=page_size, cursor=request.query_params.get('cursor'))
+    except ValueError:
+        return Response({'error': 'Parámetros de paginación inválidos'}, status=status.HTTP_400_BAD_REQUEST)
+
+    articulos = ArticuloListSerializer.preparar_queryset(Articulo.objects.filter(id__in=[fila[0] for fila in filas]))
+    por_id = {articulo.id: articulo for articulo in articulos}
+    encontrados = [por_id[fila[0]] for fila in filas if fila[0] in por_id]
+    data = ArticuloListSerializer(encontrados, many=True, context={'request': request}).data
+    resaltados = {fila[0]: fila for fila in filas}
+    for item in data:
+        _, puntaje, titulo_resaltado, fragmento = resaltados[item['id']]
+        item['puntaje'] = puntaje
+        item['titulo_resaltado'] = titulo_resaltado
+        item['fragmento'] = fragmento
+
+    next_url = None
+    if siguiente:
+        params = request.query_params.copy()
+        params['cursor'] = siguiente
+        next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+    return Response({
+        'q': texto,
+        'next': next_url,
+        'cursor': siguiente,
+        'page_size': page_size,
+        'results': data,
+    })
 
 #views de compatibilidad para el frontend existente
 class BlogPostListView(generics.ListCreateAPIView):
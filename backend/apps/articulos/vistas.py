@@ -0,0 +1,164 @@
+#-*- coding: utf-8 -*-
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import F
+
+from . import feeds
+from .models import Articulo, ArticuloVistasCompactas
+from .sketches import BloomRotativo, HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+#buffer por proceso de pares (articulo_id, usuario_id) pendientes de escribir
+_buffer = set()
+_buffer_lock = threading.Lock()
+_timer = None
+
+
+def registrar_vista(articulo_id, usuario_id):
+    """anota la vista en memoria; la escritura en la base la hace vaciar_vistas en segundo plano"""
+    global _timer
+    intervalo = settings.ARTICULOS_VISTAS_FLUSH_INTERVAL
+    with _buffer_lock:
+        _buffer.add((articulo_id, usuario_id))
+        lleno = len(_buffer) >= settings.ARTICULOS_VISTAS_BUFFER_MAX
+        programar = intervalo > 0 and not lleno and _timer is None
+        if programar:
+            _timer = threading.Timer(intervalo, _vaciar_en_hilo)
+            _timer.daemon = True
+    if programar:
+        _timer.start()
+    elif intervalo <= 0 or lleno:
+        vaciar_vistas()
+
+
+def _vaciar_en_hilo():
+    try:
+        vaciar_vistas()
+    except Exception:
+        logger.exception("Error al guardar las vistas de articulos")
+    finally:
+        connections.close_all()
+
+
+def vaciar_vistas():
+    """escribe las vistas acumuladas segun ARTICULOS_VISTAS_MODO. retorna cuantas vistas nuevas se contaron"""
+    global _timer
+    with _buffer_lock:
+        pares = set(_buffer)
+        _buffer.clear()
+        _timer = None
+    if not pares:
+        return 0
+    if settings.ARTICULOS_VISTAS_MODO == 'compacto':
+        return _vaciar_compacto(pares)
+    return _vaciar_exacto(pares)
+
+
+#pares por sentencia insert en el modo exacto
+LOTE_EXACTO = 500
+
+
+def _insertar_nuevos(pares):
+    """inserta los pares en la tabla intermedia y retorna solo los que no existian.
+    ON CONFLICT DO NOTHING RETURNING (postgresql y sqlite >= 3.35): si dos procesos vacian el mismo par,
+    solo uno lo recibe de vuelta y lo cuenta"""
+    relacion = Articulo.usuarios_que_vieron
+    Through = relacion.through
+    quote = connection.ops.quote_name
+    columna_articulo = quote(Through._meta.get_field(relacion.field.m2m_field_name()).column)
+    columna_usuario = quote(Through._meta.get_field(relacion.field.m2m_reverse_field_name()).column)
+    pares = list(pares)
+    insertados = []
+    with connection.cursor() as cursor:
+        for inicio in range(0, len(pares), LOTE_EXACTO):
+            lote = pares[inicio:inicio + LOTE_EXACTO]
+            cursor.execute(
+                f"INSERT INTO {quote(Through._meta.db_table)} ({columna_articulo}, {columna_usuario}) "
+                f"VALUES {', '.join(['(%s, %s)'] * len(lote))} "
+                f"ON CONFLICT DO NOTHING RETURNING {columna_articulo}, {columna_usuario}",
+                [valor for par in lote for valor in par],
+            )
+            insertados.extend(cursor.fetchall())
+    return insertados
+
+
+def _vaciar_exacto(pares):
+    """un insert por lote en la tabla intermedia y un update con F por articulo, contando solo las filas insertadas"""
+    with transaction.atomic():
+        nuevos = _insertar_nuevos(pares)
+        por_articulo = Counter(articulo_id for articulo_id, _ in nuevos)
+        for articulo_id, cantidad in por_articulo.items():
+            Articulo.objects.filter(id=articulo_id).update(vistas=F('vistas') + cantidad)
+    if por_articulo:
+        feeds.actualizar_vistas(por_articulo)
+    return len(nuevos)
+
+
+def nuevo_hll():
+    return HyperLogLog(settings.ARTICULOS_HLL_PRECISION)
+
+
+def nuevo_bloom():
+    return BloomRotativo(
+        settings.ARTICULOS_BLOOM_CAPACIDAD, settings.ARTICULOS_BLOOM_ERROR, settings.ARTICULOS_BLOOM_CAPACIDAD_INICIAL
+    )
+
+
+def _vaciar_compacto(pares):
+    """deduplica con el bloom de lectores recientes y cuenta unicos con hyperloglog, sin filas por usuario"""
+    usuarios_por_articulo = {}
+    for articulo_id, usuario_id in pares:
+        usuarios_por_articulo.setdefault(articulo_id, []).append(usuario_id)
+
+    total = 0
+    con_vistas = []
+    for articulo_id, usuarios in usuarios_por_articulo.items():
+        with transaction.atomic():
+            #bloqueo por articulo para que dos procesos no pisen el sketch del otro
+            ArticuloVistasCompactas.objects.get_or_create(
+                articulo_id=articulo_id,
+                defaults={'hll': nuevo_hll().to_bytes(), 'recientes': nuevo_bloom().to_bytes()},
+            )
+            compactas = ArticuloVistasCompactas.objects.select_for_update().get(articulo_id=articulo_id)
+            hll = HyperLogLog.from_bytes(bytes(compactas.hll))
+            recientes = BloomRotativo.from_bytes(bytes(compactas.recientes))
+
+            nuevas = 0
+            for usuario_id in usuarios:
+                hll.add(usuario_id)
+                if recientes.add(usuario_id):
+                    nuevas += 1
+
+            compactas.hll = hll.to_bytes()
+            compactas.recientes = recientes.to_bytes()
+            compactas.lectores_unicos = hll.count()
+            compactas.save()
+            if nuevas:
+                Articulo.objects.filter(id=articulo_id).update(vistas=F('vistas') + nuevas)
+                con_vistas.append(articulo_id)
+        total += nuevas
+    feeds.actualizar_vistas(con_vistas)
+    return total
+
+
+def lectores_unicos(articulo):
+    """lectores unicos del articulo: exacto desde la tabla intermedia o estimado desde el sketch"""
+    if settings.ARTICULOS_VISTAS_MODO == 'compacto':
+        compactas = ArticuloVistasCompactas.objects.filter(articulo=articulo).only('lectores_unicos').first()
+        return compactas.lectores_unicos if compactas else 0
+    return articulo.usuarios_que_vieron.count()
+
+
+@atexit.register
+def _vaciar_al_salir():
+    """no perder el buffer al detener el proceso de forma ordenada"""
+    try:
+        vaciar_vistas()
+    except Exception:
+        logger.exception("Error al guardar las vistas pendientes al salir")
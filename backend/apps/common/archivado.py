@@ -0,0 +1,100 @@
+import gzip
+import json
+import os
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+
+def _despues_notificaciones(filas):
+    """limpia eventos sin destinatarios y descuenta las no leidas archivadas"""
+    from apps.notifications.contador import ajustar_no_leidas
+    from apps.notifications.models import NotificationEvent
+
+    NotificationEvent.eliminar_huerfanos({fila['evento_id'] for fila in filas})
+    no_leidas = Counter(fila['usuario_id'] for fila in filas if not fila['leido'])
+    for usuario_id, cantidad in no_leidas.items():
+        ajustar_no_leidas([usuario_id], -cantidad)
+
+
+#politicas de retencion por modelo; los dias se configuran en settings.RETENCION_DIAS
+POLITICAS = {
+    'notifications.Notification': {
+        'campo_fecha': 'fecha_creacion',
+        #el contenido vive en el evento, se copia al archivo para que sea legible
+        'campos_extra': ['evento__tipo', 'evento__titulo', 'evento__mensaje', 'evento__enlace',
+                         'evento__content_type', 'evento__object_id'],
+        'despues': _despues_notificaciones,
+    },
+    'chat.ChatMessage': {
+        'campo_fecha': 'fecha_envio',
+    },
+    'chat.InfraccionUsuario': {
+        'campo_fecha': 'fecha_infraccion',
+    },
+}
+
+
+def _ruta_archivo(etiqueta, inicio):
+    carpeta = os.path.join(settings.ARCHIVE_ROOT, etiqueta.replace('.', '_').lower())
+    os.makedirs(carpeta, exist_ok=True)
+    return os.path.join(carpeta, f"{inicio.strftime('%Y%m%d_%H%M%S')}.jsonl.gz")
+
+
+def archivar_modelo(etiqueta, dias=None, batch_size=None, dry_run=False):
+    """mueve a jsonl.gz las filas mas antiguas que la retencion y las borra en lotes acotados. retorna un dict con filas movidas, segundos y filas por segundo"""
+    politica = POLITICAS[etiqueta]
+    modelo = apps.get_model(etiqueta)
+    dias = settings.RETENCION_DIAS[etiqueta] if dias is None else dias
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+
+    inicio = timezone.now()
+    corte = inicio - timedelta(days=dias)
+    antiguos = modelo.objects.filter(**{f"{politica['campo_fecha']}__lt": corte}).order_by('pk')
+    campos = [f.attname for f in modelo._meta.concrete_fields] + politica.get('campos_extra', [])
+    pk = modelo._meta.pk.attname
+
+    if dry_run:
+        return {'modelo': etiqueta, 'filas': antiguos.count(), 'segundos': 0, 'filas_por_segundo': 0, 'archivo': None}
+
+    ruta = _ruta_archivo(etiqueta, inicio)
+    movidas = 0
+    reloj = time.monotonic()
+    with gzip.open(ruta, 'at', encoding='utf-8') as archivo:
+        while True:
+            #cada lote es una transaccion corta para no mantener bloqueos largos
+            with transaction.atomic():
+                filas = list(antiguos.values(*campos)[:batch_size])
+                if not filas:
+                    break
+                for fila in filas:
+                    archivo.write(json.dumps(fila, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+                #se escribe en disco antes de borrar: un corte a mitad duplica, nunca pierde
+                archivo.flush()
+                modelo.objects.filter(pk__in=[fila[pk] for fila in filas]).delete()
+                if politica.get('despues'):
+                    politica['despues'](filas)
+            movidas += len(filas)
+
+    segundos = time.monotonic() - reloj
+    if not movidas:
+        os.remove(ruta)
+        ruta = None
+    return {
+        'modelo': etiqueta,
+        'filas': movidas,
+        'segundos': segundos,
+        'filas_por_segundo': movidas / segundos if segundos else 0,
+        'archivo': ruta,
+    }
+
+
+def archivar_todo(batch_size=None, dry_run=False):
+    """punto de entrada para cron o cualquier planificador: aplica todas las politicas"""
+    return [archivar_modelo(etiqueta, batch_size=batch_size, dry_run=dry_run) for etiqueta in POLITICAS]
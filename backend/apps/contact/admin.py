@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import TipoAsunto, Estado, Contacto, Suscripcion
+from .models import TipoAsunto, Estado, Contacto, Suscripcion, EnvioNewsletter, EntregaNewsletter, EmailOutbox
 
 @admin.register(TipoAsunto)
 class TipoAsuntoAdmin(admin.ModelAdmin):
@@ -27,3 +27,25 @@ class SuscripcionAdmin(admin.ModelAdmin):
     list_editable = ('activa',)
     search_fields = ('email', 'nombre')
     readonly_fields = ('token_unsuscribe', 'fecha_suscripcion')
+
+class EntregaNewsletterInline(admin.TabularInline):
+    model = EntregaNewsletter
+    extra = 0
+    can_delete = False
+    fields = ('email', 'estado', 'intentos', 'error', 'fecha_envio')
+    readonly_fields = fields
+
+@admin.register(EnvioNewsletter)
+class EnvioNewsletterAdmin(admin.ModelAdmin):
+    list_display = ('articulo', 'estado', 'total', 'enviados', 'fallidos', 'fecha_creacion', 'fecha_fin')
+    list_filter = ('estado', 'fecha_creacion')
+    search_fields = ('articulo__titulo',)
+    readonly_fields = ('articulo', 'total', 'enviados', 'fallidos', 'fecha_creacion', 'fecha_fin')
+    inlines = [EntregaNewsletterInline]
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('asunto', 'estado', 'intentos', 'proximo_intento', 'fecha_creacion', 'fecha_envio')
+    list_filter = ('estado', 'fecha_creacion')
+    search_fields = ('asunto', 'destinatarios')
+    readonly_fields = ('reclamo', 'reclamado_en', 'fecha_creacion', 'fecha_envio')
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from apps.contact.newsletter import reanudar_pendientes
+from apps.contact.outbox import procesar_outbox
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker de correo: envia la cola EmailOutbox (bienvenidas, recuperacion de contraseña) y '
+        'reanuda los newsletters con entregas pendientes. '
+        'P.ej.: python manage.py procesar_correos --intervalo 5'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, help='Correos por lote (por defecto EMAIL_OUTBOX_BATCH_SIZE)')
+        parser.add_argument('--intervalo', type=int, default=0,
+                            help='Segundos de espera con la cola vacia; si es mayor a 0 queda corriendo como worker')
+        parser.add_argument('--sin-newsletter', action='store_true', help='Solo procesar la cola EmailOutbox')
+
+    def handle(self, *args, **options):
+        while True:
+            self.vaciar_cola(options['batch'])
+            if not options['sin_newsletter']:
+                self.reanudar_newsletters()
+            if options['intervalo'] <= 0:
+                break
+            time.sleep(options['intervalo'])
+
+    def vaciar_cola(self, batch_size):
+        totales = {'enviados': 0, 'reintentos': 0, 'fallidos': 0, 'segundos': 0}
+        while True:
+            metricas = procesar_outbox(batch_size)
+            if not metricas['reclamados']:
+                break
+            for clave in totales:
+                totales[clave] += metricas[clave]
+
+        if totales['enviados'] or totales['reintentos'] or totales['fallidos']:
+            por_segundo = totales['enviados'] / totales['segundos'] if totales['segundos'] else 0
+            self.stdout.write(self.style.SUCCESS(
+                f"Cola de correos: {totales['enviados']} enviados, {totales['reintentos']} reintentos, "
+                f"{totales['fallidos']} fallidos en {totales['segundos']:.2f}s ({por_segundo:.1f}/s)"
+            ))
+
+    def reanudar_newsletters(self):
+        for envio in reanudar_pendientes():
+            if envio is None:
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f"Newsletter {envio.articulo.titulo}: {envio.enviados}/{envio.total} enviados, {envio.fallidos} fallidos"
+            ))
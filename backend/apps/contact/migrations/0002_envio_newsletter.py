@@ -0,0 +1,66 @@
+#generated by django 5.2.7 on 2026-10-19 14:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articulos', '0003_articulo_usuarios_que_vieron'),
+        ('contact', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnvioNewsletter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviando', 'Enviando'), ('completado', 'Completado')], default='pendiente', max_length=20)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('enviados', models.PositiveIntegerField(default=0)),
+                ('fallidos', models.PositiveIntegerField(default=0)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+                ('articulo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='envio_newsletter', to='articulos.articulo')),
+            ],
+            options={
+                'verbose_name': 'Envío de Newsletter',
+                'verbose_name_plural': 'Envíos de Newsletter',
+                'db_table': 'envio_newsletter',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EntregaNewsletter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254)),
+                ('nombre', models.CharField(blank=True, default='', max_length=100)),
+                ('token_unsuscribe', models.CharField(blank=True, default='', max_length=100)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviado', 'Enviado'), ('fallido', 'Fallido')], default='pendiente', max_length=20)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('fecha_envio', models.DateTimeField(blank=True, null=True)),
+                ('suscripcion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='entregas_newsletter', to='contact.suscripcion')),
+                ('envio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entregas', to='contact.envionewsletter')),
+            ],
+            options={
+                'verbose_name': 'Entrega de Newsletter',
+                'verbose_name_plural': 'Entregas de Newsletter',
+                'db_table': 'entrega_newsletter',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='envionewsletter',
+            index=models.Index(fields=['estado'], name='envio_newsl_estado_abea9e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entreganewsletter',
+            index=models.Index(fields=['envio', 'estado'], name='entrega_new_envio_i_9072c5_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='entreganewsletter',
+            unique_together={('envio', 'email')},
+        ),
+    ]
@@ -0,0 +1,41 @@
+#generated by django 5.2.7 on 2026-10-19 15:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0002_envio_newsletter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('asunto', models.CharField(max_length=255)),
+                ('remitente', models.CharField(max_length=254)),
+                ('destinatarios', models.JSONField(default=list)),
+                ('cuerpo_texto', models.TextField(blank=True, default='')),
+                ('cuerpo_html', models.TextField(blank=True, null=True)),
+                ('headers', models.JSONField(blank=True, default=dict)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('fallido', 'Fallido')], default='pendiente', max_length=20)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('proximo_intento', models.DateTimeField(default=django.utils.timezone.now)),
+                ('reclamo', models.CharField(blank=True, max_length=36, null=True)),
+                ('reclamado_en', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_envio', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Correo saliente',
+                'verbose_name_plural': 'Correos salientes',
+                'db_table': 'email_outbox',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'proximo_intento'], name='email_outbo_estado_60fcd6_idx'), models.Index(fields=['reclamo'], name='email_outbo_reclamo_9d5958_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+#generated by django 5.2.7 on 2026-10-19 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0003_email_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='envionewsletter',
+            name='corte_suscripcion_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0004_envio_corte_suscripcion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entreganewsletter',
+            name='reclamado_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='entreganewsletter',
+            name='reclamo',
+            field=models.CharField(blank=True, max_length=36, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='entreganewsletter',
+            index=models.Index(fields=['reclamo'], name='entrega_new_reclamo_ece639_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 import uuid
 
 class TipoAsunto(models.Model):
@@ -94,3 +95,106 @@ class Suscripcion(models.Model):
 
     def __str__(self):
         return self.email
+
+class EnvioNewsletter(models.Model):
+    """envio del newsletter de un articulo; agrupa las entregas por suscriptor"""
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('enviando', 'Enviando'),
+        ('completado', 'Completado'),
+    ]
+
+    articulo = models.OneToOneField('articulos.Articulo', on_delete=models.CASCADE, related_name='envio_newsletter')
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente')
+    total = models.PositiveIntegerField(default=0)
+    enviados = models.PositiveIntegerField(default=0)
+    fallidos = models.PositiveIntegerField(default=0)
+    #corte de la foto de suscriptores: solo entran los activos con id <= corte al encolar
+    corte_suscripcion_id = models.BigIntegerField(blank=True, null=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_fin = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'envio_newsletter'
+        ordering = ['-fecha_creacion']
+        verbose_name = 'Envío de Newsletter'
+        verbose_name_plural = 'Envíos de Newsletter'
+        indexes = [
+            models.Index(fields=['estado']),
+        ]
+
+    def __str__(self):
+        return f"Newsletter: {self.articulo} ({self.enviados}/{self.total})"
+
+class EntregaNewsletter(models.Model):
+    """estado de entrega por destinatario, permite reanudar un envio interrumpido"""
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('enviado', 'Enviado'),
+        ('fallido', 'Fallido'),
+    ]
+
+    envio = models.ForeignKey(EnvioNewsletter, on_delete=models.CASCADE, related_name='entregas')
+    suscripcion = models.ForeignKey(Suscripcion, on_delete=models.SET_NULL, null=True, blank=True, related_name='entregas_newsletter')
+    #copia de los datos del suscriptor al momento de encolar
+    email = models.EmailField(max_length=254)
+    nombre = models.CharField(max_length=100, blank=True, default='')
+    token_unsuscribe = models.CharField(max_length=100, blank=True, default='')
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+    fecha_envio = models.DateTimeField(blank=True, null=True)
+    #marca del proceso que reclamo la entrega y desde cuando (dos procesos no envian la misma)
+    reclamo = models.CharField(max_length=36, blank=True, null=True)
+    reclamado_en = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'entrega_newsletter'
+        verbose_name = 'Entrega de Newsletter'
+        verbose_name_plural = 'Entregas de Newsletter'
+        unique_together = ['envio', 'email']
+        indexes = [
+            models.Index(fields=['envio', 'estado']),
+            models.Index(fields=['reclamo']),
+        ]
+
+    def __str__(self):
+        return f"{self.email} - {self.get_estado_display()}"
+
+class EmailOutbox(models.Model):
+    """cola persistente de correos salientes; la procesa python manage.py procesar_correos"""
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('enviando', 'Enviando'),
+        ('enviado', 'Enviado'),
+        ('fallido', 'Fallido'),
+    ]
+
+    asunto = models.CharField(max_length=255)
+    remitente = models.CharField(max_length=254)
+    destinatarios = models.JSONField(default=list)
+    cuerpo_texto = models.TextField(blank=True, default='')
+    cuerpo_html = models.TextField(blank=True, null=True)
+    headers = models.JSONField(default=dict, blank=True)
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    #marca del worker que reclamo el lote y desde cuando
+    reclamo = models.CharField(max_length=36, blank=True, null=True)
+    reclamado_en = models.DateTimeField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_envio = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'email_outbox'
+        ordering = ['-fecha_creacion']
+        verbose_name = 'Correo saliente'
+        verbose_name_plural = 'Correos salientes'
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento']),
+            models.Index(fields=['reclamo']),
+        ]
+
+    def __str__(self):
+        return f"{self.asunto} -> {', '.join(self.destinatarios)} ({self.get_estado_display()})"
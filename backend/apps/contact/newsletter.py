@@ -0,0 +1,309 @@
+#-*- coding: utf-8 -*-
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, connections, transaction
+from django.db.models import F, Max, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import escape, strip_tags
+
+from .models import EntregaNewsletter, EnvioNewsletter, Suscripcion
+
+logger = logging.getLogger(__name__)
+
+#envios que ya tienen un hilo procesandolos en este proceso; entre procesos las entregas se reclaman en la base
+_en_proceso = set()
+_en_proceso_lock = threading.Lock()
+
+
+class LimitadorTasa:
+    """limita los envios por segundo compartidos entre todos los hilos del pool"""
+
+    def __init__(self, por_segundo):
+        self.intervalo = 1.0 / por_segundo if por_segundo > 0 else 0
+        self.siguiente = time.monotonic()
+        self.lock = threading.Lock()
+
+    def esperar(self):
+        if not self.intervalo:
+            return
+        with self.lock:
+            ahora = time.monotonic()
+            turno = max(self.siguiente, ahora)
+            self.siguiente = turno + self.intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
+def iterar_suscriptores(corte_id, chunk_size=None):
+    """recorre los suscriptores activos hasta el corte en streaming, sin materializar la lista completa"""
+    return (
+        Suscripcion.objects.filter(activa=True, id__lte=corte_id)
+        .order_by('id')
+        .values_list('id', 'email', 'nombre', 'token_unsuscribe')
+        .iterator(chunk_size=chunk_size or settings.NEWSLETTER_BATCH_SIZE)
+    )
+
+
+def _registrar_entregas(envio):
+    """copia la foto de suscriptores a las entregas en bloques de tamaño fijo; retorna el total"""
+    batch_size = settings.NEWSLETTER_BATCH_SIZE
+    total = 0
+    bloque = []
+    for sid, email, nombre, token in iterar_suscriptores(envio.corte_suscripcion_id, batch_size):
+        bloque.append(EntregaNewsletter(envio=envio, suscripcion_id=sid, email=email, nombre=nombre or '', token_unsuscribe=token or ''))
+        if len(bloque) >= batch_size:
+            EntregaNewsletter.objects.bulk_create(bloque, ignore_conflicts=True)
+            total += len(bloque)
+            bloque = []
+    if bloque:
+        EntregaNewsletter.objects.bulk_create(bloque, ignore_conflicts=True)
+        total += len(bloque)
+    return total
+
+
+def encolar_newsletter(articulo_id):
+    """registra el envio y sus entregas una vez confirmado el articulo y lanza el procesamiento"""
+    def _encolar():
+        #la foto queda fijada por el id maximo: quien se suscriba durante el envio no lo recibe
+        corte = Suscripcion.objects.aggregate(corte=Max('id'))['corte'] or 0
+        #envio y entregas se confirman juntos para no dejar un envio a medio registrar
+        with transaction.atomic():
+            envio, creado = EnvioNewsletter.objects.get_or_create(
+                articulo_id=articulo_id, defaults={'corte_suscripcion_id': corte}
+            )
+            if creado:
+                envio.total = _registrar_entregas(envio)
+                envio.save(update_fields=['total'])
+
+        if not envio.total:
+            logger.info("No hay suscriptores activos para enviar el newsletter")
+            _finalizar(envio)
+            return
+
+        if settings.NEWSLETTER_ASYNC:
+            threading.Thread(target=_procesar_en_hilo, args=(envio.id,), name=f'newsletter-{envio.id}', daemon=True).start()
+        else:
+            procesar_envio(envio.id)
+
+    transaction.on_commit(_encolar)
+
+
+def _procesar_en_hilo(envio_id):
+    try:
+        procesar_envio(envio_id)
+    except Exception:
+        logger.exception("Error al procesar el newsletter %s", envio_id)
+    finally:
+        connections.close_all()
+
+
+#marcadores que se reemplazan por destinatario sobre el html ya renderizado
+MARCADOR_NOMBRE = '[[nombre]]'
+MARCADOR_TOKEN = '[[suscripcion_token]]'
+
+
+def prerenderizar(articulo):
+    """renderiza una sola vez el html y el texto del articulo dejando marcadores para los datos del suscriptor"""
+    backend_url = getattr(settings, 'BACKEND_URL', 'http://localhost:8000')
+    #preparar url completa de la imagen
+    imagen_url = None
+    if articulo.imagen_destacada:
+        #si la imagen ya es una url completa, usarla directamente
+        if articulo.imagen_destacada.startswith('http'):
+            imagen_url = articulo.imagen_destacada
+        else:
+            #si es relativa, agregar el backend_url (donde están los archivos media)
+            imagen_url = f"{backend_url}{articulo.imagen_destacada}"
+    unsubscribe_url = f"{backend_url}/api/contact/unsubscribe-token/?token={MARCADOR_TOKEN}"
+
+    context = {
+        'articulo': articulo,
+        'imagen_articulo': imagen_url,
+        'site_url': settings.FRONTEND_URL or 'http://localhost:3000',
+        'radio_name': 'Radio Oriente',
+        'nombre': MARCADOR_NOMBRE,
+        'suscripcion_token': MARCADOR_TOKEN,
+        'unsubscribe_url': unsubscribe_url,
+    }
+    html_message = render_to_string('emails/nuevo_articulo.html', context)
+    return {
+        'subject': f'📰 Nuevo artículo: {articulo.titulo}',
+        'html': html_message,
+        'texto': strip_tags(html_message),
+        'unsubscribe_url': unsubscribe_url,
+    }
+
+
+def _completar(plantilla, entrega):
+    """sustituye los marcadores con los datos del destinatario (escapados como lo haria el template)"""
+    nombre = escape(entrega.nombre)
+    token = escape(entrega.token_unsuscribe)
+    html_message = plantilla['html'].replace(MARCADOR_NOMBRE, nombre).replace(MARCADOR_TOKEN, token)
+    texto = plantilla['texto'].replace(MARCADOR_NOMBRE, entrega.nombre).replace(MARCADOR_TOKEN, entrega.token_unsuscribe)
+    return html_message, texto
+
+
+def _construir_mensaje(plantilla, entrega):
+    """arma el email html con su fallback en texto plano y los headers de desuscripcion"""
+    html_message, texto = _completar(plantilla, entrega)
+    email = EmailMultiAlternatives(
+        subject=plantilla['subject'],
+        body=texto,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[entrega.email],
+    )
+    email.attach_alternative(html_message, "text/html")
+
+    #agregar headers para el botón de desuscripcion de gmail
+    unsubscribe_url = plantilla['unsubscribe_url'].replace(MARCADOR_TOKEN, entrega.token_unsuscribe)
+    email.extra_headers = {
+        'List-Unsubscribe': f'<{unsubscribe_url}>',
+        'List-Unsubscribe-Post': 'List-Unsubscribe=One-Click'
+    }
+    return email
+
+
+def _enviar_lote(plantilla, entregas, limitador):
+    """envia un lote reutilizando una sola conexion smtp; retorna (ids enviados, {id: error})"""
+    enviados = []
+    fallidos = {}
+    try:
+        conexion = get_connection()
+        conexion.open()
+    except Exception as e:
+        return enviados, {entrega.id: f"Conexion: {e}" for entrega in entregas}
+
+    try:
+        for entrega in entregas:
+            limitador.esperar()
+            try:
+                #un mensaje por llamada para conocer el resultado de cada destinatario
+                if conexion.send_messages([_construir_mensaje(plantilla, entrega)]):
+                    enviados.append(entrega.id)
+                else:
+                    fallidos[entrega.id] = 'El backend no confirmo el envio'
+            except Exception as e:
+                fallidos[entrega.id] = str(e)
+    finally:
+        try:
+            conexion.close()
+        except Exception:
+            pass
+    return enviados, fallidos
+
+
+def reclamar_entregas(envio_id, cantidad):
+    """marca con un id de reclamo un bloque de entregas pendientes para que ningun otro proceso las envie"""
+    ahora = timezone.now()
+    #los reclamos abandonados (proceso caido) vuelven a estar disponibles pasado el timeout
+    vencido = ahora - timedelta(seconds=settings.NEWSLETTER_LOCK_TIMEOUT)
+    disponibles = Q(
+        envio_id=envio_id, estado='pendiente', intentos__lt=settings.NEWSLETTER_MAX_INTENTOS
+    ) & (Q(reclamo__isnull=True) | Q(reclamado_en__lt=vencido))
+    reclamo = uuid.uuid4().hex
+
+    with transaction.atomic():
+        candidatos = EntregaNewsletter.objects.filter(disponibles).order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            #postgresql: cada proceso salta las filas bloqueadas por los demas
+            candidatos = candidatos.select_for_update(skip_locked=True)
+        ids = list(candidatos.values_list('id', flat=True)[:cantidad])
+        if not ids:
+            return reclamo, []
+        #sqlite no tiene skip locked: se repite el filtro en el update y solo cuentan las filas marcadas
+        EntregaNewsletter.objects.filter(disponibles, id__in=ids).update(reclamo=reclamo, reclamado_en=ahora)
+    return reclamo, list(EntregaNewsletter.objects.filter(reclamo=reclamo, estado='pendiente').order_by('id'))
+
+
+def _guardar_resultados(envio, reclamo, enviados, fallidos):
+    """actualiza el estado de las entregas del lote con pocas consultas y libera el reclamo.
+    solo se tocan las filas que siguen reclamadas por este proceso, asi un reclamo vencido no se cuenta dos veces"""
+    ahora = timezone.now()
+    propias = EntregaNewsletter.objects.filter(reclamo=reclamo, estado='pendiente')
+    with transaction.atomic():
+        confirmados = 0
+        if enviados:
+            confirmados = propias.filter(id__in=enviados).update(
+                estado='enviado', fecha_envio=ahora, error=None, intentos=F('intentos') + 1, reclamo=None
+            )
+        if fallidos:
+            #siguen pendientes hasta agotar los intentos
+            for entrega_id, error in fallidos.items():
+                propias.filter(id=entrega_id).update(error=error[:1000])
+            propias.filter(id__in=list(fallidos)).update(intentos=F('intentos') + 1, reclamo=None)
+            EntregaNewsletter.objects.filter(
+                id__in=list(fallidos), estado='pendiente', intentos__gte=settings.NEWSLETTER_MAX_INTENTOS
+            ).update(estado='fallido')
+        if confirmados:
+            EnvioNewsletter.objects.filter(id=envio.id).update(enviados=F('enviados') + confirmados)
+
+
+def _finalizar(envio):
+    envio.fallidos = envio.entregas.filter(estado='fallido').count()
+    envio.estado = 'completado'
+    envio.fecha_fin = timezone.now()
+    envio.save(update_fields=['fallidos', 'estado', 'fecha_fin'])
+
+
+def procesar_envio(envio_id):
+    """envia las entregas pendientes en lotes con un pool de hilos; se puede reanudar tras una caida.
+    retorna None si no quedaba nada que reclamar (p.ej. otro proceso ya lo esta enviando)"""
+    with _en_proceso_lock:
+        if envio_id in _en_proceso:
+            return
+        _en_proceso.add(envio_id)
+
+    try:
+        envio = EnvioNewsletter.objects.select_related('articulo__categoria', 'articulo__autor').get(id=envio_id)
+        articulo = envio.articulo
+        EnvioNewsletter.objects.filter(id=envio.id).update(estado='enviando')
+
+        #el template se renderiza una vez por envio; por destinatario solo se reemplazan marcadores
+        plantilla = prerenderizar(articulo)
+        limitador = LimitadorTasa(settings.NEWSLETTER_RATE_LIMIT)
+        batch_size = settings.NEWSLETTER_BATCH_SIZE
+        workers = max(1, settings.NEWSLETTER_WORKERS)
+
+        procesadas = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='newsletter') as pool:
+            #cada ronda reclama las pendientes por id; los fallidos con reintentos vuelven a la siguiente ronda
+            while True:
+                reclamo, pendientes = reclamar_entregas(envio.id, batch_size * workers)
+                if not pendientes:
+                    break
+                procesadas += len(pendientes)
+                lotes = [pendientes[i:i + batch_size] for i in range(0, len(pendientes), batch_size)]
+                futuros = [pool.submit(_enviar_lote, plantilla, lote, limitador) for lote in lotes]
+                for futuro in futuros:
+                    enviados, fallidos = futuro.result()
+                    _guardar_resultados(envio, reclamo, enviados, fallidos)
+
+        #si otro proceso aun tiene entregas reclamadas, ese cierra el envio al terminar
+        envio.refresh_from_db()
+        if not envio.entregas.filter(estado='pendiente', intentos__lt=settings.NEWSLETTER_MAX_INTENTOS).exists():
+            _finalizar(envio)
+        if not procesadas:
+            return None
+        logger.info(
+            "Newsletter enviado a %s/%s suscriptores para el artículo: %s", envio.enviados, envio.total, articulo.titulo
+        )
+        return envio
+    finally:
+        with _en_proceso_lock:
+            _en_proceso.discard(envio_id)
+
+
+def reanudar_pendientes():
+    """procesa los envios que quedaron sin terminar (p.ej. tras reiniciar el servidor)"""
+    envio_ids = list(
+        EnvioNewsletter.objects.exclude(estado='completado').values_list('id', flat=True)
+    )
+    return [procesar_envio(envio_id) for envio_id in envio_ids]
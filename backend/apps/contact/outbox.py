@@ -0,0 +1,162 @@
+#-*- coding: utf-8 -*-
+import logging
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+#evita lanzar mas de un hilo de vaciado a la vez en este proceso
+_vaciando = threading.Lock()
+
+
+def encolar_email(asunto, destinatarios, cuerpo_texto='', cuerpo_html=None, headers=None, remitente=None):
+    """guarda el correo en la cola dentro de la transaccion actual; el envio ocurre fuera del request"""
+    correo = EmailOutbox.objects.create(
+        asunto=asunto,
+        remitente=remitente or settings.DEFAULT_FROM_EMAIL,
+        destinatarios=list(destinatarios),
+        cuerpo_texto=cuerpo_texto,
+        cuerpo_html=cuerpo_html,
+        headers=headers or {},
+    )
+    if settings.EMAIL_OUTBOX_ASYNC:
+        transaction.on_commit(_lanzar_vaciado)
+    return correo
+
+
+def _lanzar_vaciado():
+    """vacia la cola en un hilo para instalaciones sin worker dedicado"""
+    if not _vaciando.acquire(blocking=False):
+        #ya hay un hilo vaciando; tomara este correo en su siguiente lote
+        return
+
+    def _vaciar():
+        try:
+            while procesar_outbox()['reclamados']:
+                pass
+        except Exception:
+            logger.exception("Error al procesar la cola de correos")
+        finally:
+            _vaciando.release()
+            connections.close_all()
+
+    threading.Thread(target=_vaciar, name='email-outbox', daemon=True).start()
+
+
+def calcular_backoff(intentos):
+    """espera exponencial antes del siguiente intento: base * 2^(intentos-1), con tope"""
+    segundos = settings.EMAIL_OUTBOX_BACKOFF_BASE * (2 ** max(intentos - 1, 0))
+    return timedelta(seconds=min(segundos, settings.EMAIL_OUTBOX_BACKOFF_MAX))
+
+
+def reclamar_lote(batch_size=None):
+    """marca con un id de reclamo un lote de correos disponibles para que ningun otro worker los tome"""
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    ahora = timezone.now()
+    #los reclamos abandonados (worker caido) vuelven a estar disponibles pasado el timeout
+    vencido = ahora - timedelta(seconds=settings.EMAIL_OUTBOX_LOCK_TIMEOUT)
+    disponibles = (
+        Q(estado='pendiente', proximo_intento__lte=ahora) |
+        Q(estado='enviando', reclamado_en__lt=vencido)
+    )
+    reclamo = uuid.uuid4().hex
+
+    with transaction.atomic():
+        candidatos = EmailOutbox.objects.filter(disponibles).order_by('proximo_intento')
+        if connection.features.has_select_for_update_skip_locked:
+            #postgresql: cada worker salta las filas bloqueadas por los demas
+            candidatos = candidatos.select_for_update(skip_locked=True)
+        ids = list(candidatos.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return reclamo, []
+        #sqlite no tiene skip locked: se repite el filtro en el update y solo cuentan las filas marcadas
+        EmailOutbox.objects.filter(disponibles, id__in=ids).update(
+            estado='enviando', reclamo=reclamo, reclamado_en=ahora
+        )
+    return reclamo, list(EmailOutbox.objects.filter(reclamo=reclamo, estado='enviando'))
+
+
+def _construir_mensaje(correo):
+    email = EmailMultiAlternatives(
+        subject=correo.asunto,
+        body=correo.cuerpo_texto,
+        from_email=correo.remitente,
+        to=correo.destinatarios,
+        headers=correo.headers or None,
+    )
+    if correo.cuerpo_html:
+        email.attach_alternative(correo.cuerpo_html, "text/html")
+    return email
+
+
+def _registrar_fallo(correo, error, ahora):
+    correo.intentos += 1
+    correo.error = str(error)[:1000]
+    correo.reclamo = None
+    if correo.intentos >= settings.EMAIL_OUTBOX_MAX_INTENTOS:
+        correo.estado = 'fallido'
+    else:
+        correo.estado = 'pendiente'
+        correo.proximo_intento = ahora + calcular_backoff(correo.intentos)
+    correo.save(update_fields=['intentos', 'error', 'reclamo', 'estado', 'proximo_intento'])
+    return correo.estado
+
+
+def procesar_outbox(batch_size=None):
+    """reclama y envia un lote con una sola conexion smtp. retorna un dict con las metricas del lote"""
+    reloj = time.monotonic()
+    reclamo, correos = reclamar_lote(batch_size)
+    metricas = {'reclamados': len(correos), 'enviados': 0, 'reintentos': 0, 'fallidos': 0}
+    if correos:
+        enviados = []
+        try:
+            conexion = get_connection()
+            conexion.open()
+        except Exception as e:
+            conexion = None
+            error_conexion = e
+
+        ahora = timezone.now()
+        for correo in correos:
+            if conexion is None:
+                estado = _registrar_fallo(correo, f"Conexion: {error_conexion}", ahora)
+            else:
+                try:
+                    if conexion.send_messages([_construir_mensaje(correo)]):
+                        enviados.append(correo.id)
+                        continue
+                    estado = _registrar_fallo(correo, 'El backend no confirmo el envio', ahora)
+                except Exception as e:
+                    estado = _registrar_fallo(correo, e, ahora)
+            metricas['fallidos' if estado == 'fallido' else 'reintentos'] += 1
+
+        if conexion is not None:
+            try:
+                conexion.close()
+            except Exception:
+                pass
+
+        EmailOutbox.objects.filter(id__in=enviados).update(
+            estado='enviado', fecha_envio=timezone.now(), reclamo=None, error=None
+        )
+        metricas['enviados'] = len(enviados)
+
+    segundos = time.monotonic() - reloj
+    metricas['segundos'] = segundos
+    metricas['por_segundo'] = metricas['enviados'] / segundos if segundos else 0
+    if correos:
+        logger.info(
+            "Cola de correos: %(enviados)s enviados, %(reintentos)s reintentos, %(fallidos)s fallidos "
+            "en %(segundos).2fs (%(por_segundo).1f/s)", metricas
+        )
+    return metricas
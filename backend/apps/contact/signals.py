@@ -1,10 +1,14 @@
+import logging
+
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
 from .models import Suscripcion
+from .outbox import encolar_email
+
+logger = logging.getLogger(__name__)
 
 
 @receiver(post_save, sender=Suscripcion)
@@ -32,29 +36,24 @@ def enviar_email_bienvenida(sender, instance, created, **kwargs):
         subject = f'¡Bienvenido a Radio Oriente! 🎉'
         from_email = settings.DEFAULT_FROM_EMAIL
 
-        #crear email con soporte html
-        email = EmailMultiAlternatives(
-            subject=subject,
-  #versión texto plano
-            from_email=from_email,
-            to=[instance.email]
-        )
-
-        #adjuntar versión html
-        email.attach_alternative(html_message, "text/html")
-
         #agregar headers para el botón de desuscripcion de gmail
         backend_url = getattr(settings, 'BACKEND_URL', 'http://localhost:8000')
         unsubscribe_url = f"{backend_url}/api/contact/unsubscribe-token/?token={instance.token_unsuscribe}"
-        email.extra_headers = {
-            'List-Unsubscribe': f'<{unsubscribe_url}>',
-            'List-Unsubscribe-Post': 'List-Unsubscribe=One-Click'
-        }
 
-        #enviar
-        email.send()
+        #encolar; el worker de la cola de correos lo envia fuera del request
+        encolar_email(
+            subject,
+            [instance.email],
+            cuerpo_texto=strip_tags(html_message),
+            cuerpo_html=html_message,
+            headers={
+                'List-Unsubscribe': f'<{unsubscribe_url}>',
+                'List-Unsubscribe-Post': 'List-Unsubscribe=One-Click'
+            },
+            remitente=from_email,
+        )
 
-        print(f"Email de bienvenida enviado a: {instance.email}")
+        logger.info("Email de bienvenida encolado para: %s", instance.email)
 
-    except Exception as e:
-        print(f"Error al enviar email de bienvenida a {instance.email}: {str(e)}")
+    except Exception:
+        logger.exception("Error al encolar email de bienvenida para %s", instance.email)
@@ -0,0 +1,16 @@
+from django.contrib import admin
+from .models import Blob, ImagenDerivada
+
+@admin.register(ImagenDerivada)
+class ImagenDerivadaAdmin(admin.ModelAdmin):
+    list_display = ('ruta', 'ancho', 'alto', 'fecha_creacion')
+    search_fields = ('ruta',)
+    readonly_fields = ('ruta', 'ancho', 'alto', 'variantes', 'fecha_creacion')
+
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ('ruta', 'tamano', 'referencias', 'fecha_creacion', 'fecha_uso')
+    list_filter = ('fecha_creacion',)
+    search_fields = ('ruta', 'sha256')
+    readonly_fields = ('ruta', 'sha256', 'tamano', 'referencias', 'fecha_creacion', 'fecha_uso')
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class MediosConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.medios'
+    verbose_name = 'Medios'
+
+    def ready(self):
+        """importar señales cuando la aplicación esté lista"""
+        import apps.medios.signals  # noqa
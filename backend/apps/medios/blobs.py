@@ -0,0 +1,118 @@
+#-*- coding: utf-8 -*-
+"""conteo de referencias y recoleccion de los blobs del almacenamiento por contenido"""
+from collections import Counter
+from datetime import timedelta
+from urllib.parse import urlparse
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Blob, ImagenDerivada
+from .storage import PREFIJO, AlmacenamientoContenido, almacenamiento_contenido
+
+#campos de texto que guardan la url de un blob (p.ej. la imagen subida desde el formulario de campañas)
+REFERENCIAS_URL = {
+    'publicidad.PublicidadWeb': ('archivo_media',),
+}
+
+
+def registrar_blob(sha256, ruta, tamano):
+    """alta del blob recien escrito; si ya existia solo se renueva fecha_uso (lo protege de la recoleccion)"""
+    actualizados = Blob.objects.filter(ruta=ruta).update(fecha_uso=timezone.now())
+    if actualizados:
+        return
+    try:
+        with transaction.atomic():
+            Blob.objects.create(ruta=ruta, sha256=sha256, tamano=tamano)
+    except IntegrityError:
+        #otra subida del mismo contenido lo creo en paralelo
+        Blob.objects.filter(ruta=ruta).update(fecha_uso=timezone.now())
+
+
+def nombre_blob(valor):
+    """nombre en el storage si el valor (nombre de archivo o url de media) apunta a un blob"""
+    if not valor:
+        return None
+    nombre = str(valor)
+    if '://' in nombre or nombre.startswith(settings.MEDIA_URL):
+        ruta = urlparse(nombre).path
+        if not ruta.startswith(settings.MEDIA_URL):
+            return None
+        nombre = ruta[len(settings.MEDIA_URL):]
+    return nombre if nombre.startswith(f"{PREFIJO}/") else None
+
+
+def campos_con_blobs():
+    """{modelo: [campos]} con los FileField que usan el almacenamiento por contenido y las urls registradas"""
+    campos = {}
+    for modelo in apps.get_models():
+        for campo in modelo._meta.get_fields():
+            if isinstance(campo, models.FileField) and isinstance(campo.storage, AlmacenamientoContenido):
+                campos.setdefault(modelo, []).append(campo.name)
+    for etiqueta, nombres in REFERENCIAS_URL.items():
+        campos.setdefault(apps.get_model(etiqueta), []).extend(nombres)
+    return campos
+
+
+def rutas_de_fila(valores):
+    return [ruta for ruta in map(nombre_blob, valores) if ruta]
+
+
+def ajustar(rutas, signo):
+    """suma (+1) o resta (-1) una referencia por cada aparicion de la ruta"""
+    for ruta, cantidad in Counter(rutas).items():
+        Blob.objects.filter(ruta=ruta).update(
+            referencias=F('referencias') + signo * cantidad, fecha_uso=timezone.now()
+        )
+
+
+def recontar():
+    """recalcula las referencias recorriendo las tablas (corrige desvios por update() o borrados masivos)"""
+    conteo = Counter()
+    for modelo, campos in campos_con_blobs().items():
+        for fila in modelo._base_manager.values_list(*campos).iterator():
+            conteo.update(rutas_de_fila(fila))
+    with transaction.atomic():
+        Blob.objects.update(referencias=0)
+        for ruta, cantidad in conteo.items():
+            Blob.objects.filter(ruta=ruta).update(referencias=cantidad)
+    return len(conteo)
+
+
+def recolectar(gracia_horas=None, simular=False):
+    """borra los blobs sin referencias (y sus derivados) que no se usan hace mas de gracia_horas.
+    la gracia cubre las subidas que aun no se asignaron a un registro. retorna (blobs, bytes)"""
+    if gracia_horas is None:
+        gracia_horas = settings.MEDIA_BLOBS_GRACIA_HORAS
+    limite = timezone.now() - timedelta(hours=gracia_horas)
+    candidatos = Blob.objects.filter(referencias__lte=0, fecha_uso__lt=limite)
+    if simular:
+        return candidatos.count(), candidatos.aggregate(total=models.Sum('tamano'))['total'] or 0
+
+    storage = almacenamiento_contenido()
+    if not isinstance(storage, AlmacenamientoContenido):
+        storage = AlmacenamientoContenido()
+    borrados = liberados = 0
+    for ruta in list(candidatos.values_list('ruta', flat=True)):
+        with transaction.atomic():
+            #se vuelve a comprobar con la fila bloqueada por si alguien lo referencio entretanto
+            blob = Blob.objects.select_for_update().filter(
+                ruta=ruta, referencias__lte=0, fecha_uso__lt=limite
+            ).first()
+            if blob is None:
+                continue
+            derivada = ImagenDerivada.objects.filter(ruta=ruta).first()
+            if derivada:
+                for lista in derivada.variantes.values():
+                    for _, variante in lista:
+                        default_storage.delete(variante)
+                derivada.delete()
+            storage.eliminar_blob(ruta)
+            blob.delete()
+        borrados += 1
+        liberados += blob.tamano
+    return borrados, liberados
@@ -0,0 +1,189 @@
+#-*- coding: utf-8 -*-
+"""derivados responsivos de las imagenes subidas: anchos fijos en avif/webp/jpeg, sin exif"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+#campos de imagen que reciben derivados: etiqueta del modelo -> campos
+CAMPOS_CON_DERIVADOS = {
+    'articulos.Articulo': ('imagen_portada', 'imagen_thumbnail'),
+    'radio.Conductor': ('foto',),
+    'publicidad.ImagenPublicidadWeb': ('imagen',),
+}
+
+EXTENSIONES = {'avif': 'avif', 'webp': 'webp', 'jpeg': 'jpg'}
+FORMATOS_PIL = {'avif': 'AVIF', 'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+_pool = None
+
+
+def formatos_disponibles():
+    """formatos configurados que la instalacion de pillow puede escribir"""
+    from PIL import features
+    return [f for f in settings.IMAGENES_FORMATOS if f == 'jpeg' or features.check(f)]
+
+
+def nombre_variante(ruta, ancho, formato):
+    base, _ = os.path.splitext(ruta)
+    return f"{base}_{ancho}w.{EXTENSIONES[formato]}"
+
+
+def _anchos_para(ancho_original):
+    """anchos fijos menores al original, mas el original si es menor al mayor ancho configurado (no se amplia)"""
+    anchos = sorted(a for a in settings.IMAGENES_ANCHOS if a < ancho_original)
+    if ancho_original <= max(settings.IMAGENES_ANCHOS):
+        anchos.append(ancho_original)
+    return anchos
+
+
+def _preparar_modo(imagen, formato):
+    tiene_alfa = imagen.mode in ('RGBA', 'LA') or (imagen.mode == 'P' and 'transparency' in imagen.info)
+    if formato == 'jpeg':
+        if tiene_alfa:
+            #jpeg no tiene transparencia: se compone sobre blanco
+            from PIL import Image
+            fondo = Image.new('RGB', imagen.size, (255, 255, 255))
+            fondo.paste(imagen.convert('RGBA'), mask=imagen.convert('RGBA').getchannel('A'))
+            return fondo
+        return imagen if imagen.mode in ('RGB', 'L') else imagen.convert('RGB')
+    if imagen.mode in ('RGB', 'RGBA'):
+        return imagen
+    return imagen.convert('RGBA' if tiene_alfa else 'RGB')
+
+
+def generar_variantes(ruta):
+    """se ejecuta en el pool de procesos: lee el original del storage y guarda los derivados junto a el. no usa la base"""
+    from PIL import Image, ImageOps
+
+    with default_storage.open(ruta, 'rb') as archivo:
+        imagen = Image.open(archivo)
+        imagen.load()
+    #aplica la orientacion del exif antes de descartarlo (los derivados se guardan sin metadatos)
+    imagen = ImageOps.exif_transpose(imagen)
+    ancho_original, alto_original = imagen.size
+
+    variantes = {}
+    for formato in formatos_disponibles():
+        lista = []
+        for ancho in _anchos_para(ancho_original):
+            alto = max(1, round(alto_original * ancho / ancho_original))
+            copia = imagen if ancho == ancho_original else imagen.resize((ancho, alto), Image.LANCZOS)
+            buffer = BytesIO()
+            _preparar_modo(copia, formato).save(buffer, FORMATOS_PIL[formato], quality=settings.IMAGENES_CALIDAD)
+            nombre = nombre_variante(ruta, ancho, formato)
+            if default_storage.exists(nombre):
+                default_storage.delete(nombre)
+            lista.append([ancho, default_storage.save(nombre, ContentFile(buffer.getvalue()))])
+        variantes[formato] = lista
+    return {'ruta': ruta, 'ancho': ancho_original, 'alto': alto_original, 'variantes': variantes}
+
+
+def _clave(ruta):
+    return f"medios:variantes:{ruta}"
+
+
+def registrar(resultado):
+    """guarda el resultado del worker en la tabla y en cache"""
+    from .models import ImagenDerivada
+    ImagenDerivada.objects.update_or_create(
+        ruta=resultado['ruta'],
+        defaults={'ancho': resultado['ancho'], 'alto': resultado['alto'], 'variantes': resultado['variantes']},
+    )
+    cache.set(_clave(resultado['ruta']), resultado['variantes'], settings.IMAGENES_CACHE_TTL)
+
+
+def _iniciar_worker():
+    import django
+    django.setup()
+
+
+def _get_pool():
+    """pool de procesos (spawn: no hereda conexiones ni hilos del servidor)"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.IMAGENES_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_iniciar_worker,
+        )
+    return _pool
+
+
+def _al_terminar(futuro):
+    try:
+        registrar(futuro.result())
+    except Exception:
+        logger.exception("Error al generar derivados de imagen")
+    finally:
+        connections.close_all()
+
+
+def procesar(ruta):
+    """genera los derivados de inmediato en este proceso (comandos y pruebas)"""
+    resultado = generar_variantes(ruta)
+    registrar(resultado)
+    return resultado
+
+
+def programar_variantes(ruta):
+    """encola la generacion de derivados una vez confirmada la transaccion; la subida no espera el redimensionado"""
+    def _enviar():
+        if not settings.IMAGENES_ASYNC:
+            try:
+                procesar(ruta)
+            except Exception:
+                logger.exception("Error al generar derivados de %s", ruta)
+            return
+        _get_pool().submit(generar_variantes, ruta).add_done_callback(_al_terminar)
+
+    transaction.on_commit(_enviar)
+
+
+def variantes_de(rutas):
+    """variantes registradas para varias rutas: {ruta: {formato: [[ancho, ruta], ...]}} (una lectura de cache)"""
+    from .models import ImagenDerivada
+    rutas = [r for r in set(rutas) if r]
+    if not rutas:
+        return {}
+    encontradas = cache.get_many([_clave(r) for r in rutas])
+    resultado = {ruta: encontradas[_clave(ruta)] for ruta in rutas if _clave(ruta) in encontradas}
+    faltantes = [ruta for ruta in rutas if ruta not in resultado]
+    if faltantes:
+        desde_base = dict(ImagenDerivada.objects.filter(ruta__in=faltantes).values_list('ruta', 'variantes'))
+        #solo se cachean las que ya tienen derivados: las pendientes se vuelven a consultar hasta que registrar() las guarde
+        if desde_base:
+            cache.set_many({_clave(r): v for r, v in desde_base.items()}, settings.IMAGENES_CACHE_TTL)
+        resultado.update({ruta: desde_base.get(ruta, {}) for ruta in faltantes})
+    return resultado
+
+
+def srcset(variantes, absoluta):
+    """{formato: 'url 320w, url 640w, ...'} listo para <source srcset>; None si aun no hay derivados"""
+    if not variantes:
+        return None
+    return {
+        formato: ', '.join(f"{absoluta(default_storage.url(ruta))} {ancho}w" for ancho, ruta in lista)
+        for formato, lista in variantes.items()
+    }
+
+
+def srcset_campo(archivo, request, variantes=None):
+    """srcset de un ImageField. variantes: resultado de variantes_de() precargado para toda la lista;
+    sin el se consulta solo este archivo (serializers de detalle)"""
+    if not archivo:
+        return None
+    if variantes is None:
+        variantes = variantes_de([archivo.name])
+    variantes = variantes.get(archivo.name)
+    absoluta = request.build_absolute_uri if request else (lambda url: url)
+    return srcset(variantes, absoluta)
@@ -0,0 +1,29 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from apps.medios.imagenes import CAMPOS_CON_DERIVADOS, procesar
+from apps.medios.models import ImagenDerivada
+
+
+class Command(BaseCommand):
+    help = 'Genera los derivados responsivos de las imagenes subidas antes de activar el pipeline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--todas', action='store_true', help='Regenerar tambien las ya procesadas')
+
+    def handle(self, *args, **options):
+        procesadas = set() if options['todas'] else set(ImagenDerivada.objects.values_list('ruta', flat=True))
+        total = errores = 0
+        for etiqueta, campos in CAMPOS_CON_DERIVADOS.items():
+            modelo = apps.get_model(etiqueta)
+            for campo in campos:
+                rutas = modelo.objects.exclude(**{campo: ''}).exclude(**{f'{campo}__isnull': True})
+                for ruta in rutas.values_list(campo, flat=True).distinct().iterator():
+                    if ruta in procesadas:
+                        continue
+                    try:
+                        procesar(ruta)
+                        total += 1
+                    except Exception as e:
+                        errores += 1
+                        self.stderr.write(f"{ruta}: {e}")
+        self.stdout.write(self.style.SUCCESS(f"{total} imagenes procesadas, {errores} con error"))
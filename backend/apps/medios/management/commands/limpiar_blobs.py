@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from apps.medios.blobs import recolectar, recontar
+
+
+class Command(BaseCommand):
+    help = 'Borra los blobs de media que ningun registro referencia (programar con cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recontar', action='store_true',
+                            help='Recalcular referencias recorriendo las tablas antes de limpiar')
+        parser.add_argument('--gracia', type=int, default=None,
+                            help='Horas sin uso antes de borrar (por defecto MEDIA_BLOBS_GRACIA_HORAS)')
+        parser.add_argument('--simular', action='store_true', help='Solo informar lo que se borraria')
+
+    def handle(self, *args, **options):
+        if options['recontar']:
+            total = recontar()
+            self.stdout.write(f"{total} blobs referenciados")
+        borrados, liberados = recolectar(options['gracia'], simular=options['simular'])
+        verbo = 'se borrarian' if options['simular'] else 'borrados'
+        self.stdout.write(self.style.SUCCESS(f"{borrados} blobs {verbo} ({liberados / 1024 / 1024:.1f} MB)"))
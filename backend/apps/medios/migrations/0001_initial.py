@@ -0,0 +1,30 @@
+#generated by django 5.2.7 on 2026-10-19 14:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImagenDerivada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ruta', models.CharField(max_length=500, unique=True)),
+                ('ancho', models.PositiveIntegerField(default=0)),
+                ('alto', models.PositiveIntegerField(default=0)),
+                ('variantes', models.JSONField(default=dict)),
+                ('fecha_creacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Imagen derivada',
+                'verbose_name_plural': 'Imágenes derivadas',
+                'db_table': 'imagen_derivada',
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import models
+from django.utils import timezone
+
+
+class ImagenDerivada(models.Model):
+    """versiones redimensionadas (webp/avif/jpeg a anchos fijos) de una imagen subida"""
+    #nombre del original en el storage (p.ej. articulos/imagenes/2025/11/slug.jpg)
+    ruta = models.CharField(max_length=500, unique=True)
+    ancho = models.PositiveIntegerField(default=0)
+    alto = models.PositiveIntegerField(default=0)
+    #{formato: [[ancho, ruta], ...]} ordenado por ancho
+    variantes = models.JSONField(default=dict)
+    fecha_creacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'imagen_derivada'
+        verbose_name = 'Imagen derivada'
+        verbose_name_plural = 'Imágenes derivadas'
+
+    def __str__(self):
+        return self.ruta
+
+
+class Blob(models.Model):
+    """archivo guardado por su contenido (sha-256); lo comparten todos los registros que subieron lo mismo"""
+    ruta = models.CharField(max_length=500, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    tamano = models.PositiveBigIntegerField(default=0)
+    #registros que apuntan al blob; en 0 lo borra limpiar_blobs pasada la gracia
+    referencias = models.IntegerField(default=0)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    #ultima subida o cambio de referencias
+    fecha_uso = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'blob_media'
+        verbose_name = 'Blob'
+        verbose_name_plural = 'Blobs'
+        indexes = [
+            models.Index(fields=['referencias', 'fecha_uso'], name='blob_recoleccion_idx'),
+        ]
+
+    def __str__(self):
+        return self.ruta
@@ -0,0 +1,62 @@
+from collections import Counter
+
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from . import blobs
+from .imagenes import CAMPOS_CON_DERIVADOS, programar_variantes
+from .models import ImagenDerivada
+
+
+def programar_derivados(sender, instance, **kwargs):
+    """al guardar una imagen nueva se encolan sus derivados; las ya procesadas se omiten"""
+    rutas = [getattr(instance, campo).name for campo in CAMPOS_CON_DERIVADOS[sender._meta.label]]
+    rutas = [ruta for ruta in rutas if ruta]
+    if not rutas:
+        return
+    procesadas = set(ImagenDerivada.objects.filter(ruta__in=rutas).values_list('ruta', flat=True))
+    for ruta in rutas:
+        if ruta not in procesadas:
+            programar_variantes(ruta)
+
+
+for etiqueta in CAMPOS_CON_DERIVADOS:
+    post_save.connect(
+        programar_derivados, sender=apps.get_model(etiqueta),
+        dispatch_uid=f'medios_derivados_{etiqueta}',
+    )
+
+
+def _toca_blobs(sender, update_fields):
+    return update_fields is None or not set(update_fields).isdisjoint(_campos_blobs[sender])
+
+
+def recordar_blobs_anteriores(sender, instance, update_fields=None, **kwargs):
+    """blobs a los que apuntaba la fila antes de guardar, para descontar los reemplazados"""
+    instance._blobs_anteriores = []
+    if instance.pk and _toca_blobs(sender, update_fields):
+        fila = sender._base_manager.filter(pk=instance.pk).values_list(*_campos_blobs[sender]).first()
+        if fila:
+            instance._blobs_anteriores = blobs.rutas_de_fila(fila)
+
+
+def contar_referencias(sender, instance, update_fields=None, **kwargs):
+    """suma los blobs nuevos de la fila y descuenta los que reemplazo"""
+    if not _toca_blobs(sender, update_fields):
+        return
+    nuevos = Counter(blobs.rutas_de_fila(getattr(instance, campo) for campo in _campos_blobs[sender]))
+    anteriores = Counter(getattr(instance, '_blobs_anteriores', []))
+    blobs.ajustar((nuevos - anteriores).elements(), 1)
+    blobs.ajustar((anteriores - nuevos).elements(), -1)
+
+
+def descontar_referencias(sender, instance, **kwargs):
+    blobs.ajustar(blobs.rutas_de_fila(getattr(instance, campo) for campo in _campos_blobs[sender]), -1)
+
+
+_campos_blobs = blobs.campos_con_blobs()
+for modelo in _campos_blobs:
+    uid = f'medios_blobs_{modelo._meta.label}'
+    pre_save.connect(recordar_blobs_anteriores, sender=modelo, dispatch_uid=uid)
+    post_save.connect(contar_referencias, sender=modelo, dispatch_uid=uid)
+    post_delete.connect(descontar_referencias, sender=modelo, dispatch_uid=uid)
@@ -0,0 +1,97 @@
+#-*- coding: utf-8 -*-
+"""almacenamiento direccionado por contenido: cada archivo se guarda una sola vez bajo su sha-256"""
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage, default_storage
+
+from .subidas import extension_para
+
+PREFIJO = 'blobs'
+
+
+class AlmacenamientoContenido(FileSystemStorage):
+    """guarda en blobs/ab/cd/<sha256>.<ext>; subir dos veces el mismo archivo ocupa un solo blob.
+    los blobs no se borran al reemplazarlos: los elimina limpiar_blobs cuando nadie los referencia"""
+
+    def get_available_name(self, name, max_length=None):
+        #el nombre final sale del contenido en _save; no se agregan sufijos aleatorios
+        return name
+
+    def _save(self, name, content):
+        from .blobs import registrar_blob
+
+        extension = os.path.splitext(name)[1].lower()
+        if getattr(content, 'sha256', None) and hasattr(content, 'temporary_file_path'):
+            #subida por streaming: el hash ya se calculo al recibir los chunks, solo se mueve el temporal.
+            #la extension sale del tipo detectado por magic bytes
+            extension = extension_para(name, content.content_type)
+            sha256, tamano = content.sha256, content.size
+            ruta = self._ruta(sha256, extension)
+            final = self.path(ruta)
+            if not os.path.exists(final):
+                os.makedirs(os.path.dirname(final), exist_ok=True)
+                file_move_safe(content.temporary_file_path(), final, allow_overwrite=True)
+                self._permisos(final)
+            registrar_blob(sha256, ruta, tamano)
+            return ruta
+
+        carpeta_temporal = self.path(os.path.join(PREFIJO, 'tmp'))
+        os.makedirs(carpeta_temporal, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(dir=carpeta_temporal)
+        try:
+            #se calcula el hash mientras se escribe: el archivo se recorre una sola vez
+            hasher = hashlib.sha256()
+            tamano = 0
+            with os.fdopen(descriptor, 'wb') as destino:
+                for chunk in content.chunks():
+                    hasher.update(chunk)
+                    destino.write(chunk)
+                    tamano += len(chunk)
+            sha256 = hasher.hexdigest()
+            ruta = self._ruta(sha256, extension)
+            final = self.path(ruta)
+            if os.path.exists(final):
+                os.remove(temporal)
+            else:
+                os.makedirs(os.path.dirname(final), exist_ok=True)
+                os.replace(temporal, final)
+                self._permisos(final)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+        registrar_blob(sha256, ruta, tamano)
+        return ruta
+
+    def _ruta(self, sha256, extension):
+        return f"{PREFIJO}/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}"
+
+    def _permisos(self, final):
+        if self.file_permissions_mode is not None:
+            os.chmod(final, self.file_permissions_mode)
+
+    def delete(self, name):
+        if name and name.startswith(f"{PREFIJO}/"):
+            #puede estar compartido; se libera en la recoleccion cuando no tiene referencias
+            return
+        super().delete(name)
+
+    def eliminar_blob(self, name):
+        super().delete(name)
+
+
+_almacenamiento = None
+
+
+def almacenamiento_contenido():
+    """storage de los campos de imagen deduplicados (MEDIA_DEDUPLICAR=False vuelve al storage por defecto)"""
+    global _almacenamiento
+    if not settings.MEDIA_DEDUPLICAR:
+        return default_storage
+    if _almacenamiento is None:
+        _almacenamiento = AlmacenamientoContenido()
+    return _almacenamiento
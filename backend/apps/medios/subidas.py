@@ -0,0 +1,187 @@
+#-*- coding: utf-8 -*-
+"""subidas por streaming: cada chunk va a disco a medida que llega, validando tipo (magic bytes) y tamaño"""
+import hashlib
+import os
+import tempfile
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.files.uploadedfile import TemporaryUploadedFile, UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.http import JsonResponse, QueryDict
+from django.shortcuts import redirect
+from django.utils.datastructures import MultiValueDict
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+MB = 1024 * 1024
+
+#firmas de los formatos aceptados: (desplazamiento, bytes, tipo)
+FIRMAS = (
+    (0, b'\xff\xd8\xff', 'image/jpeg'),
+    (0, b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (0, b'GIF87a', 'image/gif'),
+    (0, b'GIF89a', 'image/gif'),
+    (8, b'WEBP', 'image/webp'),
+    (4, b'ftypavif', 'image/avif'),
+    (4, b'ftypavis', 'image/avif'),
+    (0, b'%PDF-', 'application/pdf'),
+    #docx/xlsx/pptx son zip; doc/xls/ppt son ole2
+    (0, b'PK\x03\x04', 'application/zip'),
+    (0, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/x-ole-storage'),
+)
+LARGO_CABECERA = 16
+
+IMAGENES = ('image/jpeg', 'image/png', 'image/gif', 'image/webp', 'image/avif')
+DOCUMENTOS = IMAGENES + ('application/pdf', 'application/zip', 'application/x-ole-storage')
+
+#extensiones validas por tipo detectado; la primera es la que se usa si el nombre no coincide
+EXTENSIONES = {
+    'image/jpeg': ('.jpg', '.jpeg'),
+    'image/png': ('.png',),
+    'image/gif': ('.gif',),
+    'image/webp': ('.webp',),
+    'image/avif': ('.avif',),
+    'application/pdf': ('.pdf',),
+    'application/zip': ('.zip', '.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp'),
+    'application/x-ole-storage': ('.doc', '.xls', '.ppt'),
+}
+
+#limites por campo de las vistas que reciben archivos
+REGLAS_ARTICULO = {
+    'imagen_portada': (settings.MEDIA_MAX_IMAGEN_MB * MB, IMAGENES),
+    'imagen_thumbnail': (settings.MEDIA_MAX_IMAGEN_MB * MB, IMAGENES),
+    'archivo_adjunto': (settings.MEDIA_MAX_ADJUNTO_MB * MB, DOCUMENTOS),
+}
+REGLAS_IMAGEN = {
+    'imagen': (settings.MEDIA_MAX_IMAGEN_MB * MB, IMAGENES),
+}
+
+
+def extension_para(nombre, tipo):
+    """extension del nombre si corresponde al tipo detectado; si no, la del tipo (nunca la que elige el cliente)"""
+    extension = os.path.splitext(nombre or '')[1].lower()
+    validas = EXTENSIONES.get(tipo, ())
+    if extension in validas:
+        return extension
+    return validas[0] if validas else ''
+
+
+def detectar_tipo(cabecera):
+    """tipo real del archivo segun sus primeros bytes (None si no es un formato conocido)"""
+    for desplazamiento, firma, tipo in FIRMAS:
+        if cabecera[desplazamiento:desplazamiento + len(firma)] == firma:
+            if tipo == 'image/webp' and not cabecera.startswith(b'RIFF'):
+                continue
+            return tipo
+    return None
+
+
+class ArchivoSubidoStreaming(TemporaryUploadedFile):
+    """temporal creado dentro de MEDIA_ROOT para que guardarlo sea un rename (sin volver a copiar)"""
+
+    def __init__(self, name, content_type, size, charset, content_type_extra=None):
+        carpeta = settings.MEDIA_SUBIDAS_TMP
+        os.makedirs(carpeta, exist_ok=True)
+        #sin la extension del cliente: el temporal vive dentro de MEDIA_ROOT
+        archivo = tempfile.NamedTemporaryFile(suffix='.upload', dir=carpeta)
+        UploadedFile.__init__(self, archivo, name, content_type, size, charset, content_type_extra)
+        #lo usa AlmacenamientoContenido para no volver a leer el archivo
+        self.sha256 = None
+
+
+class ManejadorSubidaStreaming(FileUploadHandler):
+    """upload handler con limites por campo: {campo: (max_bytes, tipos)}. ante el primer exceso corta la lectura
+    del cuerpo (StopUpload) y deja el motivo en .error = (status, mensaje)"""
+    chunk_size = 64 * 1024
+
+    def __init__(self, request=None, reglas=None):
+        super().__init__(request)
+        self.reglas = reglas or {}
+        self.error = None
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        #si el cuerpo completo ya supera la suma de los limites se rechaza sin leer nada
+        limite = sum(max_bytes for max_bytes, _ in self.reglas.values()) + MB
+        if content_length and content_length > limite:
+            self.error = (413, f'La subida supera el máximo permitido ({limite // MB} MB)')
+            #cuerpo "procesado" sin datos; el resto de la peticion no se lee
+            return QueryDict(encoding=encoding), MultiValueDict()
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        if field_name not in self.reglas:
+            self._rechazar(400, f'Campo de archivo no permitido: {field_name}')
+        self.max_bytes, self.tipos = self.reglas[field_name]
+        self.file = ArchivoSubidoStreaming(file_name, content_type, 0, charset, content_type_extra)
+        self.hasher = hashlib.sha256()
+        self.cabecera = b''
+        self.tipo = None
+        self.tamano = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.tamano += len(raw_data)
+        if self.tamano > self.max_bytes:
+            self._rechazar(413, f'El archivo "{self.file_name}" supera el máximo de {self.max_bytes // MB} MB')
+        if self.tipo is None:
+            self.cabecera += raw_data[:LARGO_CABECERA - len(self.cabecera)]
+            if len(self.cabecera) >= LARGO_CABECERA:
+                self._validar_tipo()
+        self.hasher.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.tipo is None:
+            #archivo mas corto que la cabecera
+            self._validar_tipo()
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.content_type = self.tipo
+        #un png subido como "x.html" se guarda como .png
+        base = os.path.splitext(self.file_name)[0]
+        self.file.name = base + extension_para(self.file_name, self.tipo)
+        self.file.sha256 = self.hasher.hexdigest()
+        return self.file
+
+    def upload_interrupted(self):
+        self._descartar()
+
+    def _validar_tipo(self):
+        self.tipo = detectar_tipo(self.cabecera)
+        if self.tipo not in self.tipos:
+            self._rechazar(415, f'Tipo de archivo no permitido: "{self.file_name}"')
+
+    def _descartar(self):
+        #el temporal se borra al cerrarse (django vuelve a cerrar .file al cortar la subida)
+        if hasattr(self, 'file'):
+            self.file.close()
+
+    def _rechazar(self, status, mensaje):
+        self.error = (status, mensaje)
+        self._descartar()
+        raise StopUpload(connection_reset=True)
+
+
+def subida_streaming(reglas, redireccion=None):
+    """decorador de vistas con archivos: instala el manejador antes de que csrf lea el cuerpo.
+    si la subida se rechaza responde json con el status, o con un mensaje y redirect si se indica redireccion"""
+    def decorador(vista):
+        #el rechazo no tiene efectos, por eso se responde antes de validar csrf
+        protegida = vista if getattr(vista, 'csrf_exempt', False) else csrf_protect(vista)
+
+        @wraps(vista)
+        @csrf_exempt
+        def envoltura(request, *args, **kwargs):
+            manejador = ManejadorSubidaStreaming(request, reglas)
+            request.upload_handlers = [manejador]
+            request.FILES  # parsea el cuerpo con el manejador
+            if manejador.error:
+                status, mensaje = manejador.error
+                if redireccion:
+                    messages.error(request, mensaje)
+                    return redirect(redireccion)
+                return JsonResponse({'success': False, 'message': mensaje}, status=status)
+            return protegida(request, *args, **kwargs)
+        return envoltura
+    return decorador
@@ -1,22 +1,30 @@
 #-*- coding: utf-8 -*-
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, NotificationEvent
 
-@admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
-    list_display = ['titulo', 'tipo', 'usuario', 'leido', 'fecha_creacion']
-    list_filter = ['tipo', 'leido', 'fecha_creacion']
-    search_fields = ['titulo', 'mensaje', 'usuario__email']
+class NotificationInline(admin.TabularInline):
+    model = Notification
+    fields = ['usuario', 'leido', 'fecha_creacion']
+    readonly_fields = ['usuario', 'fecha_creacion']
+    extra = 0
+    can_delete = False
+
+@admin.register(NotificationEvent)
+class NotificationEventAdmin(admin.ModelAdmin):
+    list_display = ['titulo', 'tipo', 'fecha_creacion']
+    list_filter = ['tipo', 'fecha_creacion']
+    search_fields = ['titulo', 'mensaje']
     readonly_fields = ['fecha_creacion']
     date_hierarchy = 'fecha_creacion'
     ordering = ['-fecha_creacion']
+    inlines = [NotificationInline]
 
     fieldsets = (
         ('Informacion Basica', {
-            'fields': ('usuario', 'tipo', 'titulo', 'mensaje')
+            'fields': ('tipo', 'titulo', 'mensaje')
         }),
-        ('Estado y Enlace', {
-            'fields': ('leido', 'enlace', 'fecha_creacion')
+        ('Enlace', {
+            'fields': ('enlace', 'fecha_creacion')
         }),
         ('Referencia', {
             'fields': ('content_type', 'object_id'),
@@ -27,3 +35,26 @@ class NotificationAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         #las notificaciones se crean automaticamente con signals
         return False
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ['titulo', 'tipo', 'usuario', 'leido', 'fecha_creacion']
+    list_filter = ['evento__tipo', 'leido', 'fecha_creacion']
+    list_select_related = ['evento', 'usuario']
+    search_fields = ['evento__titulo', 'evento__mensaje', 'usuario__email']
+    readonly_fields = ['evento', 'fecha_creacion']
+    date_hierarchy = 'fecha_creacion'
+    ordering = ['-fecha_creacion']
+
+    fieldsets = (
+        ('Informacion Basica', {
+            'fields': ('usuario', 'evento')
+        }),
+        ('Estado', {
+            'fields': ('leido', 'fecha_creacion')
+        }),
+    )
+
+    def has_add_permission(self, request):
+        #las notificaciones se crean automaticamente con signals
+        return False
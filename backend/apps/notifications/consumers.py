@@ -0,0 +1,31 @@
+import json
+from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.db import database_sync_to_async
+from .contador import grupo_usuario, obtener_no_leidas
+
+class NotificationConsumer(AsyncWebsocketConsumer):
+    """envia el contador de no leidas al staff conectado, sin polling"""
+
+    async def connect(self):
+        user = self.scope['user']
+        if not user.is_authenticated or not user.is_staff:
+            await self.close()
+            return
+
+        self.group_name = grupo_usuario(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+        #estado inicial al conectar
+        no_leidas = await database_sync_to_async(obtener_no_leidas)(user.id)
+        await self.contador_notificaciones({'no_leidas': no_leidas})
+
+    async def disconnect(self, close_code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def contador_notificaciones(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'contador',
+            'no_leidas': event.get('no_leidas', 0)
+        }))
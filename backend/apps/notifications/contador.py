@@ -0,0 +1,77 @@
+#-*- coding: utf-8 -*-
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+def clave_contador(usuario_id):
+    return f'notificaciones:no_leidas:{usuario_id}'
+
+
+def grupo_usuario(usuario_id):
+    """grupo de channels donde escuchan las sesiones de un usuario"""
+    return f'notificaciones_{usuario_id}'
+
+
+def obtener_no_leidas(usuario_id):
+    """contador de no leidas desde cache; solo cuenta en la base si no esta cargado"""
+    clave = clave_contador(usuario_id)
+    valor = cache.get(clave)
+    if valor is None:
+        valor = Notification.objects.filter(usuario_id=usuario_id, leido=False).count()
+        cache.add(clave, valor, settings.NOTIFICATIONS_COUNTER_TTL)
+    return valor
+
+
+def _publicar(usuario_id, valor):
+    """envia el contador actualizado a las conexiones websocket del usuario"""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(
+            grupo_usuario(usuario_id),
+            {'type': 'contador_notificaciones', 'no_leidas': valor}
+        )
+    except Exception:
+        logger.exception("Error al publicar contador de notificaciones para %s", usuario_id)
+
+
+def _aplicar_ajuste(usuario_ids, delta):
+    for usuario_id in usuario_ids:
+        clave = clave_contador(usuario_id)
+        try:
+            valor = cache.incr(clave, delta)
+        except ValueError:
+            #la clave no esta en cache, se recalcula una sola vez
+            valor = obtener_no_leidas(usuario_id)
+        if valor < 0:
+            #un ajuste concurrente dejo el contador inconsistente, se recalcula
+            cache.delete(clave)
+            valor = obtener_no_leidas(usuario_id)
+        _publicar(usuario_id, valor)
+
+
+def ajustar_no_leidas(usuario_ids, delta):
+    """suma delta al contador de cada usuario y lo publica una vez confirmada la transaccion"""
+    usuario_ids = list(usuario_ids)
+    if not usuario_ids or not delta:
+        return
+    transaction.on_commit(lambda: _aplicar_ajuste(usuario_ids, delta))
+
+
+def reiniciar_no_leidas(usuario_id):
+    """deja el contador en cero (tras marcar todas como leidas)"""
+    def _reiniciar():
+        cache.set(clave_contador(usuario_id), 0, settings.NOTIFICATIONS_COUNTER_TTL)
+        _publicar(usuario_id, 0)
+
+    transaction.on_commit(_reiniciar)
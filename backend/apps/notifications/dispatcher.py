@@ -0,0 +1,150 @@
+#-*- coding: utf-8 -*-
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+
+from .contador import ajustar_no_leidas
+from .models import Notification, NotificationEvent
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+#pool compartido para diferir las inserciones fuera del request (se crea bajo demanda)
+_executor = None
+
+#buffer de coalescencia por proceso: clave -> {'datos', 'cambios', 'timer'}
+_pendientes = {}
+_pendientes_lock = threading.Lock()
+
+
+def _get_executor():
+    """retorna el pool de hilos usado para las notificaciones diferidas"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.NOTIFICATIONS_WORKERS,
+            thread_name_prefix='notificaciones',
+        )
+    return _executor
+
+
+def insertar_notificaciones_staff(datos, excluir_ids=()):
+    """crea un unico evento y las filas de lectura por destinatario con bulk_create"""
+    usuarios_ids = list(
+        User.objects.filter(is_staff=True)
+        .exclude(id__in=excluir_ids)
+        .values_list('id', flat=True)
+    )
+    if not usuarios_ids:
+        return []
+    with transaction.atomic():
+        evento = NotificationEvent.objects.create(**datos)
+        notificaciones = [Notification(evento=evento, usuario_id=usuario_id) for usuario_id in usuarios_ids]
+        creadas = Notification.objects.bulk_create(
+            notificaciones,
+            batch_size=settings.NOTIFICATIONS_BATCH_SIZE,
+        )
+        ajustar_no_leidas(usuarios_ids, 1)
+    return creadas
+
+
+def _insertar_seguro(datos, excluir_ids):
+    """el contenido ya fue confirmado, un error aqui solo se registra"""
+    try:
+        insertar_notificaciones_staff(datos, excluir_ids)
+    except Exception:
+        logger.exception("Error al crear notificaciones para staff (%s)", datos.get('tipo'))
+
+
+def _insertar_en_worker(datos, excluir_ids):
+    """ejecuta la insercion en un hilo del pool y libera su conexion al terminar"""
+    try:
+        _insertar_seguro(datos, excluir_ids)
+    finally:
+        connections.close_all()
+
+
+def despachar_para_staff(tipo, titulo, mensaje, enlace=None, content_type=None,
+                         object_id=None, excluir_ids=()):
+    """encola notificaciones para todo el staff una vez confirmada la transaccion actual"""
+    datos = {
+        'tipo': tipo,
+        'titulo': titulo,
+        'mensaje': mensaje,
+        'enlace': enlace,
+        'content_type': content_type,
+        'object_id': object_id,
+    }
+    excluir_ids = tuple(excluir_ids)
+
+    def _despachar():
+        if settings.NOTIFICATIONS_ASYNC:
+            _get_executor().submit(_insertar_en_worker, datos, excluir_ids)
+        else:
+            _insertar_seguro(datos, excluir_ids)
+
+    #si no hay transaccion abierta on_commit ejecuta de inmediato
+    transaction.on_commit(_despachar)
+
+
+def _vaciar_pendiente(clave):
+    """emite el evento acumulado para la clave al cerrar su ventana"""
+    with _pendientes_lock:
+        pendiente = _pendientes.pop(clave, None)
+    if pendiente is None:
+        return
+
+    datos = dict(pendiente['datos'])
+    cambios = pendiente['cambios']
+    if cambios > 1:
+        datos['mensaje'] = f"{datos['mensaje']} (y {cambios - 1} cambio{'s' if cambios > 2 else ''} mas)"
+    _insertar_en_worker(datos, ())
+
+
+def coalescer_para_staff(tipo, titulo, mensaje, enlace=None, content_type=None,
+                         object_id=None, clave=None):
+    """agrupa las notificaciones con la misma clave dentro de una ventana en un unico evento"""
+    ventana = settings.NOTIFICATIONS_COALESCE_WINDOW
+    if ventana <= 0:
+        despachar_para_staff(tipo, titulo, mensaje, enlace, content_type, object_id)
+        return
+
+    datos = {
+        'tipo': tipo,
+        'titulo': titulo,
+        'mensaje': mensaje,
+        'enlace': enlace,
+        'content_type': content_type,
+        'object_id': object_id,
+    }
+    clave = clave or (content_type, object_id)
+
+    def _acumular():
+        with _pendientes_lock:
+            pendiente = _pendientes.get(clave)
+            if pendiente is not None:
+                #se conserva el primer mensaje (p.ej. la creacion) y se cuentan los demas
+                pendiente['cambios'] += 1
+                return
+            timer = threading.Timer(ventana, _vaciar_pendiente, args=(clave,))
+            #no retiene el cierre del proceso; _vaciar_al_salir emite lo pendiente
+            timer.daemon = True
+            _pendientes[clave] = {'datos': datos, 'cambios': 1, 'timer': timer}
+        timer.start()
+
+    transaction.on_commit(_acumular)
+
+
+@atexit.register
+def _vaciar_al_salir():
+    """no perder los eventos agrupados cuya ventana aun no cerro al detener el proceso de forma ordenada"""
+    with _pendientes_lock:
+        timers = [(clave, pendiente['timer']) for clave, pendiente in _pendientes.items()]
+    for clave, timer in timers:
+        timer.cancel()
+        _vaciar_pendiente(clave)
@@ -0,0 +1,38 @@
+#generated by django 5.2.7 on 2026-10-19 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_alter_notification_tipo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('contacto', 'Mensaje de Contacto'), ('banda', 'Banda Emergente'), ('articulo', 'Articulo Nuevo'), ('programa', 'Cambio en Programacion'), ('suscripcion', 'Nueva Suscripcion'), ('publicidad', 'Solicitud de Publicidad')], max_length=20)),
+                ('titulo', models.CharField(max_length=255)),
+                ('mensaje', models.TextField()),
+                ('enlace', models.CharField(blank=True, max_length=255, null=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('content_type', models.CharField(blank=True, max_length=50, null=True)),
+                ('object_id', models.PositiveIntegerField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Evento de Notificacion',
+                'verbose_name_plural': 'Eventos de Notificacion',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['content_type', 'object_id'], name='notificatio_content_966d57_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='evento',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='destinatarios', to='notifications.notificationevent'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+#generated by django 5.2.7 on 2026-10-19 10:12
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Min, OuterRef, Subquery
+from django.db.models.functions import TruncMinute
+
+CAMPOS_EVENTO = ('tipo', 'titulo', 'mensaje', 'enlace', 'content_type', 'object_id')
+
+
+def agrupar_en_eventos(apps, schema_editor):
+    """crea un evento por cada contenido distinto dentro del mismo minuto y enlaza las filas por destinatario.
+    el reparto a todo el staff se creaba en el mismo instante; el mismo aviso repetido otro dia es otro evento"""
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationEvent = apps.get_model('notifications', 'NotificationEvent')
+
+    grupos = (
+        Notification.objects.filter(evento__isnull=True)
+        .annotate(minuto=TruncMinute('fecha_creacion'))
+        .values(*CAMPOS_EVENTO, 'minuto')
+        .annotate(primera=Min('fecha_creacion'))
+        .order_by()
+    )
+    for grupo in list(grupos):
+        primera = grupo.pop('primera')
+        minuto = grupo.pop('minuto')
+        evento = NotificationEvent.objects.create(**grupo)
+        #auto_now_add ignora el valor inicial, se corrige con update
+        NotificationEvent.objects.filter(id=evento.id).update(fecha_creacion=primera)
+        Notification.objects.filter(
+            evento__isnull=True, fecha_creacion__gte=minuto, fecha_creacion__lt=minuto + timedelta(minutes=1), **grupo
+        ).update(evento=evento)
+
+
+def separar_eventos(apps, schema_editor):
+    """copia el contenido de cada evento a sus filas por destinatario y borra los eventos"""
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationEvent = apps.get_model('notifications', 'NotificationEvent')
+
+    evento = NotificationEvent.objects.filter(id=OuterRef('evento_id'))
+    Notification.objects.filter(evento__isnull=False).update(
+        **{campo: Subquery(evento.values(campo)[:1]) for campo in CAMPOS_EVENTO}
+    )
+    Notification.objects.update(evento=None)
+    NotificationEvent.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_notificationevent'),
+    ]
+
+    operations = [
+        #nulables mientras conviven con los eventos: al revertir 0005 se vuelven a crear vacias y separar_eventos las completa
+        migrations.AlterField(
+            model_name='notification',
+            name='tipo',
+            field=models.CharField(choices=[('contacto', 'Mensaje de Contacto'), ('banda', 'Banda Emergente'), ('articulo', 'Articulo Nuevo'), ('programa', 'Cambio en Programacion'), ('suscripcion', 'Nueva Suscripcion'), ('publicidad', 'Solicitud de Publicidad')], max_length=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='titulo',
+            field=models.CharField(max_length=255, null=True),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='mensaje',
+            field=models.TextField(null=True),
+        ),
+        migrations.RunPython(agrupar_en_eventos, separar_eventos),
+    ]
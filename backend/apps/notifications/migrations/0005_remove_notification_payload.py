@@ -0,0 +1,43 @@
+#generated by django 5.2.7 on 2026-10-19 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_agrupar_notificaciones_en_eventos'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='notification',
+            name='content_type',
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='enlace',
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='mensaje',
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='object_id',
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='tipo',
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='titulo',
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='evento',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='destinatarios', to='notifications.notificationevent'),
+        ),
+    ]
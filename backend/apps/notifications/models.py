@@ -2,8 +2,8 @@
 from django.db import models
 from django.conf import settings
 
-class Notification(models.Model):
-    """modelo para notificaciones del sistema"""
+class NotificationEvent(models.Model):
+    """contenido compartido de una notificacion, una sola fila por evento"""
 
     TIPO_CHOICES = [
         ('contacto', 'Mensaje de Contacto'),
@@ -14,22 +14,51 @@ class Notification(models.Model):
         ('publicidad', 'Solicitud de Publicidad'),
     ]
 
-    usuario = models.ForeignKey(
-        settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE,
-        related_name='notificaciones'
-    )
     tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
     titulo = models.CharField(max_length=255)
     mensaje = models.TextField()
-    leido = models.BooleanField(default=False)
-    fecha_creacion = models.DateTimeField(auto_now_add=True)
     enlace = models.CharField(max_length=255, blank=True, null=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
 
     #referencia opcional al objeto que genero la notificacion
     content_type = models.CharField(max_length=50, blank=True, null=True)
     object_id = models.PositiveIntegerField(blank=True, null=True)
 
+    class Meta:
+        verbose_name = 'Evento de Notificacion'
+        verbose_name_plural = 'Eventos de Notificacion'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['content_type', 'object_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} - {self.titulo}"
+
+    @classmethod
+    def eliminar_huerfanos(cls, evento_ids):
+        """elimina los eventos indicados que ya no tienen destinatarios"""
+        return cls.objects.filter(id__in=evento_ids, destinatarios__isnull=True).delete()
+
+
+class Notification(models.Model):
+    """estado de lectura por destinatario; el contenido vive en NotificationEvent"""
+
+    TIPO_CHOICES = NotificationEvent.TIPO_CHOICES
+
+    evento = models.ForeignKey(
+        NotificationEvent,
+        on_delete=models.CASCADE,
+        related_name='destinatarios'
+    )
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='notificaciones'
+    )
+    leido = models.BooleanField(default=False)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
     class Meta:
         verbose_name = 'Notificacion'
         verbose_name_plural = 'Notificaciones'
@@ -42,7 +71,57 @@ class Notification(models.Model):
     def __str__(self):
         return f"{self.tipo} - {self.titulo} ({'Leida' if self.leido else 'No leida'})"
 
+    #accesos de compatibilidad al contenido compartido del evento
+    @property
+    def tipo(self):
+        return self.evento.tipo
+
+    @property
+    def titulo(self):
+        return self.evento.titulo
+
+    @property
+    def mensaje(self):
+        return self.evento.mensaje
+
+    @property
+    def enlace(self):
+        return self.evento.enlace
+
+    @property
+    def content_type(self):
+        return self.evento.content_type
+
+    @property
+    def object_id(self):
+        return self.evento.object_id
+
+    def get_tipo_display(self):
+        return self.evento.get_tipo_display()
+
+    @classmethod
+    def crear_para_usuario(cls, usuario, tipo, titulo, mensaje, enlace=None, content_type=None, object_id=None):
+        """crea el evento y la fila de lectura para un unico destinatario"""
+        evento = NotificationEvent.objects.create(
+            tipo=tipo,
+            titulo=titulo,
+            mensaje=mensaje,
+            enlace=enlace,
+            content_type=content_type,
+            object_id=object_id
+        )
+        notificacion = cls.objects.create(evento=evento, usuario=usuario)
+
+        from .contador import ajustar_no_leidas
+        ajustar_no_leidas([notificacion.usuario_id], 1)
+        return notificacion
+
     def marcar_como_leido(self):
         """marca la notificacion como leida"""
+        if self.leido:
+            return
         self.leido = True
         self.save(update_fields=['leido'])
+
+        from .contador import ajustar_no_leidas
+        ajustar_no_leidas([self.usuario_id], -1)
@@ -1,11 +1,17 @@
 #-*- coding: utf-8 -*-
 from rest_framework import serializers
-from .models import Notification
+from .models import Notification, NotificationEvent
 
 class NotificationSerializer(serializers.ModelSerializer):
     """serializer para notificaciones"""
 
-    tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
+    tipo = serializers.CharField(source='evento.tipo', read_only=True)
+    tipo_display = serializers.CharField(source='evento.get_tipo_display', read_only=True)
+    titulo = serializers.CharField(source='evento.titulo', read_only=True)
+    mensaje = serializers.CharField(source='evento.mensaje', read_only=True)
+    enlace = serializers.CharField(source='evento.enlace', read_only=True)
+    content_type = serializers.CharField(source='evento.content_type', read_only=True)
+    object_id = serializers.IntegerField(source='evento.object_id', read_only=True)
     tiempo_transcurrido = serializers.SerializerMethodField()
 
     class Meta:
@@ -23,7 +29,7 @@ class NotificationSerializer(serializers.ModelSerializer):
             'object_id',
             'tiempo_transcurrido'
         ]
-        read_only_fields = ['id', 'fecha_creacion', 'tipo_display', 'tiempo_transcurrido']
+        read_only_fields = ['id', 'fecha_creacion', 'tiempo_transcurrido']
 
     def get_tiempo_transcurrido(self, obj):
         """retorna tiempo transcurrido en formato legible"""
@@ -48,7 +54,14 @@ class NotificationSerializer(serializers.ModelSerializer):
             return obj.fecha_creacion.strftime("%d/%m/%Y %H:%M")
 
 class NotificationCreateSerializer(serializers.ModelSerializer):
-    """serializer para crear notificaciones"""
+    """serializer para crear notificaciones (evento + destinatario)"""
+
+    tipo = serializers.ChoiceField(choices=NotificationEvent.TIPO_CHOICES)
+    titulo = serializers.CharField(max_length=255)
+    mensaje = serializers.CharField()
+    enlace = serializers.CharField(max_length=255, required=False, allow_blank=True, allow_null=True)
+    content_type = serializers.CharField(max_length=50, required=False, allow_blank=True, allow_null=True)
+    object_id = serializers.IntegerField(min_value=0, required=False, allow_null=True)
 
     class Meta:
         model = Notification
@@ -61,3 +74,7 @@ class NotificationCreateSerializer(serializers.ModelSerializer):
             'content_type',
             'object_id'
         ]
+
+    def create(self, validated_data):
+        usuario = validated_data.pop('usuario')
+        return Notification.crear_para_usuario(usuario, **validated_data)
@@ -1,29 +1,19 @@
 #-*- coding: utf-8 -*-
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.contrib.auth import get_user_model
-from .models import Notification
+from .dispatcher import coalescer_para_staff, despachar_para_staff
 
-User = get_user_model()
-
-def crear_notificacion_para_staff(tipo, titulo, mensaje, enlace=None, content_type=None, object_id=None):
-    """crea notificaciones para todos los usuarios staff"""
-    usuarios_staff = User.objects.filter(is_staff=True)
-
-    notificaciones = []
-    for usuario in usuarios_staff:
-        notificacion = Notification.objects.create(
-            usuario=usuario,
-            tipo=tipo,
-            titulo=titulo,
-            mensaje=mensaje,
-            enlace=enlace,
-            content_type=content_type,
-            object_id=object_id
-        )
-        notificaciones.append(notificacion)
-
-    return notificaciones
+def crear_notificacion_para_staff(tipo, titulo, mensaje, enlace=None, content_type=None, object_id=None, excluir_ids=()):
+    """encola notificaciones para los usuarios staff (bulk_create tras el commit)"""
+    despachar_para_staff(
+        tipo=tipo,
+        titulo=titulo,
+        mensaje=mensaje,
+        enlace=enlace,
+        content_type=content_type,
+        object_id=object_id,
+        excluir_ids=excluir_ids
+    )
 
 #signal para contactos
 @receiver(post_save, sender='contact.Contacto')
@@ -96,18 +86,15 @@ def notificar_nuevo_articulo(sender, instance, created, **kwargs):
         enlace = f"/dashboard/articulos/?id={instance.id}"
 
         #notificar a todos los staff excepto al autor
-        usuarios_staff = User.objects.filter(is_staff=True).exclude(id=instance.autor.id)
-
-        for usuario in usuarios_staff:
-            Notification.objects.create(
-                usuario=usuario,
-                tipo='articulo',
-                titulo=titulo,
-                mensaje=mensaje,
-                enlace=enlace,
-                content_type='articulo',
-                object_id=instance.id
-            )
+        crear_notificacion_para_staff(
+            tipo='articulo',
+            titulo=titulo,
+            mensaje=mensaje,
+            enlace=enlace,
+            content_type='articulo',
+            object_id=instance.id,
+            excluir_ids=[instance.autor_id]
+        )
 
 #signal para programas
 @receiver(post_save, sender='radio.Programa')
@@ -122,7 +109,8 @@ def notificar_cambio_programa(sender, instance, created, **kwargs):
 
     enlace = f"/dashboard/programas/?id={instance.id}"
 
-    crear_notificacion_para_staff(
+    #se guarda en cada edicion, por eso se agrupan los cambios seguidos del mismo programa
+    coalescer_para_staff(
         tipo='programa',
         titulo=titulo,
         mensaje=mensaje,
@@ -144,13 +132,15 @@ def notificar_cambio_horario(sender, instance, created, **kwargs):
 
     enlace = f"/dashboard/radio/?programa={instance.programa.id}"
 
-    crear_notificacion_para_staff(
+    #los horarios se agrupan con su programa: editar la semana completa genera un solo evento
+    coalescer_para_staff(
         tipo='programa',
         titulo=titulo,
         mensaje=mensaje,
         enlace=enlace,
         content_type='horario',
-        object_id=instance.id
+        object_id=instance.id,
+        clave=('programa', instance.programa_id)
     )
 
 #signal para suscripciones
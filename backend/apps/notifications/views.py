@@ -4,13 +4,14 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.db.models import Q
-from .models import Notification
+from .contador import ajustar_no_leidas, obtener_no_leidas, reiniciar_no_leidas
+from .models import Notification, NotificationEvent
 from .serializers import NotificationSerializer, NotificationCreateSerializer
 
 class NotificationViewSet(viewsets.ModelViewSet):
     """viewset para notificaciones"""
 
-    queryset = Notification.objects.all()
+    queryset = Notification.objects.select_related('evento')
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
 
@@ -24,6 +25,20 @@ class NotificationViewSet(viewsets.ModelViewSet):
         user = self.request.user
         return self.queryset.filter(usuario=user)
 
+    def perform_update(self, serializer):
+        """el contador de no leidas sigue a los cambios de leido hechos con PUT/PATCH"""
+        leido_antes = serializer.instance.leido
+        notificacion = serializer.save()
+        if notificacion.leido != leido_antes:
+            ajustar_no_leidas([notificacion.usuario_id], -1 if notificacion.leido else 1)
+
+    def perform_destroy(self, instance):
+        """borra la notificacion, su evento si quedo sin destinatarios y la descuenta si no estaba leida"""
+        instance.delete()
+        NotificationEvent.eliminar_huerfanos([instance.evento_id])
+        if not instance.leido:
+            ajustar_no_leidas([instance.usuario_id], -1)
+
     @action(detail=False, methods=['get'])
     def no_leidas(self, request):
         """obtener notificaciones no leidas"""
@@ -40,9 +55,8 @@ class NotificationViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def contador(self, request):
-        """obtener contador de notificaciones no leidas"""
-        count = self.get_queryset().filter(leido=False).count()
-        return Response({'no_leidas': count})
+        """obtener contador de notificaciones no leidas (desde cache)"""
+        return Response({'no_leidas': obtener_no_leidas(request.user.id)})
 
     @action(detail=True, methods=['post'])
     def marcar_leido(self, request, pk=None):
@@ -56,6 +70,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def marcar_todas_leidas(self, request):
         """marcar todas las notificaciones como leidas"""
         count = self.get_queryset().filter(leido=False).update(leido=True)
+        reiniciar_no_leidas(request.user.id)
         return Response({
             'message': f'{count} notificaciones marcadas como leidas',
             'count': count
@@ -64,14 +79,16 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['delete'])
     def eliminar(self, request, pk=None):
         """eliminar una notificacion"""
-        notificacion = self.get_object()
-        notificacion.delete()
+        self.perform_destroy(self.get_object())
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=['delete'])
     def eliminar_leidas(self, request):
         """eliminar todas las notificaciones leidas"""
-        count, _ = self.get_queryset().filter(leido=True).delete()
+        leidas = self.get_queryset().filter(leido=True)
+        evento_ids = list(leidas.values_list('evento_id', flat=True))
+        count, _ = leidas.delete()
+        NotificationEvent.eliminar_huerfanos(evento_ids)
         return Response({
             'message': f'{count} notificaciones eliminadas',
             'count': count
@@ -84,7 +101,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
         if not tipo:
             return Response({'error': 'Parametro "tipo" requerido'}, status=status.HTTP_400_BAD_REQUEST)
 
-        notificaciones = self.get_queryset().filter(tipo=tipo)
+        notificaciones = self.get_queryset().filter(evento__tipo=tipo)
 
         page = self.paginate_queryset(notificaciones)
         if page is not None:
@@ -1,6 +1,6 @@
 #api views para publicidad
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
@@ -117,6 +117,8 @@ class SolicitudPublicidadViewSet(viewsets.ModelViewSet):
             impresiones=0,
             clics=0,
             archivo_media=None,
+            item_origen=principal,
+            ubicacion=principal.ubicacion,
         )
 
         #actualizar solicitud como aprobada y enlazar publicacion
@@ -237,3 +239,32 @@ class PublicidadWebCampaignViewSet(viewsets.ModelViewSet):
                 setattr(config, campo, request.data[campo])
         config.save()
         return Response(PublicidadSerializer(pub).data)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def decidir_anuncio(request):
+    """elige la campaña a mostrar en una ubicacion (?ubicacion=<id o nombre>) para el visitante actual.
+    ponderada por presupuesto diario y ritmo de entrega, con tope diario de vistas por visitante"""
+    from .. import decision, eventos
+
+    ubicacion = (request.query_params.get('ubicacion') or '').strip()
+    if not ubicacion:
+        return Response({'success': False, 'message': 'Falta el parámetro ubicacion'}, status=status.HTTP_400_BAD_REQUEST)
+
+    entrada = decision.decidir(ubicacion, eventos.visitante_de(request))
+    item = None
+    if entrada is not None:
+        item = {
+            'id': entrada['id'],
+            'media_url': request.build_absolute_uri('/')[:-1] + entrada['ruta_proxy'],
+            'url_destino': entrada['url_destino'],
+            'formato': entrada['formato'],
+            'fecha_inicio': entrada['fecha_inicio'],
+            'fecha_fin': entrada['fecha_fin'],
+            'ubicacion': entrada['ubicacion'],
+        }
+    response = Response({'success': True, 'item': item})
+    #cada peticion es una decision distinta
+    response['Cache-Control'] = 'no-store'
+    return response
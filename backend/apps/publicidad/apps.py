@@ -4,3 +4,7 @@ class PublicidadConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.publicidad'
     verbose_name = 'Publicidad'
+
+    def ready(self):
+        """importar señales cuando la aplicación esté lista"""
+        import apps.publicidad.signals  # noqa
@@ -0,0 +1,141 @@
+#-*- coding: utf-8 -*-
+"""contadores de impresiones y clics: se acumulan en memoria repartidos en shards y se escriben en bloque
+con un update F() por campaña (totales) y una fila por campaña y hora (estadisticas), sin bloquear
+la fila de PublicidadWeb en cada evento"""
+import atexit
+import itertools
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+
+from . import estadisticas
+from .models import PublicidadWeb
+
+logger = logging.getLogger(__name__)
+
+
+class _Shard:
+    def __init__(self):
+        self.lock = threading.Lock()
+        #(campania_id, hora, campo) -> eventos; (campania_id, hora) -> visitantes distintos
+        self.conteos = Counter()
+        self.visitantes = defaultdict(set)
+
+
+#cada hilo escribe en su shard; los hilos de un mismo proceso casi nunca compiten por el mismo lock
+_shards = [_Shard() for _ in range(max(1, settings.PUBLICIDAD_CONTADORES_SHARDS))]
+#el shard se asigna por turno al primer evento de cada hilo: get_ident() son direcciones alineadas
+#y su modulo caeria siempre en el mismo shard
+_turnos = itertools.count()
+_local = threading.local()
+_timer = None
+_timer_lock = threading.Lock()
+
+
+def shard_del_hilo():
+    """indice del shard del hilo actual"""
+    indice = getattr(_local, 'shard', None)
+    if indice is None:
+        indice = _local.shard = next(_turnos) % len(_shards)
+    return indice
+
+
+def registrar(campania_id, campo, visitante=None):
+    """suma un evento ('impresiones' o 'clics') en memoria; la escritura la hace vaciar_contadores en segundo plano.
+    visitante: identificador anonimo para estimar visitantes unicos por hora"""
+    registrar_lote([(campania_id, campo, None)], visitante)
+
+
+def registrar_lote(eventos, visitante=None):
+    """suma [(campania_id, campo, instante)] de un mismo visitante tomando el lock una sola vez.
+    instante (epoch) ubica el evento en su hora; None = ahora"""
+    global _timer
+    ahora = time.time()
+    shard = _shards[shard_del_hilo()]
+    with shard.lock:
+        for campania_id, campo, instante in eventos:
+            hora = estadisticas.hora_de(instante or ahora)
+            shard.conteos[(campania_id, hora, campo)] += 1
+            if visitante is not None:
+                shard.visitantes[(campania_id, hora)].add(visitante)
+
+    intervalo = settings.PUBLICIDAD_CONTADORES_FLUSH_INTERVAL
+    if intervalo <= 0:
+        vaciar_contadores()
+        return
+    if _timer is None:
+        with _timer_lock:
+            programar = _timer is None
+            if programar:
+                _timer = threading.Timer(intervalo, _vaciar_en_hilo)
+                _timer.daemon = True
+        if programar:
+            _timer.start()
+
+
+def _vaciar_en_hilo():
+    try:
+        vaciar_contadores()
+    except Exception:
+        logger.exception("Error al guardar los contadores de publicidad")
+    finally:
+        connections.close_all()
+
+
+def vaciar_contadores():
+    """escribe los eventos acumulados: un update por campaña y una fila por campaña y hora.
+    retorna cuantos eventos se escribieron"""
+    global _timer
+    with _timer_lock:
+        _timer = None
+    conteos = Counter()
+    visitantes = defaultdict(set)
+    for shard in _shards:
+        with shard.lock:
+            conteos_shard, shard.conteos = shard.conteos, Counter()
+            visitantes_shard, shard.visitantes = shard.visitantes, defaultdict(set)
+        conteos.update(conteos_shard)
+        for clave, conjunto in visitantes_shard.items():
+            visitantes[clave] |= conjunto
+    if not conteos:
+        return 0
+
+    totales = defaultdict(Counter)
+    por_hora = {}
+    for (campania_id, hora, campo), cantidad in conteos.items():
+        totales[campania_id][campo] += cantidad
+        impresiones, clics, _ = por_hora.get((campania_id, hora), (0, 0, None))
+        if campo == 'impresiones':
+            impresiones += cantidad
+        else:
+            clics += cantidad
+        por_hora[(campania_id, hora)] = (impresiones, clics, visitantes.get((campania_id, hora), ()))
+    try:
+        with transaction.atomic():
+            for campania_id, campos in totales.items():
+                PublicidadWeb.objects.filter(publicidad_id=campania_id).update(
+                    **{campo: F(campo) + cantidad for campo, cantidad in campos.items()}
+                )
+            estadisticas.acumular(por_hora)
+    except Exception:
+        #se devuelven al buffer para el siguiente intento
+        with _shards[0].lock:
+            _shards[0].conteos.update(conteos)
+            for clave, conjunto in visitantes.items():
+                _shards[0].visitantes[clave] |= conjunto
+        raise
+    return sum(conteos.values())
+
+
+@atexit.register
+def _vaciar_al_salir():
+    """no perder los eventos pendientes al detener el proceso de forma ordenada"""
+    try:
+        vaciar_contadores()
+    except Exception:
+        logger.exception("Error al guardar los contadores de publicidad pendientes al salir")
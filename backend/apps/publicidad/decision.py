@@ -0,0 +1,171 @@
+#-*- coding: utf-8 -*-
+"""motor de decision de anuncios: por ubicacion elige una campaña con probabilidad proporcional a su peso
+(tabla alias, O(1) por eleccion), respetando un tope de vistas diarias por visitante.
+peso = presupuesto diario (costo_total / dias de vigencia) x factor de ritmo segun lo entregado hasta hoy"""
+import datetime
+import random
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .estadisticas import inicio_de_dia
+from .indice import obtener_indice
+from .models import EstadisticaPublicidad
+
+#campañas sin costo cargado compiten como si costaran esto
+COSTO_MINIMO = 1.0
+#suavizado y limites del factor de ritmo
+SUAVIZADO_RITMO = 100
+RITMO_MIN = 0.5
+RITMO_MAX = 2.0
+#intentos con la tabla alias antes de recalcular sobre las campañas que no llegaron al tope
+INTENTOS = 8
+
+_tablas = None
+_lock = threading.Lock()
+
+
+class TablaAlias:
+    """muestreo ponderado de vose: construccion O(n), cada eleccion O(1)"""
+
+    def __init__(self, entradas, pesos):
+        self.entradas = entradas
+        self.pesos = pesos
+        n = len(pesos)
+        total = sum(pesos)
+        self.probabilidad = [0.0] * n
+        self.alias = [0] * n
+        escalados = [peso * n / total for peso in pesos]
+        chicos = [i for i, p in enumerate(escalados) if p < 1]
+        grandes = [i for i, p in enumerate(escalados) if p >= 1]
+        while chicos and grandes:
+            chico, grande = chicos.pop(), grandes.pop()
+            self.probabilidad[chico] = escalados[chico]
+            self.alias[chico] = grande
+            escalados[grande] -= 1 - escalados[chico]
+            (chicos if escalados[grande] < 1 else grandes).append(grande)
+        for i in chicos + grandes:
+            self.probabilidad[i] = 1.0
+
+    def elegir(self, rnd=random):
+        i = rnd.randrange(len(self.entradas))
+        return self.entradas[i] if rnd.random() < self.probabilidad[i] else self.entradas[self.alias[i]]
+
+
+def claves_de_ubicacion(entrada):
+    """una campaña se puede pedir por id de ubicacion o por su nombre"""
+    claves = {(entrada['ubicacion']['nombre'] or '').lower()} - {''}
+    if entrada.get('ubicacion_id'):
+        claves.add(str(entrada['ubicacion_id']))
+    return claves
+
+
+def presupuesto_diario(entrada):
+    inicio = datetime.date.fromisoformat(entrada['fecha_inicio'])
+    fin = datetime.date.fromisoformat(entrada['fecha_fin'])
+    return max(entrada['costo_total'], COSTO_MINIMO) / ((fin - inicio).days + 1)
+
+
+def _impresiones_por_dia(entradas):
+    """{campania_id: {fecha: impresiones}} desde el inicio de cada campaña, en una consulta"""
+    if not entradas:
+        return {}
+    desde = min(datetime.date.fromisoformat(e['fecha_inicio']) for e in entradas)
+    filas = (
+        EstadisticaPublicidad.objects
+        .filter(publicidad_id__in=[e['id'] for e in entradas], periodo__gte=inicio_de_dia(desde))
+        .annotate(dia=TruncDate('periodo'))
+        .values_list('publicidad_id', 'dia')
+        .annotate(total=Sum('impresiones'))
+    )
+    resultado = defaultdict(dict)
+    for campania_id, dia, total in filas:
+        resultado[campania_id][dia] = total
+    return resultado
+
+
+def construir_tablas(entradas):
+    """{clave de ubicacion: TablaAlias}. el ritmo compara lo que la campaña recibio desde su inicio con la parte
+    del trafico de la ubicacion que le corresponde por presupuesto: adelantada pesa menos, atrasada pesa mas"""
+    impresiones = _impresiones_por_dia(entradas)
+    por_ubicacion = defaultdict(list)
+    for entrada in entradas:
+        for clave in claves_de_ubicacion(entrada):
+            por_ubicacion[clave].append(entrada)
+
+    tablas = {}
+    for clave, candidatas in por_ubicacion.items():
+        base = [presupuesto_diario(e) for e in candidatas]
+        total_base = sum(base)
+        #trafico diario de la ubicacion (campañas vigentes)
+        trafico_por_dia = Counter()
+        for entrada in candidatas:
+            trafico_por_dia.update(impresiones.get(entrada['id'], {}))
+        pesos = []
+        for entrada, peso in zip(candidatas, base):
+            inicio = datetime.date.fromisoformat(entrada['fecha_inicio'])
+            trafico = sum(total for dia, total in trafico_por_dia.items() if dia >= inicio)
+            entregado = sum(impresiones.get(entrada['id'], {}).values())
+            esperado = trafico * peso / total_base
+            ritmo = (esperado + SUAVIZADO_RITMO) / (entregado + SUAVIZADO_RITMO)
+            pesos.append(peso * min(RITMO_MAX, max(RITMO_MIN, ritmo)))
+        tablas[clave] = TablaAlias(candidatas, pesos)
+    return tablas
+
+
+def obtener_tablas():
+    """tablas del indice vigente; se reconstruyen junto con el indice de campañas activas"""
+    global _tablas
+    indice = obtener_indice()
+    actuales = _tablas
+    if actuales is not None and actuales[0] is indice:
+        return actuales[1]
+    with _lock:
+        if _tablas is None or _tablas[0] is not indice:
+            _tablas = (indice, construir_tablas(indice.entradas))
+        return _tablas[1]
+
+
+def _clave_frecuencia(visitante):
+    return f"publicidad:frecuencia:{visitante}:{timezone.localdate().isoformat()}"
+
+
+def vistas_del_dia(visitante):
+    """{campania_id: veces que se le mostro hoy} (entrada de cache compacta por visitante y dia)"""
+    return cache.get(_clave_frecuencia(visitante)) or {}
+
+
+def anotar_vista(visitante, vistas, campania_id):
+    vistas = dict(vistas)
+    vistas[campania_id] = vistas.get(campania_id, 0) + 1
+    cache.set(_clave_frecuencia(visitante), vistas, 86400)
+
+
+def decidir(ubicacion, visitante, rnd=random):
+    """campaña a mostrar en la ubicacion para el visitante (None si no hay o todas llegaron al tope)"""
+    tabla = obtener_tablas().get(str(ubicacion).strip().lower())
+    if tabla is None:
+        return None
+    tope = settings.PUBLICIDAD_FRECUENCIA_MAX_DIA
+    vistas = vistas_del_dia(visitante) if tope > 0 else {}
+
+    elegida = None
+    for _ in range(INTENTOS):
+        candidata = tabla.elegir(rnd)
+        if tope <= 0 or vistas.get(candidata['id'], 0) < tope:
+            elegida = candidata
+            break
+    if elegida is None:
+        #la mayor parte del peso esta topada: se elige entre las que quedan
+        indices = [i for i, e in enumerate(tabla.entradas) if vistas.get(e['id'], 0) < tope]
+        if not indices:
+            return None
+        elegida = tabla.entradas[rnd.choices(indices, weights=[tabla.pesos[i] for i in indices])[0]]
+    if tope > 0:
+        anotar_vista(visitante, vistas, elegida['id'])
+    return elegida
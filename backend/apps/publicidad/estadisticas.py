@@ -0,0 +1,150 @@
+#-*- coding: utf-8 -*-
+"""estadisticas por hora de impresiones, clics y visitantes unicos de cada campaña.
+las alimenta el vaciado de contadores; compactar() resume en dias las horas antiguas"""
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.articulos.sketches import HyperLogLog
+from .models import EstadisticaPublicidad, PublicidadWeb
+
+SEGUNDOS_HORA = 3600
+
+
+def hora_de(instante):
+    """numero de hora (segundos epoch // 3600) que usan los contadores en memoria"""
+    return int(instante) // SEGUNDOS_HORA
+
+
+def inicio_de_hora(hora):
+    return datetime.datetime.fromtimestamp(hora * SEGUNDOS_HORA, tz=datetime.timezone.utc)
+
+
+def _sketch(fila):
+    if fila.visitantes:
+        return HyperLogLog.from_bytes(bytes(fila.visitantes))
+    return HyperLogLog(settings.PUBLICIDAD_ESTADISTICAS_HLL_PRECISION)
+
+
+def _sumar(fila, impresiones, clics, sketch):
+    fila.impresiones += impresiones
+    fila.clics += clics
+    actual = _sketch(fila)
+    actual.merge(sketch)
+    fila.visitantes = actual.to_bytes()
+    fila.visitantes_unicos = actual.count()
+
+
+def acumular(eventos):
+    """suma en las filas horarias {(campania_id, hora): (impresiones, clics, visitantes)}.
+    se llama dentro de la transaccion del vaciado de contadores"""
+    if not eventos:
+        return
+    ubicaciones = dict(
+        PublicidadWeb.objects.filter(publicidad_id__in={campania_id for campania_id, _ in eventos})
+        .values_list('publicidad_id', 'ubicacion_id')
+    )
+    precision = settings.PUBLICIDAD_ESTADISTICAS_HLL_PRECISION
+    for (campania_id, hora), (impresiones, clics, visitantes) in eventos.items():
+        sketch = HyperLogLog(precision)
+        for visitante in visitantes:
+            sketch.add(visitante)
+        EstadisticaPublicidad.objects.get_or_create(
+            publicidad_id=campania_id, granularidad='hora', periodo=inicio_de_hora(hora),
+            defaults={'ubicacion_id': ubicaciones.get(campania_id)},
+        )
+        #bloqueo por fila: dos procesos que vacian la misma hora suman en orden
+        fila = EstadisticaPublicidad.objects.select_for_update().get(
+            publicidad_id=campania_id, granularidad='hora', periodo=inicio_de_hora(hora)
+        )
+        _sumar(fila, impresiones, clics, sketch)
+        fila.save(update_fields=['impresiones', 'clics', 'visitantes', 'visitantes_unicos'])
+
+
+def inicio_de_dia(fecha):
+    """medianoche local de la fecha"""
+    return timezone.make_aware(datetime.datetime.combine(fecha, datetime.time.min))
+
+
+def compactar(dias=None, lote=1000):
+    """une las filas horarias con mas de `dias` dias en una fila por campaña y dia. retorna las horas compactadas"""
+    dias = settings.PUBLICIDAD_ESTADISTICAS_DIAS_HORARIAS if dias is None else dias
+    limite = inicio_de_dia(timezone.localdate() - datetime.timedelta(days=dias))
+    total = 0
+    while True:
+        horas = list(
+            EstadisticaPublicidad.objects
+            .filter(granularidad='hora', periodo__lt=limite)
+            .order_by('publicidad_id', 'periodo')[:lote]
+        )
+        if not horas:
+            return total
+        por_dia = defaultdict(list)
+        for fila in horas:
+            por_dia[(fila.publicidad_id, timezone.localtime(fila.periodo).date())].append(fila)
+
+        with transaction.atomic():
+            for (campania_id, fecha), filas in por_dia.items():
+                EstadisticaPublicidad.objects.get_or_create(
+                    publicidad_id=campania_id, granularidad='dia', periodo=inicio_de_dia(fecha),
+                    defaults={'ubicacion_id': filas[-1].ubicacion_id},
+                )
+                dia = EstadisticaPublicidad.objects.select_for_update().get(
+                    publicidad_id=campania_id, granularidad='dia', periodo=inicio_de_dia(fecha)
+                )
+                for fila in filas:
+                    _sumar(dia, fila.impresiones, fila.clics, _sketch(fila))
+                dia.save(update_fields=['impresiones', 'clics', 'visitantes', 'visitantes_unicos'])
+            EstadisticaPublicidad.objects.filter(id__in=[fila.id for fila in horas]).delete()
+        total += len(horas)
+
+
+def reporte(desde, hasta, agrupar='dia', por='campania', campania_id=None, ubicacion_id=None):
+    """filas del rango de fechas [desde, hasta] agrupadas por hora o dia y por campaña o ubicacion.
+    los dias ya compactados aparecen como una sola fila aunque se agrupe por hora"""
+    filas = (
+        EstadisticaPublicidad.objects
+        .filter(periodo__gte=inicio_de_dia(desde), periodo__lt=inicio_de_dia(hasta + datetime.timedelta(days=1)))
+        .select_related('publicidad', 'ubicacion')
+        .order_by('periodo')
+    )
+    if campania_id:
+        filas = filas.filter(publicidad_id=campania_id)
+    if ubicacion_id:
+        filas = filas.filter(ubicacion_id=ubicacion_id)
+
+    grupos = {}
+    for fila in filas.iterator():
+        periodo = timezone.localtime(fila.periodo)
+        if agrupar == 'dia':
+            periodo = periodo.replace(hour=0, minute=0, second=0, microsecond=0)
+        if por == 'ubicacion':
+            clave = (periodo, fila.ubicacion_id)
+            nombre = fila.ubicacion.nombre if fila.ubicacion_id else None
+        else:
+            clave = (periodo, fila.publicidad_id)
+            nombre = fila.publicidad.nombre_cliente
+        grupo = grupos.get(clave)
+        if grupo is None:
+            grupo = grupos[clave] = {
+                'periodo': periodo.isoformat(),
+                'id': clave[1],
+                'nombre': nombre,
+                'impresiones': 0,
+                'clics': 0,
+                'sketch': HyperLogLog(settings.PUBLICIDAD_ESTADISTICAS_HLL_PRECISION),
+            }
+        grupo['impresiones'] += fila.impresiones
+        grupo['clics'] += fila.clics
+        grupo['sketch'].merge(_sketch(fila))
+
+    resultado = []
+    for grupo in grupos.values():
+        sketch = grupo.pop('sketch')
+        grupo['visitantes_unicos'] = sketch.count()
+        grupo['ctr'] = round(grupo['clics'] / grupo['impresiones'] * 100, 2) if grupo['impresiones'] else 0.0
+        resultado.append(grupo)
+    return resultado
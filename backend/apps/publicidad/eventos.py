@@ -0,0 +1,118 @@
+#-*- coding: utf-8 -*-
+"""filtros previos a los contadores de impresiones y clics: visitante anonimo, bots, limite por visitante
+y lectura de los lotes que envia el frontend con navigator.sendBeacon"""
+import hashlib
+import json
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+#nombres de evento aceptados -> campo de PublicidadWeb
+EVENTOS = {
+    'impresion': 'impresiones',
+    'impression': 'impresiones',
+    'click': 'clics',
+    'clic': 'clics',
+}
+PATRON_BOT = re.compile(
+    r'bot|crawl|spider|slurp|preview|headless|lighthouse|facebookexternalhit|'
+    r'curl|wget|python-requests|httpclient|go-http-client|java/',
+    re.I,
+)
+#desfase maximo aceptado para el ts del cliente; fuera de rango se usa la hora del servidor
+DESFASE_PASADO = 3600
+DESFASE_FUTURO = 60
+
+
+class LoteInvalido(ValueError):
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.status = status
+
+
+def ip_cliente(request):
+    """REMOTE_ADDR; X-Forwarded-For solo si REMOTE_ADDR es un proxy de PUBLICIDAD_PROXIES_CONFIABLES.
+    en ese caso se toma la ultima ip que no es proxy (las anteriores las puede inventar el cliente)"""
+    ip = request.META.get('REMOTE_ADDR', '')
+    confiables = settings.PUBLICIDAD_PROXIES_CONFIABLES
+    if ip not in confiables:
+        return ip
+    saltos = [s.strip() for s in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if s.strip()]
+    for salto in reversed(saltos):
+        if salto not in confiables:
+            return salto
+    return ip
+
+
+def visitante_de(request):
+    """identificador anonimo del visitante para estimar unicos: usuario o hash de ip + navegador"""
+    if request.user.is_authenticated:
+        return f"u{request.user.id}"
+    ip = ip_cliente(request)
+    agente = request.META.get('HTTP_USER_AGENT', '')
+    return hashlib.blake2b(f"{ip}|{agente}".encode(), digest_size=8).hexdigest()
+
+
+def es_bot(request):
+    agente = request.META.get('HTTP_USER_AGENT', '')
+    return not agente or bool(PATRON_BOT.search(agente))
+
+
+def permitidos(visitante, cantidad):
+    """cuantos de `cantidad` eventos entran en el cupo por minuto del visitante (ventana fija en cache)"""
+    limite = settings.PUBLICIDAD_EVENTOS_POR_MINUTO
+    if limite <= 0:
+        return cantidad
+    clave = f"publicidad:eventos:{visitante}:{int(time.time()) // 60}"
+    cache.add(clave, 0, 120)
+    try:
+        usados = cache.incr(clave, cantidad)
+    except ValueError:
+        #la clave expiro entre add e incr
+        cache.set(clave, cantidad, 120)
+        usados = cantidad
+    return max(0, min(cantidad, limite - (usados - cantidad)))
+
+
+def _instante(ts, ahora):
+    try:
+        instante = float(ts)
+    except (TypeError, ValueError):
+        return None
+    if instante > 1e11:
+        #Date.now() del navegador viene en milisegundos
+        instante /= 1000
+    if ahora - DESFASE_PASADO <= instante <= ahora + DESFASE_FUTURO:
+        return min(instante, ahora)
+    return None
+
+
+def leer_lote(cuerpo):
+    """[(campania_id, campo, instante)] desde el json [{campania_id, event, ts}, ...].
+    los eventos con campos desconocidos se descartan; un cuerpo que no es una lista es un error"""
+    if len(cuerpo) > settings.PUBLICIDAD_EVENTOS_MAX_BYTES:
+        raise LoteInvalido('Lote demasiado grande', status=413)
+    try:
+        datos = json.loads(cuerpo or b'[]')
+    except ValueError:
+        raise LoteInvalido('JSON inválido')
+    if isinstance(datos, dict):
+        datos = datos.get('eventos')
+    if not isinstance(datos, list):
+        raise LoteInvalido('Se esperaba una lista de eventos')
+
+    ahora = time.time()
+    eventos = []
+    for evento in datos[:settings.PUBLICIDAD_EVENTOS_MAX_LOTE]:
+        if not isinstance(evento, dict):
+            continue
+        campo = EVENTOS.get(str(evento.get('event', '')).lower())
+        try:
+            campania_id = int(evento.get('campania_id'))
+        except (TypeError, ValueError):
+            continue
+        if campo:
+            eventos.append((campania_id, campo, _instante(evento.get('ts'), ahora)))
+    return eventos
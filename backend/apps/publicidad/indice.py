@@ -0,0 +1,188 @@
+#-*- coding: utf-8 -*-
+"""indice en memoria de las campañas web activas para api_publicidad_activas.
+se reconstruye cuando cambian campañas, items o imagenes (version en cache, valida entre procesos),
+al cambiar el dia y como respaldo cada PUBLICIDAD_INDICE_TTL segundos"""
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+
+from .models import ImagenPublicidadWeb, Publicidad
+
+CLAVE_VERSION = 'publicidad:indice:version'
+MAX_CAMPANIAS = 500
+PATRON_DIMENSIONES = re.compile(r'(\d+\s*x\s*\d+)', re.I)
+PATRON_FORMATO = re.compile(r'^([^\d]+)?\s*(\d+\s*x\s*\d+)', re.I)
+
+_indice = None
+_lock = threading.Lock()
+
+
+def normalizar_dimensiones(valor):
+    """'300 X 600 px' -> '300x600' (None si no hay dimensiones)"""
+    m = PATRON_DIMENSIONES.search(str(valor or ''))
+    return m.group(1).lower().replace(' ', '') if m else None
+
+
+def datos_ubicacion(ubicacion):
+    return {
+        'nombre': ubicacion.nombre,
+        'dimensiones': normalizar_dimensiones(ubicacion.dimensiones) or (ubicacion.dimensiones or ''),
+        'tipo': ubicacion.tipo.nombre if ubicacion.tipo_id else None,
+    }
+
+
+def ubicacion_de_formato(formato):
+    """solo para campañas que siguen sin ubicacion enlazada (la migracion 0015 enlazo las que tenian un nombre conocido):
+    'Nombre — Tipo 300x600' o solo '300x600'"""
+    formato = formato or ''
+    nombre = tipo = dimensiones = None
+    if '—' in formato:
+        izquierda, derecha = [p.strip() for p in formato.split('—', 1)]
+        nombre = izquierda or None
+        m = PATRON_FORMATO.match(derecha)
+        if m:
+            tipo = (m.group(1) or '').strip() or None
+            dimensiones = m.group(2).replace(' ', '')
+        else:
+            dimensiones = normalizar_dimensiones(formato)
+    else:
+        dimensiones = normalizar_dimensiones(formato)
+    return {'nombre': nombre, 'tipo': tipo, 'dimensiones': dimensiones}
+
+
+def _ruta_proxy(campania_id):
+    #ruta neutral anti-adblock si existe; si no, el proxy de media del dashboard
+    try:
+        return reverse('api_adimg_media', args=[campania_id])
+    except NoReverseMatch:
+        return reverse('api_publicidad_media', args=[campania_id])
+
+
+class IndicePublicidad:
+    """campañas resueltas (orden: mas recientes primero) agrupadas por dimensiones y por ubicacion/tipo"""
+
+    def __init__(self, entradas, fecha, version):
+        self.entradas = entradas
+        self.fecha = fecha
+        self.version = version
+        self.creado = time.monotonic()
+        self.ids = {entrada['id'] for entrada in entradas}
+        #dimensiones -> entradas; nombre o tipo de ubicacion -> posiciones en entradas
+        self.por_dimensiones = defaultdict(list)
+        self.por_ubicacion = defaultdict(list)
+        for posicion, entrada in enumerate(entradas):
+            ubicacion = entrada['ubicacion']
+            self.por_dimensiones[(ubicacion['dimensiones'] or '').lower()].append(entrada)
+            for clave in {(ubicacion['nombre'] or '').lower(), (ubicacion['tipo'] or '').lower()} - {''}:
+                self.por_ubicacion[clave].append(posicion)
+
+    def vigente(self, version, hoy):
+        return (
+            self.version == version and self.fecha == hoy
+            and time.monotonic() - self.creado < settings.PUBLICIDAD_INDICE_TTL
+        )
+
+    def buscar(self, q='', dimensiones='', limite=50):
+        """q: texto en nombre o tipo de la ubicacion; dimensiones: '300x600'"""
+        if q:
+            #el texto se compara contra las pocas ubicaciones distintas, no contra cada campaña
+            posiciones = set()
+            for clave, lista in self.por_ubicacion.items():
+                if q in clave:
+                    posiciones.update(lista)
+            candidatas = [self.entradas[p] for p in sorted(posiciones)]
+            if dimensiones:
+                candidatas = [e for e in candidatas if (e['ubicacion']['dimensiones'] or '').lower() == dimensiones]
+        elif dimensiones:
+            candidatas = self.por_dimensiones.get(dimensiones, [])
+        else:
+            candidatas = self.entradas
+        return candidatas[:limite]
+
+
+def construir(version, hoy):
+    """resuelve ubicacion, dimensiones y media de todas las campañas activas en dos consultas"""
+    campanias = list(
+        Publicidad.objects
+        .filter(tipo='WEB', activo=True, fecha_inicio__lte=hoy, fecha_fin__gte=hoy)
+        .filter(Q(solicitud_web__estado__in=['aprobada', 'activa']) | Q(solicitud_web__isnull=True))
+        .select_related('web_config__ubicacion__tipo')
+        .order_by('-fecha_creacion')
+        .distinct()[:MAX_CAMPANIAS]
+    )
+
+    #primera imagen de cada item de origen, en una consulta
+    items = {
+        campania.web_config.item_origen_id for campania in campanias
+        if getattr(campania, 'web_config', None) and campania.web_config.item_origen_id
+    }
+    primera_imagen = {}
+    imagenes = (
+        ImagenPublicidadWeb.objects.filter(item_id__in=items)
+        .order_by('item_id', 'orden', 'fecha_subida')
+        .values_list('item_id', 'imagen')
+    )
+    for item_id, imagen in imagenes:
+        primera_imagen.setdefault(item_id, imagen)
+
+    entradas = []
+    for campania in campanias:
+        web_config = getattr(campania, 'web_config', None)
+        if not web_config:
+            continue
+        if web_config.ubicacion_id:
+            ubicacion = datos_ubicacion(web_config.ubicacion)
+        else:
+            ubicacion = ubicacion_de_formato(web_config.formato)
+        #sin media propia ni imagen del item la campaña no se puede mostrar
+        if not web_config.archivo_media and not primera_imagen.get(web_config.item_origen_id):
+            continue
+        entradas.append({
+            'id': campania.id,
+            'ruta_proxy': _ruta_proxy(campania.id),
+            'url_destino': web_config.url_destino,
+            'formato': web_config.formato,
+            'fecha_inicio': campania.fecha_inicio.isoformat() if campania.fecha_inicio else None,
+            'fecha_fin': campania.fecha_fin.isoformat() if campania.fecha_fin else None,
+            'ubicacion': ubicacion,
+            #solo para el motor de decision (no se exponen en activas)
+            'ubicacion_id': web_config.ubicacion_id,
+            'costo_total': float(campania.costo_total or 0),
+        })
+    return IndicePublicidad(entradas, hoy, version)
+
+
+def _version():
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        cache.add(CLAVE_VERSION, uuid.uuid4().hex, None)
+        version = cache.get(CLAVE_VERSION)
+    return version
+
+
+def obtener_indice():
+    """indice vigente del proceso; por peticion solo se consulta la version en cache"""
+    global _indice
+    version = _version()
+    hoy = timezone.now().date()
+    indice = _indice
+    if indice is not None and indice.vigente(version, hoy):
+        return indice
+    with _lock:
+        indice = _indice
+        if indice is None or not indice.vigente(version, hoy):
+            indice = _indice = construir(version, hoy)
+    return indice
+
+
+def invalidar():
+    """marca el indice como obsoleto en todos los procesos; se reconstruye en la siguiente peticion"""
+    cache.set(CLAVE_VERSION, uuid.uuid4().hex, None)
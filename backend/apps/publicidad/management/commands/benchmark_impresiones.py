@@ -0,0 +1,86 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import F
+from django.test import override_settings
+from django.utils import timezone
+from apps.publicidad import contadores
+from apps.publicidad.models import Publicidad, PublicidadWeb
+
+
+def incremento_con_bloqueo(campania_id):
+    """camino anterior de api_track_impression: bloqueo de la fila, update F() y relectura por evento"""
+    with transaction.atomic():
+        campania = PublicidadWeb.objects.select_for_update().get(
+            publicidad_id=campania_id, publicidad__tipo='WEB', publicidad__activo=True
+        )
+        campania.impresiones = F('impresiones') + 1
+        campania.save(update_fields=['impresiones'])
+        campania.refresh_from_db(fields=['impresiones'])
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga de impresiones sobre una sola campaña: N hilos registrando eventos con el '
+        'bloqueo por fila anterior contra los contadores en memoria. Crea una campaña temporal y la borra al final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8)
+        parser.add_argument('--eventos', type=int, default=500, help='Impresiones por hilo')
+
+    def handle(self, *args, **options):
+        hoy = timezone.now().date()
+        publicidad = Publicidad.objects.create(
+            nombre_cliente='benchmark_impresiones', tipo='WEB', fecha_inicio=hoy, fecha_fin=hoy, activo=True
+        )
+        PublicidadWeb.objects.create(publicidad=publicidad, url_destino='http://localhost/', formato='300x250')
+        try:
+            hilos, eventos = options['hilos'], options['eventos']
+            self.stdout.write(f"{hilos} hilos x {eventos} impresiones sobre la campaña {publicidad.id}")
+            self.stdout.write(f"{'modo':<12} {'eventos/s':>10} {'escritura':>10} {'total bd':>9}")
+
+            self.medir('bloqueo', lambda: incremento_con_bloqueo(publicidad.id), publicidad.id, hilos, eventos)
+            PublicidadWeb.objects.filter(publicidad=publicidad).update(impresiones=0)
+            #intervalo largo: el timer no escribe durante la medicion; el vaciado final se mide aparte
+            with override_settings(PUBLICIDAD_CONTADORES_FLUSH_INTERVAL=3600):
+                self.medir(
+                    'contadores', lambda: contadores.registrar(publicidad.id, 'impresiones'),
+                    publicidad.id, hilos, eventos, vaciar=contadores.vaciar_contadores,
+                )
+        finally:
+            publicidad.delete()
+
+    def medir(self, nombre, registrar, campania_id, hilos, eventos, vaciar=None):
+        errores = []
+
+        def trabajar():
+            try:
+                for _ in range(eventos):
+                    registrar()
+            except Exception as e:
+                errores.append(e)
+            finally:
+                connections.close_all()
+
+        trabajadores = [threading.Thread(target=trabajar) for _ in range(hilos)]
+        inicio = time.perf_counter()
+        for trabajador in trabajadores:
+            trabajador.start()
+        for trabajador in trabajadores:
+            trabajador.join()
+        duracion = time.perf_counter() - inicio
+
+        escritura = 0.0
+        if vaciar:
+            inicio = time.perf_counter()
+            vaciar()
+            escritura = time.perf_counter() - inicio
+        total = PublicidadWeb.objects.get(publicidad_id=campania_id).impresiones
+        self.stdout.write(
+            f"{nombre:<12} {hilos * eventos / duracion:>10.0f} {escritura * 1000:>8.1f}ms {total:>9}"
+        )
+        if errores:
+            self.stderr.write(f"  {len(errores)} hilos con error: {errores[0]}")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from apps.publicidad.estadisticas import compactar
+
+
+class Command(BaseCommand):
+    help = 'Resume por dia las estadisticas horarias de publicidad mas antiguas (programar con cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=None,
+                            help='Dias que se conservan por hora (por defecto PUBLICIDAD_ESTADISTICAS_DIAS_HORARIAS)')
+
+    def handle(self, *args, **options):
+        total = compactar(options['dias'])
+        self.stdout.write(self.style.SUCCESS(f"{total} filas horarias compactadas"))
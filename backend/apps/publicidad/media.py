@@ -0,0 +1,89 @@
+#-*- coding: utf-8 -*-
+"""resolucion cacheada del archivo que sirve api_publicidad_media para cada campaña"""
+import mimetypes
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils._os import safe_join
+
+from .models import ImagenPublicidadWeb, Publicidad, PublicidadWeb
+
+
+def _clave(campania_id):
+    return f"publicidad:media:{campania_id}"
+
+
+def _ruta_relativa(valor):
+    """normaliza archivo_media (url de media, ruta relativa o absoluta dentro de media) a una ruta relativa"""
+    rel = str(valor).replace('\\', '/').strip()
+    if '/media/' in rel:
+        rel = rel.split('/media/', 1)[1]
+    elif rel.startswith(settings.MEDIA_URL):
+        rel = rel[len(settings.MEDIA_URL):]
+    return rel.lstrip('/')
+
+
+def _resolver_sin_cache(campania_id):
+    fila = (
+        Publicidad.objects.filter(id=campania_id)
+        .values_list('web_config__id', 'web_config__archivo_media', 'web_config__item_origen_id')
+        .first()
+    )
+    if fila is None:
+        return {'tipo': 'ninguno', 'mensaje': 'Campaña no encontrada'}
+    web_config_id, archivo_media, item_origen_id = fila
+    if web_config_id is None:
+        return {'tipo': 'ninguno', 'mensaje': 'No se encontró configuración web'}
+
+    relativa = None
+    if archivo_media:
+        valor = str(archivo_media).strip()
+        if valor.startswith(('http://', 'https://')):
+            return {'tipo': 'redireccion', 'url': valor}
+        relativa = _ruta_relativa(valor)
+    elif item_origen_id:
+        #sin archivo_media: primera imagen del item de solicitud de origen
+        relativa = (
+            ImagenPublicidadWeb.objects.filter(item_id=item_origen_id)
+            .order_by('orden', 'fecha_subida')
+            .values_list('imagen', flat=True)
+            .first()
+        )
+    if not relativa:
+        return {'tipo': 'ninguno', 'mensaje': 'No se encontró archivo de medios'}
+
+    try:
+        absoluta = safe_join(settings.MEDIA_ROOT, relativa)
+        estado = os.stat(absoluta)
+    except (OSError, ValueError):
+        return {'tipo': 'ninguno', 'mensaje': 'Archivo no encontrado'}
+    content_type, _ = mimetypes.guess_type(absoluta)
+    return {
+        'tipo': 'archivo',
+        'relativa': relativa,
+        'ruta': absoluta,
+        'tamano': estado.st_size,
+        'modificado': int(estado.st_mtime),
+        'content_type': content_type or 'application/octet-stream',
+        'etag': '"%x-%x"' % (estado.st_size, int(estado.st_mtime)),
+    }
+
+
+def resolver(campania_id):
+    """archivo (ruta, tamaño, etag...), redireccion o ninguno; se guarda en cache hasta que cambie la campaña"""
+    clave = _clave(campania_id)
+    media = cache.get(clave)
+    if media is None:
+        media = _resolver_sin_cache(campania_id)
+        cache.set(clave, media, settings.PUBLICIDAD_MEDIA_CACHE_TTL)
+    return media
+
+
+def invalidar(campania_ids):
+    cache.delete_many([_clave(i) for i in campania_ids])
+
+
+def campanias_de_item(item_id):
+    """campañas creadas desde el item (las que toman su imagen como media)"""
+    return list(PublicidadWeb.objects.filter(item_origen_id=item_id).values_list('publicidad_id', flat=True))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:50
+
+import apps.medios.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publicidad', '0013_delete_publicidadradial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='imagenpublicidadweb',
+            name='imagen',
+            field=models.ImageField(help_text='Imagen para la publicidad web', storage=apps.medios.storage.almacenamiento_contenido, upload_to='publicidad/web/solicitudes/%Y/%m/', verbose_name='Archivo de Imagen'),
+        ),
+    ]
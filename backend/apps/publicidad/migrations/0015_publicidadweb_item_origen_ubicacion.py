@@ -0,0 +1,95 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:56
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+PATRON_ITEM = re.compile(r'Item\s*#(\d+)')
+PATRON_DIMENSIONES = re.compile(r'(\d+)\s*x\s*(\d+)', re.I)
+LOTE = 500
+
+
+def _dimensiones(valor):
+    m = PATRON_DIMENSIONES.search(valor or '')
+    return f"{m.group(1)}x{m.group(2)}" if m else None
+
+
+def _ubicacion_de_formato(formato, por_nombre):
+    """'Nombre — Tipo 300x600' -> id de la ubicacion con ese nombre (y esas dimensiones si el nombre se repite)"""
+    if '—' not in (formato or ''):
+        return None
+    nombre, resto = [p.strip() for p in formato.split('—', 1)]
+    candidatas = por_nombre.get(nombre.lower(), [])
+    if len(candidatas) > 1:
+        dimensiones = _dimensiones(resto)
+        candidatas = [c for c in candidatas if dimensiones and c[1] == dimensiones]
+    return candidatas[0][0] if len(candidatas) == 1 else None
+
+
+def enlazar_items(apps, schema_editor):
+    """lee una sola vez el "Item #id" de las descripciones y lo guarda como item_origen y ubicacion;
+    las campañas sin item toman la ubicacion por nombre desde el formato 'Nombre — Tipo 300x600'"""
+    PublicidadWeb = apps.get_model('publicidad', 'PublicidadWeb')
+    ItemSolicitudWeb = apps.get_model('publicidad', 'ItemSolicitudWeb')
+    UbicacionPublicidadWeb = apps.get_model('publicidad', 'UbicacionPublicidadWeb')
+
+    #las ubicaciones son pocas: se cargan una vez por nombre
+    por_nombre = {}
+    for ubicacion_id, nombre, dimensiones in UbicacionPublicidadWeb.objects.values_list('id', 'nombre', 'dimensiones'):
+        por_nombre.setdefault((nombre or '').strip().lower(), []).append((ubicacion_id, _dimensiones(dimensiones)))
+
+    ultimo_id = 0
+    while True:
+        lote = list(
+            PublicidadWeb.objects.filter(id__gt=ultimo_id)
+            .filter(models.Q(item_origen__isnull=True) | models.Q(ubicacion__isnull=True))
+            .select_related('publicidad')
+            .order_by('id')[:LOTE]
+        )
+        if not lote:
+            break
+        ultimo_id = lote[-1].id
+
+        item_de_config = {}
+        for config in lote:
+            m = PATRON_ITEM.search(config.publicidad.descripcion or '')
+            if m and config.item_origen_id is None:
+                item_de_config[config.id] = int(m.group(1))
+        ubicacion_de_item = dict(
+            ItemSolicitudWeb.objects.filter(id__in=set(item_de_config.values()))
+            .values_list('id', 'ubicacion_id')
+        )
+
+        cambios = []
+        for config in lote:
+            item_id = item_de_config.get(config.id)
+            if item_id in ubicacion_de_item:
+                config.item_origen_id = item_id
+                config.ubicacion_id = ubicacion_de_item[item_id]
+            if config.ubicacion_id is None:
+                config.ubicacion_id = _ubicacion_de_formato(config.formato, por_nombre)
+            if config.item_origen_id or config.ubicacion_id:
+                cambios.append(config)
+        PublicidadWeb.objects.bulk_update(cambios, ['item_origen', 'ubicacion'], batch_size=LOTE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publicidad', '0014_imagen_almacenamiento_contenido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publicidadweb',
+            name='item_origen',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='campanias_web', to='publicidad.itemsolicitudweb', verbose_name='Item de Solicitud de origen'),
+        ),
+        migrations.AddField(
+            model_name='publicidadweb',
+            name='ubicacion',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='campanias_web', to='publicidad.ubicacionpublicidadweb', verbose_name='Ubicación'),
+        ),
+        migrations.RunPython(enlazar_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publicidad', '0015_publicidadweb_item_origen_ubicacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaPublicidad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularidad', models.CharField(choices=[('hora', 'Hora'), ('dia', 'Día')], default='hora', max_length=4, verbose_name='Granularidad')),
+                ('periodo', models.DateTimeField(verbose_name='Periodo')),
+                ('impresiones', models.PositiveIntegerField(default=0, verbose_name='Impresiones')),
+                ('clics', models.PositiveIntegerField(default=0, verbose_name='Clics')),
+                ('visitantes_unicos', models.PositiveIntegerField(default=0, verbose_name='Visitantes Únicos (estimado)')),
+                ('visitantes', models.BinaryField(verbose_name='Sketch de Visitantes')),
+                ('publicidad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas', to='publicidad.publicidad', verbose_name='Publicidad')),
+                ('ubicacion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='estadisticas', to='publicidad.ubicacionpublicidadweb', verbose_name='Ubicación')),
+            ],
+            options={
+                'verbose_name': 'Estadística de Publicidad',
+                'verbose_name_plural': 'Estadísticas de Publicidad',
+                'db_table': 'estadistica_publicidad',
+                'ordering': ['periodo'],
+                'indexes': [models.Index(fields=['periodo'], name='estadistica_periodo_b6226e_idx'), models.Index(fields=['granularidad', 'periodo'], name='estadistica_granula_49fb94_idx')],
+                'constraints': [models.UniqueConstraint(fields=('publicidad', 'granularidad', 'periodo'), name='estadistica_publicidad_unica')],
+            },
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from decimal import Decimal
+from apps.medios.storage import almacenamiento_contenido
 
 #==========================
 #base models
@@ -89,6 +90,23 @@ class PublicidadWeb(models.Model):
         null=True,
         verbose_name="URL del Archivo Multimedia"
     )
+    #item de la solicitud que origino la campaña y su ubicacion (antes se deducian de "Item #id" en la descripcion)
+    item_origen = models.ForeignKey(
+        'ItemSolicitudWeb',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='campanias_web',
+        verbose_name="Item de Solicitud de origen"
+    )
+    ubicacion = models.ForeignKey(
+        'UbicacionPublicidadWeb',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='campanias_web',
+        verbose_name="Ubicación"
+    )
     
     class Meta:
         db_table = 'publicidad_web'
@@ -361,6 +379,7 @@ class ImagenPublicidadWeb(models.Model):
     )
     imagen = models.ImageField(
         upload_to='publicidad/web/solicitudes/%Y/%m/', 
+        storage=almacenamiento_contenido,
         verbose_name="Archivo de Imagen",
         help_text="Imagen para la publicidad web"
     )
@@ -388,3 +407,56 @@ class ImagenPublicidadWeb(models.Model):
     
     def __str__(self):
         return f"Imagen {self.id} - {self.item}"
+
+#==========================
+#estadisticas de publicidad web
+#==========================
+
+class EstadisticaPublicidad(models.Model):
+    """impresiones, clics y visitantes unicos de una campaña por hora (por dia una vez compactadas)"""
+    GRANULARIDAD_CHOICES = [
+        ('hora', 'Hora'),
+        ('dia', 'Día'),
+    ]
+
+    publicidad = models.ForeignKey(
+        Publicidad,
+        on_delete=models.CASCADE,
+        related_name='estadisticas',
+        verbose_name="Publicidad"
+    )
+    ubicacion = models.ForeignKey(
+        UbicacionPublicidadWeb,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='estadisticas',
+        verbose_name="Ubicación"
+    )
+    granularidad = models.CharField(max_length=4, choices=GRANULARIDAD_CHOICES, default='hora', verbose_name="Granularidad")
+    #inicio de la hora o del dia (hora local) que resume la fila
+    periodo = models.DateTimeField(verbose_name="Periodo")
+    impresiones = models.PositiveIntegerField(default=0, verbose_name="Impresiones")
+    clics = models.PositiveIntegerField(default=0, verbose_name="Clics")
+    visitantes_unicos = models.PositiveIntegerField(default=0, verbose_name="Visitantes Únicos (estimado)")
+    #hyperloglog de los visitantes del periodo; permite unir horas en dias sin contar dos veces
+    visitantes = models.BinaryField(verbose_name="Sketch de Visitantes")
+
+    class Meta:
+        db_table = 'estadistica_publicidad'
+        verbose_name = 'Estadística de Publicidad'
+        verbose_name_plural = 'Estadísticas de Publicidad'
+        ordering = ['periodo']
+        indexes = [
+            models.Index(fields=['periodo']),
+            models.Index(fields=['granularidad', 'periodo']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['publicidad', 'granularidad', 'periodo'],
+                name='estadistica_publicidad_unica'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.publicidad_id} - {self.periodo:%Y-%m-%d %H:%M} ({self.impresiones}/{self.clics})"
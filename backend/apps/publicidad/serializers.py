@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from apps.medios import imagenes
 from .models import (
     Publicidad, PublicidadWeb,
     UbicacionPublicidadWeb, SolicitudPublicidadWeb, ItemSolicitudWeb, ImagenPublicidadWeb
@@ -62,14 +63,24 @@ class UbicacionPublicidadWebSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ('id',)
 
+class ImagenPublicidadWebListSerializer(serializers.ListSerializer):
+    """lee de una vez los derivados de todas las imagenes de la lista"""
+
+    def to_representation(self, data):
+        imagenes_web = list(data.all() if hasattr(data, 'all') else data)
+        self.child._variantes = imagenes.variantes_de(obj.imagen.name for obj in imagenes_web if obj.imagen)
+        return super().to_representation(imagenes_web)
+
 class ImagenPublicidadWebSerializer(serializers.ModelSerializer):
     """serializer para imágenes de publicidad"""
     imagen_url = serializers.SerializerMethodField()
+    imagen_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = ImagenPublicidadWeb
-        fields = ['id', 'imagen', 'imagen_url', 'descripcion', 'orden', 'fecha_subida']
+        fields = ['id', 'imagen', 'imagen_url', 'imagen_srcset', 'descripcion', 'orden', 'fecha_subida']
         read_only_fields = ('id', 'fecha_subida')
+        list_serializer_class = ImagenPublicidadWebListSerializer
     
     def get_imagen_url(self, obj):
         if obj.imagen:
@@ -79,6 +90,9 @@ class ImagenPublicidadWebSerializer(serializers.ModelSerializer):
             return obj.imagen.url
         return None
 
+    def get_imagen_srcset(self, obj):
+        return imagenes.srcset_campo(obj.imagen, self.context.get('request'), getattr(self, '_variantes', None))
+
 class ItemSolicitudWebSerializer(serializers.ModelSerializer):
     """serializer para items de solicitud"""
     ubicacion_detalle = UbicacionPublicidadWebSerializer(source='ubicacion', read_only=True)
@@ -0,0 +1,51 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import (
+    ImagenPublicidadWeb, ItemSolicitudWeb, Publicidad, PublicidadWeb,
+    SolicitudPublicidadWeb, TipoUbicacion, UbicacionPublicidadWeb,
+)
+from . import indice, media
+
+
+@receiver(post_save, sender=Publicidad)
+@receiver(post_delete, sender=Publicidad)
+def invalidar_media_campania(sender, instance, signal, created=False, **kwargs):
+    """el media sale de la configuracion web; de la campaña solo importa que exista (alta o baja)"""
+    if created or signal is post_delete:
+        media.invalidar([instance.id])
+
+
+@receiver(post_save, sender=PublicidadWeb)
+@receiver(post_delete, sender=PublicidadWeb)
+def invalidar_media_web_config(sender, instance, update_fields=None, **kwargs):
+    """el media depende del archivo_media o, sin el, del item de origen; los contadores no lo afectan"""
+    if update_fields is None or {'archivo_media', 'item_origen'} & set(update_fields):
+        media.invalidar([instance.publicidad_id])
+
+
+@receiver(post_save, sender=ImagenPublicidadWeb)
+@receiver(post_delete, sender=ImagenPublicidadWeb)
+def invalidar_media_imagen(sender, instance, **kwargs):
+    """las campañas que citan el item vuelven a resolver su primera imagen"""
+    media.invalidar(media.campanias_de_item(instance.item_id))
+
+
+@receiver(post_save, sender=Publicidad)
+@receiver(post_delete, sender=Publicidad)
+@receiver(post_save, sender=PublicidadWeb)
+@receiver(post_delete, sender=PublicidadWeb)
+@receiver(post_save, sender=ImagenPublicidadWeb)
+@receiver(post_delete, sender=ImagenPublicidadWeb)
+@receiver(post_save, sender=ItemSolicitudWeb)
+@receiver(post_delete, sender=ItemSolicitudWeb)
+@receiver(post_save, sender=SolicitudPublicidadWeb)
+@receiver(post_delete, sender=SolicitudPublicidadWeb)
+@receiver(post_save, sender=UbicacionPublicidadWeb)
+@receiver(post_delete, sender=UbicacionPublicidadWeb)
+@receiver(post_save, sender=TipoUbicacion)
+@receiver(post_delete, sender=TipoUbicacion)
+def invalidar_indice(sender, instance, update_fields=None, **kwargs):
+    """cualquier cambio que afecte que campañas se sirven o donde; los contadores no cuentan"""
+    if update_fields is not None and set(update_fields) <= {'impresiones', 'clics'}:
+        return
+    indice.invalidar()
@@ -0,0 +1,33 @@
+import threading
+from collections import Counter
+
+from django.test import SimpleTestCase
+
+from . import contadores
+
+
+class ShardsContadoresTests(SimpleTestCase):
+    """los hilos deben repartirse entre todos los shards y no compartir uno solo"""
+
+    def test_hilos_repartidos_entre_shards(self):
+        cantidad = len(contadores._shards)
+        asignados = []
+        listos = threading.Barrier(cantidad * 4)
+
+        def trabajar():
+            #todos vivos a la vez para que el sistema no reutilice idents
+            listos.wait()
+            asignados.append(contadores.shard_del_hilo())
+
+        hilos = [threading.Thread(target=trabajar) for _ in range(cantidad * 4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        por_shard = Counter(asignados)
+        self.assertEqual(set(por_shard), set(range(cantidad)))
+        self.assertEqual(max(por_shard.values()) - min(por_shard.values()), 0)
+
+    def test_shard_estable_por_hilo(self):
+        self.assertEqual(contadores.shard_del_hilo(), contadores.shard_del_hilo())
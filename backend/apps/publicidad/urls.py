@@ -4,6 +4,7 @@ from .api.views import (
     UbicacionPublicidadViewSet,
     SolicitudPublicidadViewSet,
     PublicidadWebCampaignViewSet,
+    decidir_anuncio,
 )
 
 #router para api rest
@@ -14,4 +15,5 @@ router.register(r'campanias-web', PublicidadWebCampaignViewSet, basename='campan
 
 urlpatterns = [
     path('api/', include(router.urls)),
+    path('decidir/', decidir_anuncio, name='publicidad_decidir'),
 ]
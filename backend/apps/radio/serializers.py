@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from apps.medios import imagenes
 from .models import EstacionRadio, GeneroMusical, Conductor, Programa, ProgramaConductor, HorarioPrograma
 
 class EstacionRadioSerializer(serializers.ModelSerializer):
@@ -11,10 +12,20 @@ class GeneroMusicalSerializer(serializers.ModelSerializer):
         model = GeneroMusical
         fields = ['id', 'nombre', 'descripcion']
 
+class ConductorListSerializer(serializers.ListSerializer):
+    """lee de una vez los derivados de las fotos de toda la lista"""
+
+    def to_representation(self, data):
+        conductores = list(data.all() if hasattr(data, 'all') else data)
+        self.child._variantes = imagenes.variantes_de(obj.foto.name for obj in conductores if obj.foto)
+        return super().to_representation(conductores)
+
 class ConductorSerializer(serializers.ModelSerializer):
     """serializador para el modelo conductor (versión pública)"""
     #creamos un campo 'foto_url' que devuelva la url completa de la imagen
     foto_url = serializers.SerializerMethodField()
+    #urls de los derivados por formato para <source srcset>
+    foto_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Conductor
@@ -24,8 +35,10 @@ class ConductorSerializer(serializers.ModelSerializer):
             'nombre', 
             'apellido', 
             'apodo', 
-            'foto_url'  # Usamos el campo personalizado
+            'foto_url',  # Usamos el campo personalizado
+            'foto_srcset'
         ]
+        list_serializer_class = ConductorListSerializer
 
     def get_foto_url(self, obj):
         #esta funcion construye la url absoluta de la foto
@@ -37,6 +50,9 @@ class ConductorSerializer(serializers.ModelSerializer):
             return obj.foto.url
         return None
 
+    def get_foto_srcset(self, obj):
+        return imagenes.srcset_campo(obj.foto, self.context.get('request'), getattr(self, '_variantes', None))
+
 class HorarioProgramaSerializer(serializers.ModelSerializer):
     dia_semana_display = serializers.CharField(source='get_dia_semana_display', read_only=True)
     
@@ -7,7 +7,7 @@ from django.contrib.auth import login, logout
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
-from django.core.mail import send_mail
+from apps.contact.outbox import encolar_email
 from django.conf import settings
 from .models import User
 from .serializers import (
@@ -109,13 +109,8 @@ def password_reset_request(request):
             message = f"""hola {user.first_name or user.username}, recibimos una solicitud para restablecer tu contraseña en radio oriente fm. para crear una nueva contraseña, haz clic en el siguiente enlace: {reset_url} este enlace expirará en 24 horas. si no solicitaste este cambio, puedes ignorar este correo electrónico y tu contraseña permanecerá sin cambios. saludos, el equipo de radio oriente fm"""
 
             try:
-                send_mail(
-                    subject,
-                    message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [email],
-                    fail_silently=False,
-                )
+                #se encola; el envio smtp ocurre fuera del request
+                encolar_email(subject, [email], message)
             except Exception:
                 #fallar silenciosamente por seguridad
                 pass
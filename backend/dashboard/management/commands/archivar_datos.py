@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.common.archivado import POLITICAS, archivar_modelo
+
+
+class Command(BaseCommand):
+    help = (
+        'Archiva en jsonl.gz (ARCHIVE_ROOT) y elimina en lotes las notificaciones, mensajes de chat '
+        'e infracciones mas antiguos que su retencion (RETENCION_DIAS). '
+        'Pensado para cron, p.ej.: 0 4 * * * python manage.py archivar_datos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modelo', action='append', choices=sorted(POLITICAS),
+                            help='Limitar a uno o mas modelos (por defecto todos)')
+        parser.add_argument('--dias', type=int, help='Sobrescribe la retencion configurada')
+        parser.add_argument('--batch', type=int, help='Filas por lote (por defecto ARCHIVE_BATCH_SIZE)')
+        parser.add_argument('--dry-run', action='store_true', help='Solo cuenta las filas a archivar')
+        parser.add_argument('--intervalo', type=int, default=0,
+                            help='Segundos entre ejecuciones; si es mayor a 0 queda corriendo como planificador')
+
+    def handle(self, *args, **options):
+        if options['dias'] is not None and options['dias'] < 0:
+            raise CommandError('--dias debe ser mayor o igual a 0')
+
+        while True:
+            self.ejecutar(options)
+            if options['intervalo'] <= 0:
+                break
+            time.sleep(options['intervalo'])
+
+    def ejecutar(self, options):
+        for etiqueta in options['modelo'] or POLITICAS:
+            resultado = archivar_modelo(
+                etiqueta,
+                dias=options['dias'],
+                batch_size=options['batch'],
+                dry_run=options['dry_run'],
+            )
+            if options['dry_run']:
+                self.stdout.write(f"{etiqueta}: {resultado['filas']} filas por archivar")
+                continue
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{etiqueta}: {resultado['filas']} filas movidas en {resultado['segundos']:.2f}s "
+                f"({resultado['filas_por_segundo']:.0f} filas/s)"
+            ))
+            if resultado['archivo']:
+                self.stdout.write(f"  -> {resultado['archivo']}")
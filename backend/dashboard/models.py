@@ -1,10 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
-from django.dispatch import receiver
 from django.utils import timezone
 from django.urls import reverse
-from apps.articulos.models import Articulo
 
 User = get_user_model()
 
@@ -35,19 +32,3 @@ class Notificacion(models.Model):
     
     def __str__(self):
         return f"{self.titulo} - {self.usuario.username}"
-
-#señal para notificar cuando se crea un nuevo artículo
-@receiver(post_save, sender=Articulo)
-def notificar_nuevo_articulo(sender, instance, created, **kwargs):
-    if created:
-        from django.contrib.auth.models import User
-        admin_users = User.objects.filter(is_staff=True)
-        
-        for user in admin_users:
-            Notificacion.objects.create(
-                usuario=user,
-                titulo="Nuevo Artículo Creado",
-                mensaje=f"Se ha creado un nuevo artículo: {instance.titulo}",
-                tipo='nuevo_articulo',
-                url=f'/dashboard/articulos/editar/{instance.id}/'
-            )
@@ -1,130 +1,170 @@
-from django.http import FileResponse, HttpResponse
+from django.conf import settings
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
-from django.shortcuts import get_object_or_404
-import os
-import mimetypes
+import csv
+import datetime
+import logging
+import re
 
-@csrf_exempt
-@require_http_methods(["GET"])
-def api_publicidad_media(request, campania_id):
-    """sirve directamente la imagen de una campaña de publicidad. esta vista actúa como proxy para evitar bloqueos de adblockers"""
-    try:
-        from apps.publicidad.models import Publicidad, ItemSolicitudWeb
-        import logging
-        logger = logging.getLogger(__name__)
+logger = logging.getLogger(__name__)
 
-        #obtener la campaña
-        pub = get_object_or_404(Publicidad, id=campania_id)
-        logger.info(f"[PUBLICIDAD MEDIA] Campaña ID: {campania_id}")
+RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK = 64 * 1024
+MAX_DIAS_REPORTE = 366
+COLUMNAS_REPORTE = ['periodo', 'id', 'nombre', 'impresiones', 'clics', 'ctr', 'visitantes_unicos']
 
-        #obtener el archivo de media
-        wc = getattr(pub, 'web_config', None)
-        if not wc:
-            logger.error(f"[PUBLICIDAD MEDIA] No se encontró web_config para campaña {campania_id}")
-            return HttpResponse('No se encontró configuración web', status=404)
 
-        archivo_media = getattr(wc, 'archivo_media', None)
+def _rango(request, media):
+    """(inicio, fin) de un unico rango 'bytes=a-b' valido; None si se pide el archivo completo; False si es insatisfacible"""
+    cabecera = request.headers.get('Range', '')
+    m = RANGO.match(cabecera.strip())
+    if not m or not any(m.groups()):
+        #sin rango, multiples rangos o sintaxis desconocida: archivo completo
+        return None
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range != media['etag']:
+        return None
+    tamano = media['tamano']
+    inicio, fin = m.groups()
+    if inicio == '':
+        #sufijo: los ultimos n bytes
+        largo = int(fin)
+        if largo == 0:
+            return False
+        return max(0, tamano - largo), tamano - 1
+    inicio = int(inicio)
+    fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio >= tamano or inicio > fin:
+        return False
+    return inicio, fin
 
-        #si no hay archivo_media, intentar obtener desde itemsolicitudweb
-        if not archivo_media:
-            logger.info(f"[PUBLICIDAD MEDIA] No hay archivo_media, buscando en ItemSolicitudWeb")
-            try:
-                import re
-                desc = getattr(pub, 'descripcion', '') or ''
-                m = re.search(r'Item\s*#(\d+)', desc)
-                if m:
-                    item_id = int(m.group(1))
-                    item = ItemSolicitudWeb.objects.get(id=item_id)
-                    img = item.imagenes_web.order_by('orden', 'fecha_subida').first()
-                    if img and getattr(img, 'imagen', None):
-                        archivo_media = img.imagen
-                        logger.info(f"[PUBLICIDAD MEDIA] Imagen encontrada desde Item #{item_id}")
-            except Exception as e:
-                logger.error(f"[PUBLICIDAD MEDIA] Error al buscar imagen en Item: {str(e)}")
-
-        if not archivo_media:
-            logger.error(f"[PUBLICIDAD MEDIA] No se encontró imagen para campaña {campania_id}")
-            return HttpResponse('No se encontró archivo de medios', status=404)
-
-        #obtener la ruta completa del archivo
-        try:
-            if hasattr(archivo_media, 'path'):
-                file_path = archivo_media.path
-            elif hasattr(archivo_media, 'url'):
-                from django.conf import settings
-                rel = str(archivo_media.url)
-                #normalizar contra media_url si aplica
-                if rel.startswith(settings.MEDIA_URL):
-                    rel = rel[len(settings.MEDIA_URL):]
-                #asegurar ruta relativa para evitar que os.path.join ignore media_root
-                rel = rel.lstrip('/')
-                file_path = os.path.join(settings.MEDIA_ROOT, rel)
-            else:
-                #si es string/relativo/absoluto
-                from django.conf import settings
-                rel = str(archivo_media)
-                #normalizar separadores para analisis
-                rel_norm = rel.replace('\\', '/').strip()
-                #si es url completa, redirigir directamente
-                if rel_norm.startswith('http://') or rel_norm.startswith('https://'):
-                    logger.info(f"[PUBLICIDAD MEDIA] Redirigiendo a URL externa: {rel_norm}")
-                    from django.http import HttpResponseRedirect
-                    return HttpResponseRedirect(rel_norm)
-                #si contiene segmento /media/, extraer parte relativa después de 'media/'
-                if '/media/' in rel_norm:
-                    rel_part = rel_norm.split('/media/', 1)[1]
-                else:
-                    rel_part = rel_norm
-                    #si empieza con media_url, recortar
-                    if rel_part.startswith(settings.MEDIA_URL):
-                        rel_part = rel_part[len(settings.MEDIA_URL):]
-                #asegurar ruta relativa (evitar que comience con '/' o 'c:/')
-                while rel_part.startswith('/'):
-                    rel_part = rel_part[1:]
-                if ':' in rel_part and '/media/' in rel_norm:
-                    rel_part = rel_norm.split('/media/', 1)[1]
-                file_path = os.path.join(settings.MEDIA_ROOT, rel_part)
-
-            #verificar que el archivo existe
-            if not os.path.exists(file_path):
-                logger.error(f"[PUBLICIDAD MEDIA] Archivo no encontrado: {file_path}")
-                return HttpResponse('Archivo no encontrado', status=404)
-                
-            #determinar content-type
-            content_type, _ = mimetypes.guess_type(file_path)
-            if not content_type:
-                content_type = 'application/octet-stream'
 
-            #abrir y devolver el archivo
-            response = FileResponse(open(file_path, 'rb'), content_type=content_type)
+def _leer(ruta, inicio, largo):
+    with open(ruta, 'rb') as archivo:
+        archivo.seek(inicio)
+        while largo > 0:
+            datos = archivo.read(min(CHUNK, largo))
+            if not datos:
+                break
+            largo -= len(datos)
+            yield datos
+
+
+def _enviar_archivo(request, media):
+    modo = settings.PUBLICIDAD_MEDIA_SENDFILE
+    if modo:
+        #el servidor web lee y envia el archivo (y atiende los rangos); python no toca los bytes
+        response = HttpResponse(content_type=media['content_type'])
+        if modo == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = settings.PUBLICIDAD_MEDIA_ACCEL_PREFIX + media['relativa']
+        else:
+            response['X-Sendfile'] = media['ruta']
+        return response
+
+    rango = _rango(request, media)
+    if rango is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f"bytes */{media['tamano']}"
+        return response
+    if rango is None:
+        #FileResponse usa wsgi.file_wrapper (sendfile) cuando el servidor lo ofrece
+        return FileResponse(open(media['ruta'], 'rb'), content_type=media['content_type'])
+    inicio, fin = rango
+    response = StreamingHttpResponse(
+        _leer(media['ruta'], inicio, fin - inicio + 1), status=206, content_type=media['content_type']
+    )
+    response['Content-Range'] = f"bytes {inicio}-{fin}/{media['tamano']}"
+    response['Content-Length'] = str(fin - inicio + 1)
+    return response
+
 
-            #headers para evitar bloqueos de adblockers
-            response['Cache-Control'] = 'public, max-age=3600'
-            response['Access-Control-Allow-Origin'] = '*'
+@csrf_exempt
+@require_http_methods(["GET", "HEAD"])
+def api_publicidad_media(request, campania_id):
+    """sirve directamente la imagen de una campaña de publicidad. esta vista actúa como proxy para evitar bloqueos de adblockers"""
+    from apps.publicidad import media as media_publicidad
 
-            logger.info(f"[PUBLICIDAD MEDIA] Imagen servida correctamente: {file_path}")
-            return response
+    try:
+        #ruta ya resuelta en cache; sin consultas ni stat mientras la campaña no cambie
+        media = media_publicidad.resolver(campania_id)
+        if media['tipo'] == 'redireccion':
+            return HttpResponseRedirect(media['url'])
+        if media['tipo'] == 'ninguno':
+            return HttpResponse(media['mensaje'], status=404)
 
-        except Exception as e:
-            logger.error(f"[PUBLICIDAD MEDIA] Error al acceder al archivo: {str(e)}")
-            #al acceder al archivo, intentar con la url
+        response = get_conditional_response(
+            request, etag=media['etag'], last_modified=media['modificado']
+        )
+        if response is None:
             try:
-                media_url = getattr(archivo_media, 'url', None)
-                if media_url:
-                    logger.info(f"[PUBLICIDAD MEDIA] Redirigiendo a: {media_url}")
-                    from django.http import HttpResponseRedirect
-                    return HttpResponseRedirect(media_url)
-            except Exception as e2:
-                logger.error(f"[PUBLICIDAD MEDIA] Error al redirigir: {str(e2)}")
-                pass
+                response = _enviar_archivo(request, media)
+            except FileNotFoundError:
+                #el archivo cambio en disco despues de cachear la ruta
+                media_publicidad.invalidar([campania_id])
+                logger.error(f"[PUBLICIDAD MEDIA] Archivo no encontrado: {media['ruta']}")
+                return HttpResponse('Archivo no encontrado', status=404)
 
-            return HttpResponse(f'Error al servir la imagen: {str(e)}', status=500)
+        response['ETag'] = media['etag']
+        response['Last-Modified'] = http_date(media['modificado'])
+        response['Accept-Ranges'] = 'bytes'
+        #headers para evitar bloqueos de adblockers
+        response['Cache-Control'] = 'public, max-age=3600'
+        response['Access-Control-Allow-Origin'] = '*'
+        return response
 
     except Exception as e:
-        import logging
-        logger = logging.getLogger(__name__)
         logger.error(f"[PUBLICIDAD MEDIA] Error general: {str(e)}")
         import traceback
         traceback.print_exc()
         return HttpResponse(f'Error: {str(e)}', status=500)
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+@require_http_methods(["GET"])
+def api_publicidad_estadisticas(request):
+    """impresiones, clics, ctr y visitantes unicos desde las estadisticas por hora/dia. parametros:
+    desde, hasta (YYYY-MM-DD, por defecto los ultimos 7 dias), agrupar (hora|dia), por (campania|ubicacion),
+    campania, ubicacion (ids opcionales), formato (json|csv)"""
+    from apps.publicidad import estadisticas
+
+    hoy = timezone.localdate()
+    try:
+        hasta = parse_date(request.GET.get('hasta') or '') or hoy
+        desde = parse_date(request.GET.get('desde') or '') or hasta - datetime.timedelta(days=6)
+        campania_id = int(request.GET['campania']) if request.GET.get('campania') else None
+        ubicacion_id = int(request.GET['ubicacion']) if request.GET.get('ubicacion') else None
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Parámetros inválidos'}, status=400)
+    agrupar = request.GET.get('agrupar', 'dia')
+    por = request.GET.get('por', 'campania')
+    formato = request.GET.get('formato', 'json')
+    if agrupar not in ('hora', 'dia') or por not in ('campania', 'ubicacion') or formato not in ('json', 'csv'):
+        return JsonResponse({'success': False, 'message': 'Parámetros inválidos'}, status=400)
+    if desde > hasta or (hasta - desde).days >= MAX_DIAS_REPORTE:
+        return JsonResponse(
+            {'success': False, 'message': f'El rango debe ser de 1 a {MAX_DIAS_REPORTE} días'}, status=400
+        )
+
+    filas = estadisticas.reporte(desde, hasta, agrupar, por, campania_id, ubicacion_id)
+    if formato == 'csv':
+        response = HttpResponse(content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="publicidad_{desde}_{hasta}.csv"'
+        escritor = csv.DictWriter(response, fieldnames=COLUMNAS_REPORTE)
+        escritor.writeheader()
+        escritor.writerows(filas)
+        return response
+    return JsonResponse({
+        'success': True,
+        'desde': desde.isoformat(),
+        'hasta': hasta.isoformat(),
+        'agrupar': agrupar,
+        'por': por,
+        'filas': filas,
+    })
@@ -35,6 +35,8 @@ urlpatterns = [
     #api de seguimiento de publicidad
     path('api/publicidad/campanias/<int:campania_id>/impresion/', views.api_track_impression, name='api_track_impression'),
     path('api/publicidad/campanias/<int:campania_id>/click/', views.api_track_click, name='api_track_click'),
+    path('api/publicidad/eventos/', views.api_publicidad_eventos, name='api_publicidad_eventos'),
+    path('api/publicidad/estadisticas/', publicidad_views.api_publicidad_estadisticas, name='api_publicidad_estadisticas'),
     path('api/publicidad/solicitudes/<int:solicitud_id>/estado/', views.api_cambiar_estado_solicitud, name='api_cambiar_estado_solicitud'),
     path('api/publicidad/campanias-web/<int:campania_id>/', views.eliminar_campania_web, name='api_eliminar_campania_web'),
     path('api/publicidad/campanias-web/<int:campania_id>/actualizar_web/', views.api_actualizar_campania_web, name='api_actualizar_campania_web'),
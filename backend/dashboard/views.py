@@ -32,6 +32,8 @@ from .forms import ConductorForm
 
 from apps.users.models import User
 from apps.articulos.models import Articulo, Categoria
+from apps.articulos import busqueda as busqueda_articulos
+from apps.medios.subidas import REGLAS_ARTICULO, REGLAS_IMAGEN, subida_streaming
 from .models import Notificacion
 from apps.radio.models import Programa, EstacionRadio, HorarioPrograma, GeneroMusical, ReproduccionRadio, Conductor, ProgramaConductor
 from apps.chat.models import ChatMessage, InfraccionUsuario
@@ -128,11 +130,8 @@ def dashboard_articulos(request):
     articulos = Articulo.objects.select_related('autor', 'categoria').all()
 
     if search_query:
-        articulos = articulos.filter(
-            Q(titulo__icontains=search_query) |
-            Q(resumen__icontains=search_query) |
-            Q(contenido__icontains=search_query)
-        )
+        #usa el indice de texto completo en lugar de icontains sobre contenido
+        articulos = busqueda_articulos.filtrar(articulos, search_query)
 
     if status_filter == 'publicado':
         articulos = articulos.filter(publicado=True)
@@ -1492,13 +1491,9 @@ def api_publicidad_activas(request):
       - limit: máximo de resultados (por defecto 50)
     """
     from django.http import JsonResponse
-    from django.utils import timezone
-    from django.db.models import Q
-    from apps.publicidad.models import Publicidad, ItemSolicitudWeb
-    import re
+    from apps.publicidad.indice import obtener_indice
 
     try:
-        hoy = timezone.now().date()
         q = (request.GET.get('q') or '').strip().lower()
         dimensiones_filter = (request.GET.get('dimensiones') or '').strip().lower()
         try:
@@ -1507,178 +1502,23 @@ def api_publicidad_activas(request):
             limit = 50
         limit = max(1, min(limit, 200))
 
-        #cargar campañas web activas en rango de fechas y publicadas/aprobadas
-        #considera
-        #- solicitudes aprobadas o activas
-        #- campañas creadas manualmente (sin solicitud asociada)
-        pubs = (Publicidad.objects
-                .filter(
-                    tipo='WEB',
-                    activo=True,
-                    fecha_inicio__lte=hoy,
-                    fecha_fin__gte=hoy,
-                )
-                .filter(Q(solicitud_web__estado__in=['aprobada', 'activa']) | Q(solicitud_web__isnull=True))
-                .select_related('web_config')
-                .order_by('-fecha_creacion')
-                .distinct()[:500])
-
-        items = []
-        for pub in pubs:
-            wc = getattr(pub, 'web_config', None)
-            if not wc:
-                continue
-            #obtener media url
-            media_val = getattr(wc, 'archivo_media', None)
-            media_url = None
-            if media_val:
-                media_url = getattr(media_val, 'url', None) or str(media_val)
-
-            #intentar resolver ubicacion desde la descripcion (item #id)
-            ubic = None
-            item_from_desc = None
-            try:
-                desc = getattr(pub, 'descripcion', '') or ''
-                m = re.search(r'Item\s*#(\d+)', desc)
-                if m:
-                    item_id = int(m.group(1))
-                    item = ItemSolicitudWeb.objects.select_related('ubicacion__tipo').get(id=item_id)
-                    item_from_desc = item
-                    if item.ubicacion:
-                        #normalizar dimensiones de la ubicacion a formato 000x000
-                        dims_raw = getattr(item.ubicacion, 'dimensiones', None) or ''
-                        dims_norm = None
-                        try:
-                            m_dims = re.search(r"(\d+\s*[xX]\s*\d+)", str(dims_raw), re.I)
-                            if m_dims:
-                                dims_norm = m_dims.group(1).lower().replace(' ', '')
-                        except Exception:
-                            pass
-                        ubic = {
-                            'nombre': getattr(item.ubicacion, 'nombre', None),
-                            'dimensiones': dims_norm or (getattr(item.ubicacion, 'dimensiones', None) or ''),
-                            'tipo': getattr(getattr(item.ubicacion, 'tipo', None), 'nombre', None),
-                        }
-            except Exception:
-                pass
-
-            #fallback desde formato
-            if not ubic:
-                formato = getattr(wc, 'formato', '') or ''
-                nombre = None
-                tipo = None
-                dims = None
-                if '—' in formato:
-                    partes = [p.strip() for p in formato.split('—', 1)]
-                    if partes:
-                        nombre = partes[0] or None
-                    if len(partes) > 1:
-                        right = partes[1]
-                        m2 = re.match(r'^([^\d]+)?\s*(\d+\s*x\s*\d+)', right, re.I)
-                        if m2:
-                            tipo = (m2.group(1) or '').strip() or None
-                            dims = (m2.group(2) or '').replace(' ', '')
-                        else:
-                            #buscar dimensiones en cualquier parte
-                            m3 = re.search(r'(\d+\s*x\s*\d+)', formato, re.I)
-                            if m3:
-                                dims = m3.group(1).replace(' ', '')
-                else:
-                    #solo dimensiones presentes
-                    m4 = re.search(r'(\d+\s*x\s*\d+)', formato, re.I)
-                    dims = m4.group(1).replace(' ', '') if m4 else None
-                ubic = {
-                    'nombre': nombre,
-                    'tipo': tipo,
-                    'dimensiones': dims,
-                }
-
-            #si aún no hay ubicacion, intentar desde la solicitud asociada
-            if not ubic:
-                try:
-                    sol_rel = getattr(pub, 'solicitud_web', None)
-                    if sol_rel:
-                        item_sol = (ItemSolicitudWeb.objects
-                                    .select_related('ubicacion__tipo')
-                                    .filter(solicitud_id=getattr(sol_rel, 'id', None))
-                                    .order_by('id')
-                                    .first())
-                        if item_sol and item_sol.ubicacion:
-                            dims_raw2 = getattr(item_sol.ubicacion, 'dimensiones', None) or ''
-                            dims_norm2 = None
-                            try:
-                                m_dims2 = re.search(r"(\d+\s*[xX]\s*\d+)", str(dims_raw2), re.I)
-                                if m_dims2:
-                                    dims_norm2 = m_dims2.group(1).lower().replace(' ', '')
-                            except Exception:
-                                pass
-                            ubic = {
-                                'nombre': getattr(item_sol.ubicacion, 'nombre', None),
-                                'dimensiones': dims_norm2 or (getattr(item_sol.ubicacion, 'dimensiones', None) or ''),
-                                'tipo': getattr(getattr(item_sol.ubicacion, 'tipo', None), 'nombre', None),
-                            }
-                            #media fallback desde imagen del item si sigue faltando
-                            if not media_url:
-                                try:
-                                    img2 = item_sol.imagenes_web.order_by('orden', 'fecha_subida').first()
-                                    if img2 and getattr(img2, 'imagen', None):
-                                        media_url = getattr(img2.imagen, 'url', None) or str(img2.imagen)
-                                except Exception:
-                                    pass
-                except Exception:
-                    pass
-
-            #fallback de media desde la primera imagen del item asociado
-            if not media_url and item_from_desc is not None:
-                try:
-                    img = item_from_desc.imagenes_web.order_by('orden', 'fecha_subida').first()
-                    if img and getattr(img, 'imagen', None):
-                        media_url = getattr(img.imagen, 'url', None) or str(img.imagen)
-                except Exception:
-                    pass
-
-            if not media_url:
-                continue
-
-            #asegurar url absoluta para el frontend
-            try:
-                if isinstance(media_url, str) and media_url.startswith('/'):
-                    media_url = request.build_absolute_uri(media_url)
-            except Exception:
-                pass
-
-            #aplicar filtros
-            if q:
-                nombre_l = (ubic.get('nombre') or '').lower()
-                tipo_l = (ubic.get('tipo') or '').lower()
-                if (q not in nombre_l) and (q not in tipo_l):
-                    continue
-            if dimensiones_filter and (ubic.get('dimensiones') or '').lower() != dimensiones_filter:
-                continue
-
-            #forzar uso de proxy anti-adblock (ruta neutral)
-            try:
-                from django.urls import reverse
-                try:
-                    proxy_path = reverse('api_adimg_media', args=[pub.id])
-                except Exception:
-                    proxy_path = reverse('api_publicidad_media', args=[pub.id])  #compatibilidad
-                media_url_proxy = request.build_absolute_uri(proxy_path)
-            except Exception:
-                media_url_proxy = media_url
-
-            items.append({
-                'id': pub.id,
-                'media_url': media_url_proxy,
-                'url_destino': getattr(wc, 'url_destino', None),
-                'formato': getattr(wc, 'formato', None),
-                'fecha_inicio': pub.fecha_inicio.isoformat() if pub.fecha_inicio else None,
-                'fecha_fin': pub.fecha_fin.isoformat() if pub.fecha_fin else None,
-                'ubicacion': ubic,
-            })
-            if len(items) >= limit:
-                break
+        #campañas ya resueltas en memoria (ubicacion, dimensiones, media); aqui solo se filtra
+        entradas = obtener_indice().buscar(q, dimensiones_filter, limit)
 
+        #forzar uso de proxy anti-adblock (ruta neutral) con url absoluta para el frontend
+        base = request.build_absolute_uri('/')[:-1]
+        items = [
+            {
+                'id': entrada['id'],
+                'media_url': base + entrada['ruta_proxy'],
+                'url_destino': entrada['url_destino'],
+                'formato': entrada['formato'],
+                'fecha_inicio': entrada['fecha_inicio'],
+                'fecha_fin': entrada['fecha_fin'],
+                'ubicacion': entrada['ubicacion'],
+            }
+            for entrada in entradas
+        ]
         return JsonResponse({'success': True, 'items': items})
     except Exception as e:
         import traceback
@@ -1767,7 +1607,9 @@ def api_aprobar_solicitud(request, solicitud_id: int):
                     url_destino=item_solicitud.url_destino or '',
                     formato=formato_str,
                     impresiones=0,
-                    clics=0
+                    clics=0,
+                    item_origen=item_solicitud,
+                    ubicacion=item_solicitud.ubicacion,
                 )
 
                 #copiar la primera imagen asociada al ítem (si existe)
@@ -1819,7 +1661,7 @@ def api_aprobar_solicitud(request, solicitud_id: int):
                     f"Tu solicitud fue aprobada. Rango: {start_date} a {end_date}. "
                     f"Pronto verás tu campaña publicada."
                 )
-                UserNotification.objects.create(
+                UserNotification.crear_para_usuario(
                     usuario=sol.usuario,
                     tipo='publicidad',
                     titulo=titulo,
@@ -1892,7 +1734,7 @@ def api_cambiar_estado_solicitud(request, solicitud_id: int):
             titulo = f"Estado actualizado: {sol.get_estado_display()}"
             mensaje = f"Tu solicitud cambió a estado: {sol.get_estado_display()}"
 
-        UserNotification.objects.create(
+        UserNotification.crear_para_usuario(
             usuario=sol.usuario,
             tipo='publicidad',
             titulo=titulo,
@@ -1967,7 +1809,7 @@ def api_actualizar_campania_web(request, campania_id: int):
 def api_ver_campania(request, campania_id: int):
     """devuelve los detalles de una campaña publicidad (web) para la vista de dashboard. estructura esperada por el frontend (verdetallescampania): { id, nombre_cliente, activo, fecha_inicio, fecha_fin, web_config: { url_destino, formato, archivo_media, impresiones, clics } }"""
     try:
-        pub = Publicidad.objects.select_related('web_config').get(id=campania_id, tipo='WEB')
+        pub = Publicidad.objects.select_related('web_config__ubicacion__tipo').get(id=campania_id, tipo='WEB')
     except Publicidad.DoesNotExist:
         return JsonResponse({'success': False, 'message': 'Campaña no encontrada'}, status=404)
 
@@ -1998,22 +1840,14 @@ def api_ver_campania(request, campania_id: int):
             'clics': getattr(wc, 'clics', 0) or 0,
         }
 
-    #intenta obtener la ubicacion como el nombre, tipo, dimensiones desde el item original
-    try:
-        desc = getattr(pub, 'descripcion', '') or ''
-        import re
-        m = re.search(r'Item\s*#(\d+)', desc)
-        if m:
-            item_id = int(m.group(1))
-            item = ItemSolicitudWeb.objects.select_related('ubicacion__tipo').get(id=item_id)
-            if item.ubicacion:
-                data['ubicacion'] = {
-                    'nombre': getattr(item.ubicacion, 'nombre', None),
-                    'dimensiones': getattr(item.ubicacion, 'dimensiones', None),
-                    'tipo': getattr(getattr(item.ubicacion, 'tipo', None), 'nombre', None),
-                }
-    except Exception:
-        pass
+    #ubicacion (nombre, tipo, dimensiones) del item original
+    ubicacion = getattr(wc, 'ubicacion', None) if wc else None
+    if ubicacion:
+        data['ubicacion'] = {
+            'nombre': ubicacion.nombre,
+            'dimensiones': ubicacion.dimensiones,
+            'tipo': ubicacion.tipo.nombre if ubicacion.tipo_id else None,
+        }
     return JsonResponse(data)
 
 @csrf_exempt
@@ -2242,6 +2076,7 @@ def api_item_imagenes(request, item_id: int):
     except ItemSolicitudWeb.DoesNotExist:
         return JsonResponse({'success': False, 'message': 'Item no encontrado'}, status=404)
 
+@subida_streaming(REGLAS_IMAGEN)
 @csrf_exempt
 @require_http_methods(["POST"])
 def api_item_subir_imagen(request, item_id: int):
@@ -2453,6 +2288,7 @@ def delete_user(request, user_id):
 #crud operations for articulos
 @login_required
 @user_passes_test(is_staff_user)
+@subida_streaming(REGLAS_ARTICULO, redireccion='dashboard_articulos')
 def create_articulo(request):
     """crear nuevo artículo con soporte multimedia"""
     if request.method == 'POST':
@@ -2513,6 +2349,7 @@ def create_articulo(request):
 
 @login_required
 @user_passes_test(is_staff_user)
+@subida_streaming(REGLAS_ARTICULO, redireccion='dashboard_articulos')
 def edit_articulo(request, articulo_id):
     """editar artículo con soporte multimedia"""
     articulo = get_object_or_404(Articulo, id=articulo_id)
@@ -3379,11 +3216,11 @@ def dashboard_notificaciones(request):
     filtro_leidas = request.GET.get('leidas', '')
     
     #query base - solo notificaciones del usuario actual
-    notificaciones = Notification.objects.filter(usuario=request.user).order_by("-fecha_creacion")
+    notificaciones = Notification.objects.filter(usuario=request.user).select_related('evento').order_by("-fecha_creacion")
     
     #aplicar filtros
     if filtro_tipo:
-        notificaciones = notificaciones.filter(tipo=filtro_tipo)
+        notificaciones = notificaciones.filter(evento__tipo=filtro_tipo)
     
     if filtro_leidas == 'si':
         notificaciones = notificaciones.filter(leido=True)
@@ -3420,8 +3257,7 @@ def marcar_notificacion_leida(request, notificacion_id):
     from apps.notifications.models import Notification
     
     notificacion = get_object_or_404(Notification, id=notificacion_id, usuario=request.user)
-    notificacion.leido = True
-    notificacion.save()
+    notificacion.marcar_como_leido()
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'success': True})
@@ -3434,10 +3270,14 @@ def marcar_notificacion_leida(request, notificacion_id):
 @require_http_methods(['POST'])
 def eliminar_notificacion(request, notificacion_id):
     """eliminar una notificacion"""
-    from apps.notifications.models import Notification
+    from apps.notifications.models import Notification, NotificationEvent
+    from apps.notifications.contador import ajustar_no_leidas
     
     notificacion = get_object_or_404(Notification, id=notificacion_id, usuario=request.user)
     notificacion.delete()
+    NotificationEvent.eliminar_huerfanos([notificacion.evento_id])
+    if not notificacion.leido:
+        ajustar_no_leidas([notificacion.usuario_id], -1)
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'success': True})
@@ -3452,8 +3292,10 @@ def eliminar_notificacion(request, notificacion_id):
 def marcar_todas_leidas(request):
     """marcar todas las notificaciones como leídas"""
     from apps.notifications.models import Notification
+    from apps.notifications.contador import reiniciar_no_leidas
     
     count = Notification.objects.filter(usuario=request.user, leido=False).update(leido=True)
+    reiniciar_no_leidas(request.user.id)
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'success': True, 'count': count})
@@ -3527,87 +3369,64 @@ def api_get_calendar_events(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def _registrar_evento_publicidad(request, campania_id, campo):
+    """acumula el evento en los contadores en memoria y responde 204 sin tocar la base de datos"""
+    from apps.publicidad import contadores, eventos
+    from apps.publicidad.indice import obtener_indice
+
+    #solo campañas que se estan mostrando (indice en memoria: sin consultas)
+    if campania_id not in obtener_indice().ids:
+        return JsonResponse(
+            {'success': False, 'message': 'Campaña no encontrada o inactiva'},
+            status=404
+        )
+    #bots y visitantes sobre el cupo reciben la misma respuesta pero no se cuentan
+    visitante = eventos.visitante_de(request)
+    if not eventos.es_bot(request) and eventos.permitidos(visitante, 1):
+        contadores.registrar(campania_id, campo, visitante)
+    return HttpResponse(status=204)
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def api_track_impression(request, campania_id):
     """registra una impresión para una campaña de publicidad web"""
-    from apps.publicidad.models import PublicidadWeb
-    
-    try:
-        with transaction.atomic():
-            #bloquea el registro para actualización
-            campania = PublicidadWeb.objects.select_for_update().get(
-                publicidad_id=campania_id,
-                publicidad__tipo='WEB',
-                publicidad__activo=True
-            )
-            campania.impresiones = F('impresiones') + 1
-            campania.save(update_fields=['impresiones'])
-            #obtener el valor actualizado desde la bd
-            campania.refresh_from_db(fields=['impresiones'])
-            
-            #registrar la impresión en el log
-            print(f"[PUBLICIDAD] Impresión registrada para campaña {campania_id}")
-            
-            return JsonResponse({
-                'success': True,
-                'message': 'Impresión registrada correctamente',
-                'nuevo_total': int(campania.impresiones)
-            })
-            
-    except PublicidadWeb.DoesNotExist:
-        return JsonResponse(
-            {'success': False, 'message': 'Campaña no encontrada o inactiva'}, 
-            status=404
-        )
-    except Exception as e:
-        print(f"[ERROR] Error al registrar impresión: {str(e)}")
-        return JsonResponse(
-            {'success': False, 'message': 'Error al registrar la impresión'}, 
-            status=500
-        )
+    return _registrar_evento_publicidad(request, campania_id, 'impresiones')
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
 def api_track_click(request, campania_id):
-    """registra un clic para una campaña de publicidad web"""
-    from apps.publicidad.models import PublicidadWeb
-    
+    """registra un clic para una campaña de publicidad web. el frontend redirige a la url_destino que ya conoce"""
+    return _registrar_evento_publicidad(request, campania_id, 'clics')
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def api_publicidad_eventos(request):
+    """recibe en una sola peticion (navigator.sendBeacon) las impresiones y clics de todos los banners de la pagina.
+    cuerpo json: [{"campania_id": 1, "event": "impresion" | "click", "ts": epoch en ms}, ...]"""
+    from apps.publicidad import contadores, eventos
+    from apps.publicidad.indice import obtener_indice
+
     try:
-        with transaction.atomic():
-            #bloquea el registro para actualización
-            campania = PublicidadWeb.objects.select_for_update().get(
-                publicidad_id=campania_id,
-                publicidad__tipo='WEB',
-                publicidad__activo=True
-            )
-            campania.clics = F('clics') + 1
-            campania.save(update_fields=['clics'])
-            #obtener el valor actualizado desde la bd
-            campania.refresh_from_db(fields=['clics'])
-            
-            #registrar el clic en el log
-            print(f"[PUBLICIDAD] Clic registrado para campaña {campania_id}")
-            
-            #devolver la url de destino para redirección en el frontend
-            return JsonResponse({
-                'success': True,
-                'redirect_url': campania.url_destino,
-                'nuevo_total': int(campania.clics)
-            })
-            
-    except PublicidadWeb.DoesNotExist:
-        return JsonResponse(
-            {'success': False, 'message': 'Campaña no encontrada o inactiva'}, 
-            status=404
-        )
-    except Exception as e:
-        print(f"[ERROR] Error al registrar clic: {str(e)}")
-        return JsonResponse(
-            {'success': False, 'message': 'Error al registrar el clic'}, 
-            status=500
-        )
+        if int(request.META.get('CONTENT_LENGTH') or 0) > settings.PUBLICIDAD_EVENTOS_MAX_BYTES:
+            raise eventos.LoteInvalido('Lote demasiado grande', status=413)
+        lote = eventos.leer_lote(request.body)
+    except eventos.LoteInvalido as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=e.status)
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Cabecera Content-Length inválida'}, status=400)
+
+    if lote and not eventos.es_bot(request):
+        #campañas fuera del indice de activas se descartan sin consultar la base
+        activas = obtener_indice().ids
+        lote = [evento for evento in lote if evento[0] in activas]
+        visitante = eventos.visitante_de(request)
+        cupo = eventos.permitidos(visitante, len(lote)) if lote else 0
+        if cupo:
+            contadores.registrar_lote(lote[:cupo], visitante)
+    return HttpResponse(status=204)
 
 
 #========================
@@ -3792,7 +3611,7 @@ def dashboard_password_reset(request):
             from django.contrib.auth.tokens import default_token_generator
             from django.utils.encoding import force_bytes
             from django.utils.http import urlsafe_base64_encode
-            from django.core.mail import send_mail
+            from apps.contact.outbox import encolar_email
 
             token = default_token_generator.make_token(user)
             uid = urlsafe_base64_encode(force_bytes(user.pk))
@@ -3805,22 +3624,12 @@ def dashboard_password_reset(request):
             subject = 'Recuperación de Contraseña - Radio Oriente FM Dashboard'
             message = f"""hola {user.first_name or user.username}, recibimos una solicitud para restablecer tu contraseña del dashboard de radio oriente fm. para crear una nueva contraseña, haz clic en el siguiente enlace: {reset_url} este enlace expirará en 24 horas. si no solicitaste este cambio, puedes ignorar este correo electrónico y tu contraseña permanecerá sin cambios. saludos, el equipo de radio oriente fm"""
 
-            try:
-                send_mail(
-                    subject,
-                    message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [email],
-                    fail_silently=False,
-                )
-                return render(request, 'dashboard/password_reset.html', {
-                    'success': True,
-                    'message': 'Se ha enviado un correo electrónico con instrucciones para restablecer tu contraseña.'
-                })
-            except Exception as e:
-                return render(request, 'dashboard/password_reset.html', {
-                    'error': f'Error al enviar el correo: {str(e)}'
-                })
+            #se encola en el outbox; el envio smtp no bloquea la respuesta
+            encolar_email(subject, [email], message)
+            return render(request, 'dashboard/password_reset.html', {
+                'success': True,
+                'message': 'Se ha enviado un correo electrónico con instrucciones para restablecer tu contraseña.'
+            })
 
         except User.DoesNotExist:
             #por seguridad, mostrar el mismo mensaje aunque el email no exista
@@ -3834,53 +3643,32 @@ def dashboard_password_reset(request):
 @login_required
 @user_passes_test(is_staff_user)
 @require_http_methods(["POST"])
+@subida_streaming(REGLAS_IMAGEN)
 def api_subir_imagen_campania(request):
     """api para subir imágenes de campañas de publicidad"""
     import os
-    import uuid
-    from django.core.files.storage import default_storage
-    from django.core.files.base import ContentFile
-    from django.conf import settings
+    from apps.medios.storage import almacenamiento_contenido
     
     try:
         if 'imagen' not in request.FILES:
             return JsonResponse({'success': False, 'message': 'No se envió ningún archivo'}, status=400)
         
+        #tipo (por magic bytes) y tamaño ya se validaron mientras se recibia el archivo
         imagen = request.FILES['imagen']
         
-        #validar tipo de archivo
-        allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/gif', 'image/webp']
-        if imagen.content_type not in allowed_types:
-            return JsonResponse({
-                'success': False, 
-                'message': 'Tipo de archivo no permitido. Solo se permiten imágenes (JPEG, PNG, GIF, WebP)'
-            }, status=400)
-        
-        #validar tamaño (máximo 5mb)
-        if imagen.size > 5 * 1024 * 1024:
-            return JsonResponse({
-                'success': False, 
-                'message': 'El archivo es demasiado grande. Máximo 5MB'
-            }, status=400)
-        
-        #generar nombre unico para el archivo
+        #guardar archivo por contenido: volver a subir el mismo banner reutiliza el blob existente
+        #(el nombre ya trae la extension del tipo detectado, no la del cliente)
         ext = os.path.splitext(imagen.name)[1].lower()
-        filename = f"campania_{uuid.uuid4().hex}{ext}"
-        
-        #crear directorio si no existe
-        upload_path = os.path.join('publicidad', 'campanias')
-        full_path = os.path.join(upload_path, filename)
-        
-        #guardar archivo
-        saved_path = default_storage.save(full_path, ContentFile(imagen.read()))
+        storage = almacenamiento_contenido()
+        saved_path = storage.save(os.path.join('publicidad', 'campanias', f"campania{ext}"), imagen)
         
         #construir url completa
-        file_url = default_storage.url(saved_path)
+        file_url = storage.url(saved_path)
         
         return JsonResponse({
             'success': True,
             'url': file_url,
-            'filename': filename,
+            'filename': os.path.basename(saved_path),
             'message': 'Imagen subida correctamente'
         })
         
@@ -10,12 +10,13 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'radio_oriente.settings')
 django.setup()
 
 from apps.chat import routing
+from apps.notifications import routing as notifications_routing
 
 application = ProtocolTypeRouter({
     "http": get_asgi_application(),
     "websocket": AuthMiddlewareStack(
         URLRouter(
-            routing.websocket_urlpatterns
+            routing.websocket_urlpatterns + notifications_routing.websocket_urlpatterns
         )
     ),
 })
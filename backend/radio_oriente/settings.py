@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 import dj_database_url
 #build paths inside the project like this: base_dir / 'subdir'
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'apps.emergente',
     'apps.publicidad',
     'apps.notifications',
+    'apps.medios',
     'dashboard',
 ]
 
@@ -200,6 +201,22 @@ SESSION_COOKIE_SAMESITE = 'Lax'
 CSRF_COOKIE_SECURE = False
 SESSION_COOKIE_SECURE = False
 
+#cache (desarrollo: memoria local; con varios procesos usar redis via REDIS_URL)
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 #channels configuration (desarrollo: capa en memoria)
 CHANNEL_LAYERS = {
     'default': {
@@ -207,6 +224,99 @@ CHANNEL_LAYERS = {
     },
 }
 
+#notificaciones para staff
+#true: las inserciones se difieren a un pool de hilos tras el commit
+NOTIFICATIONS_ASYNC = config('NOTIFICATIONS_ASYNC', default=False, cast=bool)
+NOTIFICATIONS_WORKERS = config('NOTIFICATIONS_WORKERS', default=2, cast=int)
+NOTIFICATIONS_BATCH_SIZE = config('NOTIFICATIONS_BATCH_SIZE', default=500, cast=int)
+#segundos que vive el contador de no leidas en cache antes de recalcularse
+NOTIFICATIONS_COUNTER_TTL = config('NOTIFICATIONS_COUNTER_TTL', default=3600, cast=int)
+#ventana en segundos para agrupar cambios seguidos de programas/horarios (0 = sin agrupar)
+NOTIFICATIONS_COALESCE_WINDOW = config('NOTIFICATIONS_COALESCE_WINDOW', default=10, cast=float)
+
+#vistas de articulos: se acumulan en memoria y se escriben en bloque
+#segundos entre escrituras (0 = escribir en cada vista)
+ARTICULOS_VISTAS_FLUSH_INTERVAL = config('ARTICULOS_VISTAS_FLUSH_INTERVAL', default=5, cast=float)
+#vistas acumuladas que fuerzan una escritura inmediata
+ARTICULOS_VISTAS_BUFFER_MAX = config('ARTICULOS_VISTAS_BUFFER_MAX', default=1000, cast=int)
+#'exacto': una fila por (articulo, usuario) en usuarios_que_vieron
+#'compacto': hyperloglog + bloom de lectores recientes por articulo (python manage.py benchmark_vistas)
+ARTICULOS_VISTAS_MODO = config('ARTICULOS_VISTAS_MODO', default='exacto')
+#2^precision bytes por articulo; 11 -> 2 KB y ~2.3% de error en lectores unicos
+ARTICULOS_HLL_PRECISION = config('ARTICULOS_HLL_PRECISION', default=11, cast=int)
+#lectores recientes que recuerda el bloom y su tasa de falsos positivos. empieza con capacidad para
+#ARTICULOS_BLOOM_CAPACIDAD_INICIAL lectores (~200 bytes) y se duplica con el articulo hasta la capacidad maxima
+ARTICULOS_BLOOM_CAPACIDAD = config('ARTICULOS_BLOOM_CAPACIDAD', default=10000, cast=int)
+ARTICULOS_BLOOM_CAPACIDAD_INICIAL = config('ARTICULOS_BLOOM_CAPACIDAD_INICIAL', default=128, cast=int)
+ARTICULOS_BLOOM_ERROR = config('ARTICULOS_BLOOM_ERROR', default=0.01, cast=float)
+
+#listados de articulos: caracteres de contenido por tarjeta y vida en cache de las urls de media
+ARTICULOS_LISTA_CONTENIDO_MAX = config('ARTICULOS_LISTA_CONTENIDO_MAX', default=300, cast=int)
+ARTICULOS_MEDIA_CACHE_TTL = config('ARTICULOS_MEDIA_CACHE_TTL', default=86400, cast=int)
+#feeds de portada (mas_vistos, destacados): articulos por feed y segundos en cache
+ARTICULOS_FEED_TOP = config('ARTICULOS_FEED_TOP', default=100, cast=int)
+ARTICULOS_FEED_TTL = config('ARTICULOS_FEED_TTL', default=300, cast=int)
+#la lista de categorias se invalida al cambiar articulos o categorias; el ttl es solo un respaldo
+ARTICULOS_CATEGORIAS_CACHE_TTL = config('ARTICULOS_CATEGORIAS_CACHE_TTL', default=3600, cast=int)
+
+#derivados de imagenes subidas (portadas, conductores, publicidad)
+#anchos en px; no se amplian imagenes mas chicas que el ancho pedido
+IMAGENES_ANCHOS = config('IMAGENES_ANCHOS', default='320,640,1024,1600', cast=lambda v: [int(a) for a in v.split(',') if a.strip()])
+#avif/webp se omiten si pillow no los soporta
+IMAGENES_FORMATOS = config('IMAGENES_FORMATOS', default='avif,webp,jpeg', cast=lambda v: [f.strip() for f in v.split(',') if f.strip()])
+IMAGENES_CALIDAD = config('IMAGENES_CALIDAD', default=80, cast=int)
+#true: se generan en un pool de procesos tras el commit (la subida no espera)
+IMAGENES_ASYNC = config('IMAGENES_ASYNC', default=True, cast=bool)
+IMAGENES_WORKERS = config('IMAGENES_WORKERS', default=2, cast=int)
+IMAGENES_CACHE_TTL = config('IMAGENES_CACHE_TTL', default=86400, cast=int)
+#imagenes de articulos y publicidad guardadas por sha-256 (un solo archivo por contenido)
+MEDIA_DEDUPLICAR = config('MEDIA_DEDUPLICAR', default=True, cast=bool)
+#horas que se conserva un blob sin referencias antes de que limpiar_blobs lo borre
+MEDIA_BLOBS_GRACIA_HORAS = config('MEDIA_BLOBS_GRACIA_HORAS', default=24, cast=int)
+#subidas por streaming: limites (MB) que se cortan apenas se superan y carpeta de temporales
+#(dentro de MEDIA_ROOT para que guardar el archivo sea un rename)
+MEDIA_MAX_IMAGEN_MB = config('MEDIA_MAX_IMAGEN_MB', default=5, cast=int)
+MEDIA_MAX_ADJUNTO_MB = config('MEDIA_MAX_ADJUNTO_MB', default=10, cast=int)
+MEDIA_SUBIDAS_TMP = config('MEDIA_SUBIDAS_TMP', default=os.path.join(MEDIA_ROOT, 'tmp'))
+
+#proxy de media de publicidad (api_publicidad_media)
+#la ruta resuelta por campaña se invalida al cambiar la campaña o sus imagenes; el ttl es solo un respaldo
+PUBLICIDAD_MEDIA_CACHE_TTL = config('PUBLICIDAD_MEDIA_CACHE_TTL', default=3600, cast=int)
+#'' = django envia el archivo; 'x-sendfile' (apache) o 'x-accel-redirect' (nginx) delegan el envio al servidor web
+PUBLICIDAD_MEDIA_SENDFILE = config('PUBLICIDAD_MEDIA_SENDFILE', default='')
+#location interna de nginx que apunta a MEDIA_ROOT (solo x-accel-redirect)
+PUBLICIDAD_MEDIA_ACCEL_PREFIX = config('PUBLICIDAD_MEDIA_ACCEL_PREFIX', default='/media-interna/')
+#segundos maximos que un proceso usa su indice de campañas activas sin reconstruirlo (respaldo de la invalidacion)
+PUBLICIDAD_INDICE_TTL = config('PUBLICIDAD_INDICE_TTL', default=300, cast=int)
+#impresiones y clics: se acumulan en memoria (repartidos en shards por hilo) y se escriben en bloque
+#segundos entre escrituras (0 = escribir en cada evento); python manage.py benchmark_impresiones
+PUBLICIDAD_CONTADORES_FLUSH_INTERVAL = config('PUBLICIDAD_CONTADORES_FLUSH_INTERVAL', default=5, cast=float)
+PUBLICIDAD_CONTADORES_SHARDS = config('PUBLICIDAD_CONTADORES_SHARDS', default=16, cast=int)
+#lotes de eventos (navigator.sendBeacon): eventos y bytes maximos por lote
+PUBLICIDAD_EVENTOS_MAX_LOTE = config('PUBLICIDAD_EVENTOS_MAX_LOTE', default=50, cast=int)
+PUBLICIDAD_EVENTOS_MAX_BYTES = config('PUBLICIDAD_EVENTOS_MAX_BYTES', default=16384, cast=int)
+#eventos por minuto que se cuentan a un mismo visitante (0 = sin limite); el exceso se descarta sin escribir
+PUBLICIDAD_EVENTOS_POR_MINUTO = config('PUBLICIDAD_EVENTOS_POR_MINUTO', default=120, cast=int)
+#ips de los proxies propios (nginx, balanceador) cuyo X-Forwarded-For se acepta para identificar al visitante
+PUBLICIDAD_PROXIES_CONFIABLES = config('PUBLICIDAD_PROXIES_CONFIABLES', default='', cast=Csv())
+#veces por dia que /api/publicidad/decidir/ muestra una misma campaña a un visitante (0 = sin tope)
+PUBLICIDAD_FRECUENCIA_MAX_DIA = config('PUBLICIDAD_FRECUENCIA_MAX_DIA', default=3, cast=int)
+#estadisticas por hora de cada campaña: dias que se conservan por hora antes de que
+#python manage.py compactar_estadisticas_publicidad las resuma por dia
+PUBLICIDAD_ESTADISTICAS_DIAS_HORARIAS = config('PUBLICIDAD_ESTADISTICAS_DIAS_HORARIAS', default=30, cast=int)
+#2^precision bytes por fila para estimar visitantes unicos; 10 -> 1 KB y ~3% de error
+PUBLICIDAD_ESTADISTICAS_HLL_PRECISION = config('PUBLICIDAD_ESTADISTICAS_HLL_PRECISION', default=10, cast=int)
+
+#retencion de datos historicos (dias): python manage.py archivar_datos
+ARCHIVE_ROOT = config('ARCHIVE_ROOT', default=os.path.join(BASE_DIR, 'archivo'))
+ARCHIVE_BATCH_SIZE = config('ARCHIVE_BATCH_SIZE', default=1000, cast=int)
+RETENCION_DIAS = {
+    'notifications.Notification': config('RETENCION_NOTIFICACIONES_DIAS', default=90, cast=int),
+    'chat.ChatMessage': config('RETENCION_CHAT_DIAS', default=30, cast=int),
+    #las infracciones cuentan para el bloqueo automatico, se conservan mas tiempo
+    'chat.InfraccionUsuario': config('RETENCION_INFRACCIONES_DIAS', default=365, cast=int),
+}
+
 #custom user model
 AUTH_USER_MODEL = 'users.User'
 
@@ -224,5 +334,27 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@radiooriente.com')
 
+#newsletter: entregas por lote con una conexion smtp cada uno
+#true: el envio corre en un hilo tras el commit; false: en linea (o con python manage.py procesar_correos)
+NEWSLETTER_ASYNC = config('NEWSLETTER_ASYNC', default=True, cast=bool)
+NEWSLETTER_BATCH_SIZE = config('NEWSLETTER_BATCH_SIZE', default=100, cast=int)
+NEWSLETTER_WORKERS = config('NEWSLETTER_WORKERS', default=2, cast=int)
+#correos por segundo entre todos los hilos (0 = sin limite)
+NEWSLETTER_RATE_LIMIT = config('NEWSLETTER_RATE_LIMIT', default=10, cast=float)
+NEWSLETTER_MAX_INTENTOS = config('NEWSLETTER_MAX_INTENTOS', default=3, cast=int)
+#segundos tras los cuales las entregas reclamadas por un proceso caido se pueden volver a enviar
+NEWSLETTER_LOCK_TIMEOUT = config('NEWSLETTER_LOCK_TIMEOUT', default=600, cast=int)
+
+#cola de correos salientes (EmailOutbox): python manage.py procesar_correos --intervalo 5
+#true: ademas del worker, tras cada commit un hilo vacia la cola (util sin worker dedicado)
+EMAIL_OUTBOX_ASYNC = config('EMAIL_OUTBOX_ASYNC', default=True, cast=bool)
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=50, cast=int)
+EMAIL_OUTBOX_MAX_INTENTOS = config('EMAIL_OUTBOX_MAX_INTENTOS', default=5, cast=int)
+#reintentos con espera exponencial en segundos: base, 2*base, 4*base... hasta el maximo
+EMAIL_OUTBOX_BACKOFF_BASE = config('EMAIL_OUTBOX_BACKOFF_BASE', default=60, cast=int)
+EMAIL_OUTBOX_BACKOFF_MAX = config('EMAIL_OUTBOX_BACKOFF_MAX', default=3600, cast=int)
+#segundos tras los cuales un lote reclamado por un worker caido vuelve a la cola
+EMAIL_OUTBOX_LOCK_TIMEOUT = config('EMAIL_OUTBOX_LOCK_TIMEOUT', default=600, cast=int)
+
 #frontend url (para enlaces en emails)
 FRONTEND_URL = config('FRONTEND_URL', default='http://localhost:3000')
\ No newline at end of file
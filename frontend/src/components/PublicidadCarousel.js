@@ -12,6 +12,31 @@ function parseDims(dimStr) {
   return { w: parseInt(m[1], 10), h: parseInt(m[2], 10) };
 }
 
+//cola de impresiones compartida por todos los carruseles de la pagina: se envian juntas en un solo beacon
+const EVENTOS_URL = `${import.meta.env.VITE_API_URL || 'http://localhost:8000'}/dashboard/api/publicidad/eventos/`;
+let eventosPendientes = [];
+let eventosTimer = null;
+
+function enviarEventos() {
+  clearTimeout(eventosTimer);
+  eventosTimer = null;
+  if (!eventosPendientes.length) return;
+  const cuerpo = JSON.stringify(eventosPendientes);
+  eventosPendientes = [];
+  //text/plain: sendBeacon no necesita preflight cors
+  if (navigator.sendBeacon && navigator.sendBeacon(EVENTOS_URL, cuerpo)) return;
+  fetch(EVENTOS_URL, { method: 'POST', body: cuerpo, keepalive: true }).catch(() => {});
+}
+
+function encolarEvento(campaniaId, event) {
+  eventosPendientes.push({ campania_id: campaniaId, event, ts: Date.now() });
+  if (!eventosTimer) eventosTimer = setTimeout(enviarEventos, 2000);
+}
+
+if (typeof window !== 'undefined') {
+  window.addEventListener('pagehide', enviarEventos);
+}
+
 //variantes de animacion para los paneles
 const panelVariants = {
   hidden: (position) => ({
@@ -168,15 +193,8 @@ export default function PublicidadCarousel({
 
   const impressedOnceRef = useRef(new Set());
 
-  const trackImpression = async (campaignId) => {
-    try {
-      const base = import.meta.env.VITE_API_URL || 'http://localhost:8000';
-      await fetch(`${base}/dashboard/api/publicidad/campanias/${campaignId}/impresion/`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' }
-      });
-    } catch (e) {
-    }
+  const trackImpression = (campaignId) => {
+    encolarEvento(campaignId, 'impresion');
   };
 
   const trackClick = async (campaignId) => {
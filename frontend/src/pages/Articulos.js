@@ -16,6 +16,7 @@ const Articles = () => {
   const [selectedArticle, setSelectedArticle] = useState(null);
   const [selectedCategory, setSelectedCategory] = useState('');
   const [searchTerm, setSearchTerm] = useState('');
+  const [searchResults, setSearchResults] = useState(null);
 
   //estados de paginación
   const [currentPage, setCurrentPage] = useState(1);
@@ -97,9 +98,15 @@ const Articles = () => {
     if (location.state?.selectedArticleId && articles.length > 0) {
       const article = articles.find(a => a.id === location.state.selectedArticleId);
       if (article) {
-        setSelectedArticle(article);
         //limpiar el estado para evitar que se abra nuevamente
         window.history.replaceState({}, document.title);
+        //la lista solo trae un extracto: el cuerpo completo viene del detalle
+        api.get(`/api/articulos/api/articulos/${article.slug}/`)
+          .then(response => setSelectedArticle(response.data))
+          .catch(error => {
+            console.error('Error loading article detail:', error);
+            setSelectedArticle(article);
+          });
       }
     }
   }, [location.state, articles]);
@@ -177,15 +184,40 @@ const Articles = () => {
     );
   };
 
+  //buscar en el backend: la lista solo trae un extracto del contenido
+  useEffect(() => {
+    const termino = searchTerm.trim();
+    if (!termino) {
+      setSearchResults(null);
+      return undefined;
+    }
+    let cancelado = false;
+    const timer = setTimeout(async () => {
+      try {
+        const response = await api.get('/api/articulos/buscar/', { params: { q: termino } });
+        if (!cancelado) setSearchResults(response.data.results || []);
+      } catch (error) {
+        console.error('Error searching articles:', error);
+        if (!cancelado) setSearchResults(null);
+      }
+    }, 300);
+    return () => {
+      cancelado = true;
+      clearTimeout(timer);
+    };
+  }, [searchTerm]);
+
   //memoizar artículos filtrados
   const filteredArticles = useMemo(() => {
+    if (searchTerm && searchResults) return searchResults;
+    //mientras llega la respuesta (o si falla) se filtra por titulo y extracto de la pagina actual
     return articles.filter(article => {
       const matchesSearch = !searchTerm ||
         article.titulo.toLowerCase().includes(searchTerm.toLowerCase()) ||
         (article.contenido && article.contenido.toLowerCase().includes(searchTerm.toLowerCase()));
       return matchesSearch;
     });
-  }, [articles, searchTerm]);
+  }, [articles, searchTerm, searchResults]);
 
   //memoizar artículos destacados y regulares
   const { featuredArticles, regularArticles } = useMemo(() => {